@@ -272,9 +272,8 @@ main(int argc, char* argv[])
     appContainer.Start(Seconds(0));
     appContainer.Stop(appStopTime);
 
-    std::ofstream outputFile;
-    // Delete contents of the file as it is opened
-    outputFile.open("durations.txt", std::ofstream::out | std::ofstream::trunc);
+    // Time on air of an application packet at each SF, read from the table shared with the PHYs
+    std::vector<std::pair<uint32_t, LoraTxParameters>> transmissions;
     for (uint8_t sf = 7; sf <= 12; sf++)
     {
         LoraTxParameters txParams;
@@ -301,7 +300,15 @@ main(int argc, char* argv[])
         macHdr.SetMajor(1);
         pkt->AddHeader(macHdr);
 
-        outputFile << LoraPhy::GetOnAirTime(pkt, txParams).GetMicroSeconds() << " ";
+        transmissions.emplace_back(pkt->GetSize(), txParams);
+    }
+
+    std::ofstream outputFile;
+    // Delete contents of the file as it is opened
+    outputFile.open("durations.txt", std::ofstream::out | std::ofstream::trunc);
+    for (const auto& duration : LoraPhy::GetOnAirTimes(transmissions))
+    {
+        outputFile << duration.GetMicroSeconds() << " ";
     }
     outputFile.close();
 
@@ -0,0 +1,182 @@
+#!/usr/bin/python3
+import numpy as np
+
+# Modelo analítico de capacidade de uma rede LoRaWAN como a do littoral, para pré-triagem das varreduras do runSim.py:
+# estima o PDR, a probabilidade de colisão e a energia por ED de toda uma grade numED × sideLength × pktsPerDay ×
+# distribuição de SF em milissegundos, sem simular. Ex.:
+#
+#   res = avaliarGrade(numED=[200, 600, 1000], sideLength=[4000, 10000], pktsPerDay=[72, 144, 288])
+#   res['PDR'].shape   # (3, 2, 3, 1): a última dimensão é a das distribuições de SF (só a do alcance, aqui)
+#
+# O modelo:
+#   - posições de EDs sorteadas uma única vez (semente fixa) no quadrado (ou disco) do littoral, escaladas por
+#     sideLength, com os gateways nas posições do littoral. Perda log-distância (7.7 dB a 1 m, expoente
+#     pathLossExp) até o melhor gateway, mais um sombreamento gaussiano de desvio desvioSombra. A perda por
+#     penetração em prédios e o modelo de Okumura-Hata não são considerados;
+#   - SF de cada ED pelo critério de LorawanMacHelper::SetSpreadingFactorsUp (sensibilidade do ED a 14 dBm), ou
+#     por uma distribuição dada, atribuída dos EDs mais fortes (SF7) aos mais fracos (SF12);
+#   - tempo no ar pela mesma fórmula de LoraPhy::GetOnAirTime;
+#   - chegadas Poisson (Aloha puro) divididas entre os nCanais canais. Um pacote sobrevive a um interferente de SF j
+#     se a SIR superar o isolamento da matriz (collisionSnirGoursaud ou collisionSnirAloha de
+#     LoraInterferenceHelper). A interferência é tratada par a par, sem somar as energias dos interferentes, e
+#     gateways sem caminhos de recepção livres (PLR-R) ou transmitindo (PLR-T) não são considerados;
+#   - energia pelos estados do rádio dos EDs (LoraRadioEnergyModel, correntes do littoral): TX durante o tempo no ar,
+#     STANDBY nas duas janelas de recepção (8 símbolos, RX2 em SF12) e SLEEP no restante.
+#
+# As saídas seguem as métricas do GlobalPacketCount (snt, rcvd, pdr e energia por ED) e do phyPerf (PLR_I, PLR_S).
+
+sensibilidadeED  = np.array([-124, -127, -130, -133, -135, -137])        # EndDeviceLoraPhy::sensitivity
+sensibilidadeGW  = np.array([-130, -132.5, -135, -137.5, -140, -142.5])  # GatewayLoraPhy::sensitivity
+isolamentoGoursaud = np.array([   # LoraInterferenceHelper::collisionSnirGoursaud: [SF desejado][SF interferente]
+    [6, -16, -18, -19, -19, -20],
+    [-24, 6, -20, -22, -22, -22],
+    [-27, -27, 6, -23, -25, -25],
+    [-30, -30, -30, 6, -26, -28],
+    [-33, -33, -33, -33, 6, -29],
+    [-36, -36, -36, -36, -36, 6]], dtype=float)
+isolamentoAloha  = np.where(np.eye(6, dtype=bool), np.inf, -np.inf)     # LoraInterferenceHelper::collisionSnirAloha
+matrizesIsolamento = {'goursaud': isolamentoGoursaud, 'aloha': isolamentoAloha}
+sfs              = np.arange(7, 13)
+bytesCabecalhos  = 9      # LorawanMacHeader (1) + LoraFrameHeader com FPort e sem FOpts (8)
+potenciaTx       = 14     # (dBm) potência inicial dos EDs
+alturaED         = 1.5    # (m) edHeight do littoral
+alturaGW         = 15.0   # (m) gwHeight do littoral
+simbolosJanela   = 8      # m_receiveWindowDurationInSymbols
+energiaLittoral  = {'tensao': 3.3, 'tx': 0.028, 'standby': 0.0014, 'sleep': 0.0000015}   # (V, A)
+
+def tempoNoAr(tamanho, sf, larguraBanda=125000, taxaCodigo=1, nPreambulo=8, cabecalhoDesativado=False, crc=True,
+              otimBaixaTaxa=None):
+    # Tempo no ar (s) pela fórmula de LoraPhy::GetOnAirTime, vetorizada em tamanho (bytes, cabeçalhos incluídos) e
+    # sf. otimBaixaTaxa=None segue o MAC: ativa quando o símbolo dura mais de 16 ms
+    sf = np.asarray(sf, dtype=float)
+    tSym = 2.0 ** sf / larguraBanda
+    de = (tSym > 0.016) if otimBaixaTaxa is None else np.asarray(otimBaixaTaxa)
+    h = 1 if cabecalhoDesativado else 0
+    c = 1 if crc else 0
+    num = 8 * np.asarray(tamanho, dtype=float) - 4 * sf + 28 + 16 * c - 20 * h
+    den = 4 * (sf - 2 * de)
+    simbolosPayload = 8 + np.maximum(np.ceil(num / den) * (taxaCodigo + 4), 0)
+    return (nPreambulo + 4.25) * tSym + simbolosPayload * tSym
+
+def posicoesGateways(nGw, lado=1.0, semente=1):
+    # Posições (x, y) dos gateways como no littoral. Com 8 ou mais, o littoral as sorteia: aqui, com semente fixa
+    if nGw == 1:
+        pos = [(0, 0)]
+    elif nGw == 2:
+        pos = [(-1/4, -1/4), (1/4, 1/4)]
+    elif nGw == 3:
+        raio = 1 / (2 * np.sqrt(3))
+        pos = [(raio * np.cos(2 * np.pi * i / 3), raio * np.sin(2 * np.pi * i / 3)) for i in range(3)]
+    elif nGw in (4, 5):
+        pos = [(-1/4, -1/4), (-1/4, 1/4), (1/4, -1/4), (1/4, 1/4)] + [(0, 0)] * (nGw - 4)
+    elif nGw in (6, 7):
+        pos = [(1/6, np.sqrt(3)/6), (1/6, -np.sqrt(3)/6), (-1/6, np.sqrt(3)/6), (-1/6, -np.sqrt(3)/6),
+               (1/3, 0), (-1/3, 0)] + [(0, 0)] * (nGw - 6)
+    else:
+        pos = np.random.default_rng(semente).uniform(-0.45, 0.45, (nGw, 2))
+    return np.asarray(pos, dtype=float) * lado
+
+def amostrarPosicoes(numAmostras, areaCirc=False, semente=1):
+    # Posições de EDs em unidades de sideLength: quadrado [-0.5, 0.5)² ou disco de diâmetro 1, como no littoral
+    rng = np.random.default_rng(semente)
+    if areaCirc:
+        raio = 0.5 * np.sqrt(rng.uniform(size=numAmostras))
+        angulo = rng.uniform(0, 2 * np.pi, numAmostras)
+        return np.column_stack((raio * np.cos(angulo), raio * np.sin(angulo)))
+    return rng.uniform(-0.5, 0.5, (numAmostras, 2))
+
+def potenciaRecebida(sideLength, nGw=1, pathLossExp=3.76, areaCirc=False, desvioSombra=4.0, numAmostras=4096,
+                     semente=1):
+    # Potência (dBm) no melhor gateway de cada posição amostrada: array (lados, amostras)
+    lado = np.atleast_1d(np.asarray(sideLength, dtype=float))[:, None, None]
+    pos = amostrarPosicoes(numAmostras, areaCirc, semente)
+    gws = posicoesGateways(nGw, 1.0, semente)
+    dxy = np.linalg.norm(pos[:, None, :] - gws[None, :, :], axis=-1)              # (amostras, gws)
+    dist = np.sqrt((lado * dxy) ** 2 + (alturaGW - alturaED) ** 2)
+    perda = 7.7 + 10 * pathLossExp * np.log10(np.maximum(dist, 1.0))
+    sombra = desvioSombra * np.random.default_rng(semente + 1).standard_normal(numAmostras)
+    return potenciaTx - perda.min(axis=-1) + sombra
+
+def atribuirSF(rx, distSF=None):
+    # Índice do SF (0 = SF7) de cada amostra. Sem distSF, pela sensibilidade do ED (SetSpreadingFactorsUp: abaixo da
+    # de SF12, o ED fica em SF12): array com a forma de rx. Com distSF (D, 6), pela posição de cada amostra na ordem
+    # decrescente de potência: array (D, ...)
+    if distSF is None:
+        return np.minimum((rx[..., None] <= sensibilidadeED).sum(axis=-1), 5)
+    dist = np.asarray(distSF, dtype=float)
+    dist = dist / dist.sum(axis=-1, keepdims=True)
+    ordem = np.argsort(np.argsort(-rx, axis=-1), axis=-1)                          # posto de cada amostra
+    frac = (ordem + 0.5) / rx.shape[-1]
+    acum = np.cumsum(dist, axis=-1)
+    return np.minimum((frac[None, ..., None] > acum[:, None, None, :]).sum(axis=-1), 5)
+
+def exposicaoInterferencia(rx, sf, duracoes, isolamento):
+    # Para cada amostra (ED desejado), A = Σ_j p_j · (T_sf + T_j) · q_j, onde p_j é a fração de EDs em SF j e q_j a
+    # fração deles que destruiria o pacote ao se sobrepor a ele (rx_j > rx - isolamento[sf, j]). O nº esperado de
+    # interferências destrutivas de um pacote é A vezes a taxa de pacotes por canal. rx e sf: (..., amostras)
+    forma = rx.shape
+    rx2, sf2 = rx.reshape(-1, forma[-1]), sf.reshape(-1, forma[-1])
+    exposicao = np.zeros(rx2.shape)
+    for k in range(rx2.shape[0]):
+        for j in range(6):
+            rxJ = np.sort(rx2[k][sf2[k] == j])
+            if len(rxJ) == 0:
+                continue
+            limiar = rx2[k] - isolamento[sf2[k], j]                                  # -inf/inf nas matrizes Aloha
+            qJ = (len(rxJ) - np.searchsorted(rxJ, limiar, side='right')) / len(rxJ)
+            pJ = len(rxJ) / forma[-1]
+            exposicao[k] += pJ * (duracoes[sf2[k]] + duracoes[j]) * qJ
+    return exposicao.reshape(forma)
+
+def avaliarGrade(numED, sideLength, pktsPerDay, distSF=None, pktSize=30, simTime=86400, nGw=1, pathLossExp=3.76,
+                 matriz='goursaud', areaCirc=False, desvioSombra=4.0, nCanais=3, numAmostras=4096, semente=1):
+    # Estimativas sobre a grade numED × sideLength × pktsPerDay × distSF: dict de arrays (N, L, P, D). distSF é
+    # None (SF pelo alcance, D = 1) ou uma lista de distribuições sobre SF7..SF12. 'DistSF' tem forma (L, D, 6)
+    numED = np.atleast_1d(np.asarray(numED, dtype=float))
+    pktsPerDay = np.atleast_1d(np.asarray(pktsPerDay, dtype=float))
+    if distSF is not None:
+        distSF = np.atleast_2d(distSF)
+
+    rx = potenciaRecebida(sideLength, nGw, pathLossExp, areaCirc, desvioSombra, numAmostras, semente)   # (L, M)
+    sf = atribuirSF(rx, distSF)
+    sf = sf[:, None, :] if distSF is None else np.moveaxis(sf, 0, 1)                                     # (L, D, M)
+    rx = np.broadcast_to(rx[:, None, :], sf.shape)
+
+    duracoes = tempoNoAr(pktSize + bytesCabecalhos, sfs)
+    exposicao = exposicaoInterferencia(rx, sf, duracoes, matrizesIsolamento[matriz])                      # (L, D, M)
+    alcance = rx > sensibilidadeGW[sf]
+
+    # Taxa de pacotes por canal (pacotes/s) de cada par (numED, pktsPerDay): (N, 1, P, 1, 1)
+    taxa = (numED[:, None] * pktsPerDay[None, :] / 86400 / nCanais)[:, None, :, None, None]
+    sobrevive = np.exp(-taxa * exposicao[None, :, None, :, :])                                           # (N, L, P, D, M)
+    entregue = (alcance[None, :, None] * sobrevive).mean(axis=-1)
+    fracAlcance = alcance.mean(axis=-1)[None, :, None]
+
+    # Energia por ED: TX no tempo no ar, STANDBY nas janelas RX1 (mesmo SF) e RX2 (SF12), SLEEP no restante
+    tSym = 2.0 ** sfs / 125000
+    tempoTx = duracoes[sf].mean(axis=-1)
+    tempoJanelas = (simbolosJanela * (tSym[sf] + tSym[-1])).mean(axis=-1)
+    pacotesED = (pktsPerDay * simTime / 86400)[None, None, :, None]
+    e = energiaLittoral
+    eneCon = e['tensao'] * (pacotesED * (e['tx'] * tempoTx + e['standby'] * tempoJanelas)[:, None, :]
+                            + e['sleep'] * (simTime - pacotesED * (tempoTx + tempoJanelas)[:, None, :]))
+    eneCon = np.broadcast_to(eneCon, entregue.shape)
+
+    enviados = numED[:, None, None, None] * pacotesED
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resultado = {
+            'Sent': np.broadcast_to(enviados, entregue.shape),
+            'Rcvd': enviados * entregue,
+            'PDR': entregue,
+            'ProbColisao': 1 - entregue / fracAlcance,      # perda por interferência entre os pacotes em alcance
+            'PLR_I': fracAlcance - entregue,
+            'PLR_S': np.broadcast_to(1 - fracAlcance, entregue.shape),
+            'EneCon': eneCon,                                # (J) por ED, como a última coluna do GlobalPacketCount
+            'EneEff': enviados * entregue * pktSize * 8 / (numED[:, None, None, None] * eneCon),   # (bits/J), como no runSim
+            'DistSF': np.stack([(sf == j).mean(axis=-1) for j in range(6)], axis=-1)
+        }
+    return resultado
+
+def classificarPontos(resultado, limiteSaturado=0.8, limiteOcioso=0.005):
+    # Pontos obviamente saturados (a maioria dos pacotes em alcance colide) e obviamente ociosos (quase nenhum colide)
+    return resultado['ProbColisao'] > limiteSaturado, resultado['ProbColisao'] < limiteOcioso
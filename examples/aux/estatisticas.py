@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+import numpy as np
+from scipy.stats import norm
+
+# Estatísticas das amostras de um ciclo de simulações, calculadas de uma só vez sobre um array denso
+# de forma (dim1, dim2, rep, métrica). Repetições ainda não executadas ficam como NaN e não entram no cálculo.
+
+def calcularEstatisticas(amostras, areaIC=0.975):
+    # Retorna um dict com arrays de forma (dim1, dim2, métrica): 'n', 'media', 'dp' e 'erroIC' (semiamplitude do IC)
+    amostras = np.asarray(amostras, dtype=float)
+    validas = ~np.isnan(amostras)
+    n = validas.sum(axis=2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.where(validas, amostras, 0).sum(axis=2) / n
+        desvios = np.where(validas, amostras - media[:, :, np.newaxis, :], 0)
+        dp = np.sqrt((desvios ** 2).sum(axis=2) / (n - 1))
+        erroIC = dp / np.sqrt(n) * norm.ppf(areaIC)
+    dp[n < 2] = np.nan
+    erroIC[n < 2] = np.nan
+    return {'n': n, 'media': media, 'dp': dp, 'erroIC': erroIC}
+
+def calcularDiferencas(media):
+    # Diferença absoluta e percentual do 1º tratamento de dim2 para cada um dos demais: arrays (dim1, dim2-1, métrica)
+    referencia = media[:, :1, :]
+    dif = referencia - media[:, 1:, :]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        difPerc = dif / media[:, 1:, :] * 100
+    return dif, difPerc
+
+# Acumulador online (Welford) para séries em que as repetições chegam uma a uma: guarda, por posição,
+# apenas n, média e M2 (soma dos quadrados dos desvios). Memória e custo por repetição independem do nº de repetições.
+
+def iniciarAcumulador(forma):
+    return {'n': np.zeros(forma, dtype=np.int64), 'media': np.zeros(forma), 'm2': np.zeros(forma)}
+
+def acumularAmostra(acum, indice, amostra):
+    # Incorpora uma repetição 'amostra' na fatia acum[...][indice]. Posições NaN/inf da amostra são ignoradas
+    amostra = np.asarray(amostra, dtype=float)
+    n, media, m2 = acum['n'][indice], acum['media'][indice], acum['m2'][indice]
+    validas = np.isfinite(amostra)
+    n = n + validas
+    delta = np.where(validas, amostra - media, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = media + np.where(validas, delta / n, 0)
+    m2 = m2 + np.where(validas, delta * (amostra - media), 0)
+    acum['n'][indice], acum['media'][indice], acum['m2'][indice] = n, media, m2
+
+def estatisticasAcumulador(acum, areaIC=0.975):
+    # Mesmo formato de calcularEstatisticas: 'n', 'media', 'dp' e 'erroIC'
+    n = acum['n']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.where(n > 0, acum['media'], np.nan)
+        dp = np.where(n > 1, np.sqrt(acum['m2'] / (n - 1)), np.nan)
+        erroIC = dp / np.sqrt(n) * norm.ppf(areaIC)
+    return {'n': n, 'media': media, 'dp': dp, 'erroIC': erroIC}
+
+def salvarAcumulador(arquivo, acum, **metadados):
+    np.savez(arquivo, **acum, **metadados)
+
+def carregarAcumulador(arquivo):
+    with np.load(arquivo, allow_pickle=False) as dados:
+        return {chave: dados[chave] for chave in dados.files}
@@ -0,0 +1,191 @@
+#!/usr/bin/python3
+import json
+import os
+import threading
+import time
+
+# Fila de rodadas em sistema de arquivos, para distribuir um ciclo de simulações entre várias máquinas
+# (ou vários processos locais) que compartilham a árvore do ns-3. Cada rodada é um arquivo '<chave>.json'
+# que passa pelas pastas abaixo. Toda transição é um rename, atômico no POSIX (e no NFS):
+#
+#   pendentes/ --(reivindicar)--> execucao/ --(concluir)--> concluidas/
+#                                    |
+#                                    +--(falhar / lease expirado)--> pendentes/ (nova tentativa) ou falhas/
+#
+# O lease de uma rodada em execução é a data de modificação do seu arquivo em execucao/: o trabalhador a renova
+# periodicamente e, se ela ficar mais antiga que 'duracaoLease', a rodada volta para a fila (o trabalhador morreu).
+# Os relógios das máquinas devem estar sincronizados (NTP).
+
+estadosFila = ['pendentes', 'execucao', 'concluidas', 'falhas']
+
+def iniciarFila(pastaFila):
+    for estado in estadosFila:
+        os.makedirs(os.path.join(pastaFila, estado), exist_ok=True)
+
+def caminhoTarefa(pastaFila, estado, chave):
+    return os.path.join(pastaFila, estado, chave + '.json')
+
+def obterSituacao(pastaFila, chave):
+    for estado in estadosFila:
+        if os.path.isfile(caminhoTarefa(pastaFila, estado, chave)):
+            return estado
+    return None
+
+def lerTarefa(arquivo):
+    with open(arquivo) as arq:
+        return json.load(arq)
+
+def gravarTarefa(arquivo, tarefa):
+    tmp = f"{arquivo}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'w') as arq:
+        json.dump(tarefa, arq)
+    os.replace(tmp, arquivo)
+
+def publicarRodada(pastaFila, rodada):
+    # Idempotente: uma rodada já pendente ou em execução é mantida. Uma concluída ou com falha é publicada de novo
+    # (quem publica já verificou que o resultado não está no cache)
+    chave = rodada['chave']
+    situacao = obterSituacao(pastaFila, chave)
+    if situacao in ('pendentes', 'execucao'):
+        return
+    if situacao is not None:
+        os.remove(caminhoTarefa(pastaFila, situacao, chave))
+    gravarTarefa(caminhoTarefa(pastaFila, 'pendentes', chave), {'rodada': rodada, 'tentativas': 0, 'erros': []})
+
+def moverTarefa(pastaFila, chave, origem, destino, atualizar=None, dono=None):
+    # Move a tarefa de 'origem' para 'destino' (um estado ou uma função do conteúdo), aplicando 'atualizar' ao conteúdo.
+    # Retorna o conteúdo gravado, ou None se outro processo já a tiver movido (p. ex., o trabalhador concluiu enquanto o
+    # lease expirava) ou, com 'dono', se ela estiver reivindicada por outro trabalhador.
+    # O rename preserva a data de modificação, que recuperarExpiradas usa para achar transições interrompidas: o
+    # arquivo de transição é tocado logo após o rename, para que uma tarefa antiga não pareça abandonada
+    transicao = f"{caminhoTarefa(pastaFila, origem, chave)}.{os.getpid()}.{threading.get_ident()}.mov"
+    try:
+        os.rename(caminhoTarefa(pastaFila, origem, chave), transicao)
+        os.utime(transicao)
+        tarefa = lerTarefa(transicao)
+    except FileNotFoundError:
+        return None   # já movida, ou devolvida à origem por recuperarExpiradas
+    if dono is not None and tarefa.get('trabalhador') != dono:
+        try:
+            os.rename(transicao, caminhoTarefa(pastaFila, origem, chave))
+        except FileNotFoundError:
+            pass
+        return None
+    if atualizar is not None:
+        atualizar(tarefa)
+    if callable(destino):
+        destino = destino(tarefa)
+    gravarTarefa(caminhoTarefa(pastaFila, destino, chave), tarefa)
+    try:
+        os.remove(transicao)
+    except FileNotFoundError:
+        pass   # só se o processo ficou parado por mais de um lease no meio da transição
+    return tarefa
+
+def reivindicarRodada(pastaFila, trabalhador):
+    # Retorna a rodada pendente mais antiga, já em execucao/ e com lease novo, ou None se a fila estiver vazia
+    pasta = os.path.join(pastaFila, 'pendentes')
+    candidatas = []
+    for nome in os.listdir(pasta):
+        if nome.endswith('.json'):
+            try:
+                candidatas.append((os.path.getmtime(os.path.join(pasta, nome)), nome[:-len('.json')]))
+            except FileNotFoundError:
+                pass
+    for _, chave in sorted(candidatas):
+        def registrar(tarefa):
+            tarefa['trabalhador'] = trabalhador
+            tarefa['inicio'] = time.time()
+        tarefa = moverTarefa(pastaFila, chave, 'pendentes', 'execucao', registrar)
+        if tarefa is not None:
+            return tarefa['rodada']
+    return None
+
+def renovarLease(pastaFila, chave):
+    try:
+        os.utime(caminhoTarefa(pastaFila, 'execucao', chave))
+    except FileNotFoundError:
+        pass   # lease já expirado e rodada devolvida à fila: o resultado desta execução será descartado
+
+def pertenceA(pastaFila, chave, trabalhador):
+    # Se a rodada ainda está em execução por 'trabalhador' (e não foi devolvida à fila nem reivindicada por outro)
+    try:
+        return lerTarefa(caminhoTarefa(pastaFila, 'execucao', chave)).get('trabalhador') == trabalhador
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+def concluirRodada(pastaFila, chave, trabalhador=None):
+    return moverTarefa(pastaFila, chave, 'execucao', 'concluidas', dono=trabalhador)
+
+def falharRodada(pastaFila, chave, erro, maxTentativas, trabalhador=None):
+    # Devolve a rodada à fila ou, esgotadas as tentativas, a move para falhas/
+    def registrar(tarefa):
+        tarefa['tentativas'] += 1
+        tarefa['erros'].append(erro)
+    def destino(tarefa):
+        return 'pendentes' if tarefa['tentativas'] < maxTentativas else 'falhas'
+    return moverTarefa(pastaFila, chave, 'execucao', destino, registrar, trabalhador)
+
+def recuperarExpiradas(pastaFila, duracaoLease, maxTentativas):
+    # Rodadas cujo trabalhador parou de renovar o lease voltam para a fila
+    pasta = os.path.join(pastaFila, 'execucao')
+    agora = time.time()
+    for nome in os.listdir(pasta):
+        if not nome.endswith('.json'):
+            continue
+        try:
+            expirado = agora - os.path.getmtime(os.path.join(pasta, nome)) > duracaoLease
+        except FileNotFoundError:
+            continue
+        if expirado:
+            falharRodada(pastaFila, nome[:-len('.json')], f"lease expirado ({duracaoLease} s)", maxTentativas)
+
+    # Transições interrompidas (processo morto entre os dois renames de moverTarefa) voltam ao estado de origem
+    for estado in ('pendentes', 'execucao'):
+        pasta = os.path.join(pastaFila, estado)
+        for nome in os.listdir(pasta):
+            if nome.endswith('.mov'):
+                try:
+                    if agora - os.path.getmtime(os.path.join(pasta, nome)) > duracaoLease:
+                        os.rename(os.path.join(pasta, nome), caminhoTarefa(pastaFila, estado, nome.split('.json')[0]))
+                except FileNotFoundError:
+                    pass
+
+def trabalhar(pastaFila, executar, trabalhador, duracaoLease=300, maxTentativas=3, intervalo=2.0, ociosoMax=None):
+    # Laço de um trabalhador: reivindica rodadas, chama executar(rodada, trabalhador) renovando o lease e registra o
+    # resultado. Termina após 'ociosoMax' segundos sem encontrar rodadas (None: nunca)
+    iniciarFila(pastaFila)
+    ocioso = 0.0
+    while ociosoMax is None or ocioso < ociosoMax:
+        try:
+            recuperarExpiradas(pastaFila, duracaoLease, maxTentativas)
+            rodada = reivindicarRodada(pastaFila, trabalhador)
+        except FileNotFoundError:
+            rodada = None   # tarefa movida por outro processo no meio da transição: basta tentar de novo
+        if rodada is None:
+            time.sleep(intervalo)
+            ocioso += intervalo
+            continue
+        ocioso = 0.0
+
+        chave = rodada['chave']
+        fim = threading.Event()
+        def renovar():
+            while not fim.wait(duracaoLease / 4):
+                renovarLease(pastaFila, chave)
+        renovador = threading.Thread(target=renovar, daemon=True)
+        renovador.start()
+        try:
+            executar(rodada, trabalhador)
+        except Exception as e:
+            fim.set()
+            print(f"[{trabalhador}] Rodada {chave} falhou: {e}")
+            registrar = lambda: falharRodada(pastaFila, chave, f"{trabalhador}: {e}", maxTentativas, trabalhador)
+        else:
+            fim.set()
+            registrar = lambda: concluirRodada(pastaFila, chave, trabalhador)   # reatribuída a outro: ele a conclui
+        renovador.join()
+        try:
+            registrar()
+        except FileNotFoundError:
+            pass   # transição desfeita por recuperarExpiradas: a rodada segue com quem a tiver agora
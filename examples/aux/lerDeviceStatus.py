@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+import os
+import numpy as np
+import pandas as pd
+from lerSaidaBinaria import ultimoSnapshotNpy, carregarNpy, paraDataFrame as npyParaDataFrame
+
+# Leitura dos arquivos 'deviceStatus-*.csv' gerados por LoraHelper::DoPrintDeviceStatus sem carregá-los por inteiro.
+# Formato de cada linha: tempo edID posX posY DR TP energiaAcumED
+# Com stateSamplePeriod de 1s e 1000 EDs, um dia de simulação gera ~86 M linhas, por isso a leitura é feita em streaming.
+
+def lerUltimoSnapshot(arquivo, numED=None, tamBloco=1 << 20):
+    # Retorna a última linha de cada ED lendo o arquivo de trás para frente, bloco a bloco.
+    # Com numED, para assim que todos os EDs forem encontrados (funciona também quando cada amostra
+    # não traz todos os EDs). Sem numED, retorna as linhas do último instante amostrado.
+    if arquivo.endswith('.npy'):
+        return ultimoSnapshotNpy(arquivo, numED)
+
+    ultimas = {}
+    tempoFinal = None
+
+    def processar(linha):
+        nonlocal tempoFinal
+        campos = linha.split()
+        if not campos:
+            return False
+        tempo = float(campos[0])
+        if numED is None:
+            if tempoFinal is None:
+                tempoFinal = tempo
+            elif tempo < tempoFinal:
+                return True
+        ultimas.setdefault(int(campos[1]), campos)
+        return (numED is not None) and (len(ultimas) >= numED)
+
+    with open(arquivo, 'rb') as arq:
+        arq.seek(0, os.SEEK_END)
+        pos = arq.tell()
+        resto = b''
+        concluido = False
+        while pos > 0 and not concluido:
+            tam = min(tamBloco, pos)
+            pos -= tam
+            arq.seek(pos)
+            linhas = (arq.read(tam) + resto).split(b'\n')
+            resto = linhas[0]   # pode ser uma linha incompleta: é completada no próximo bloco
+            for linha in reversed(linhas[1:]):
+                if processar(linha):
+                    concluido = True
+                    break
+        if not concluido:
+            processar(resto)
+
+    return paraDataFrame(sorted(ultimas.values(), key=lambda campos: int(campos[1])))
+
+def lerTrajetorias(arquivo, ids=None, tamChunk=1000000):
+    # Percorre o arquivo uma única vez, em blocos, mantendo apenas as linhas dos EDs em 'ids' (todos se None)
+    if arquivo.endswith('.npy'):
+        registros = carregarNpy(arquivo)
+        if ids is not None:
+            registros = registros[np.isin(registros['edId'], ids)]
+        return npyParaDataFrame(registros)
+
+    partes = []
+    for chunk in pd.read_csv(arquivo, sep=r'\s+', header=None, chunksize=tamChunk):
+        if ids is not None:
+            chunk = chunk[chunk[1].isin(ids)]
+        partes.append(chunk)
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+def paraDataFrame(linhas):
+    # Mesmas colunas (0..6) que pd.read_csv(..., header=None) produziria
+    df = pd.DataFrame([[float(v) for v in campos] for campos in linhas])
+    if not df.empty:
+        df[[1, 4, 5]] = df[[1, 4, 5]].astype(int)
+    return df
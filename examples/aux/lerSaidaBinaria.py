@@ -0,0 +1,36 @@
+#!/usr/bin/python3
+import numpy as np
+import pandas as pd
+
+# Leitura dos arquivos .npy gerados pelo littoral com '--binaryOutput=true' (LoraHelper::SetBinaryOutput).
+# Cada arquivo é um array estruturado com um registro de tamanho fixo por amostra; os nomes e tipos dos campos
+# estão no cabeçalho .npy. Os arquivos são mapeados em memória (numpy.memmap), sem nenhum parsing.
+
+def carregarNpy(arquivo):
+    return np.load(arquivo, mmap_mode='r')
+
+def paraDataFrame(registros):
+    # Mesmas colunas numeradas (0, 1, ...) que pd.read_csv(..., header=None) produziria no formato texto
+    return pd.DataFrame({i: np.asarray(registros[nome]) for i, nome in enumerate(registros.dtype.names)})
+
+def ultimoSnapshotNpy(arquivo, numED=None):
+    # Equivalente binário de lerDeviceStatus.lerUltimoSnapshot: só as páginas finais do arquivo são lidas
+    registros = carregarNpy(arquivo)
+    if len(registros) == 0:
+        return paraDataFrame(registros)
+
+    if numED is None:
+        # As amostras são gravadas em ordem de tempo: busca binária pelo início do último instante
+        inicio = np.searchsorted(registros['time'], registros['time'][-1], side='left')
+    else:
+        # Amplia a janela final até conter todos os EDs
+        tam = numED
+        while True:
+            inicio = max(0, len(registros) - tam)
+            if inicio == 0 or len(np.unique(registros['edId'][inicio:])) >= numED:
+                break
+            tam *= 2
+
+    janela = np.asarray(registros[inicio:])
+    _, idx = np.unique(janela['edId'][::-1], return_index=True)   # última ocorrência de cada ED
+    return paraDataFrame(janela[len(janela) - 1 - idx])
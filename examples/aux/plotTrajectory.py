@@ -1,8 +1,6 @@
 #!/usr/bin/python3
-import pandas as pd
 import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-import matplotlib.colors as mcolors
+from lerDeviceStatus import lerTrajetorias
 
 # Script para plotar em um gráfico a trajetória de n end devices segundo algum modelo de mobidade. 
 # Necessita do arquivo 'input.csv' disponível no mesmo diretório, consistindo em uma instância renomeada do arquivo 'deviceStatus-x'
@@ -10,15 +8,16 @@ import matplotlib.colors as mcolors
 # Carregar o arquivo CSV
 file_path = 'input.csv'
 col_names = ['tempo', 'id', 'x', 'y', 'col5', 'col6', 'col7']
-df = pd.read_csv(file_path, sep='\s+', header=None, names=col_names)
+# Trajetórias de todos os EDs do arquivo (todos são plotados), lidas em uma única passada. Os IDs vêm dela, e não do
+# último snapshot: com '--statusOnChange', a última amostragem só contém os EDs que mudaram naquele instante
+df = lerTrajetorias(file_path)
+df.columns = col_names
+device_ids = df['id'].unique()
 
 # Definir o tamanho da fonte e o nome da fonte
 tamanhoFonte = 18
 nomeFonte = 'Arial'
 
-# Obter os IDs únicos dos dispositivos
-device_ids = df['id'].unique()
-
 # Usar a paleta de cores 'Set1', removendo a cor verde
 set1_colors = list(plt.get_cmap('Set1').colors)
 colors_without_green = [color for i, color in enumerate(set1_colors) if (i != 2) and (i != 3)]  # Remove o terceiro (verde)
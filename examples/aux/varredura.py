@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+import itertools
+import json
+import os
+import random
+
+# Especificação declarativa de uma varredura de cenários do runSim.py, num arquivo JSON (ou YAML, se o PyYAML
+# estiver instalado). Ex.:
+#
+#   {
+#     "nome": "densidade",
+#     "desenho": "fatorial",
+#     "dim1": "numED", "dim2": "adrType",
+#     "eixos": {
+#       "numED":   [200, 400, 600],
+#       "adrType": ["ns3::AdrMB", "ns3::AdrKalman"]
+#     },
+#     "fixos": {"sideLength": 8000, "simTime": 86400},
+#     "repeticoes": 10
+#   }
+#
+# Os parâmetros usam os nomes das opções do littoral (sem '--') ou os aliases do runSim.py (numED). Um eixo é uma
+# lista de valores, ou um objeto que associa a cada rótulo um conjunto de parâmetros (p. ex. "speedClass":
+# {"0": {"minSpeed": 0.5, "maxSpeed": 3.0}}). dim1 e dim2 são os eixos dos gráficos (eixo x e séries). 'fixos' vale
+# para todas as rodadas. Com um só eixo, dim2 é um eixo implícito ('serie') de um único nível, rotulado pelo nome
+# da varredura.
+#
+# A seção opcional 'adaptativa' ativa a replicação adaptativa do runSim.py: cada ponto (dim1, dim2) começa com
+# 'minRepeticoes' e ganha repetições até a semiamplitude do IC das 'metricas' ficar abaixo de 'erroRelativo' vezes
+# a média, ou até 'maxRepeticoes' (def.: 'repeticoes'). Ex.:
+#
+#   "adaptativa": {"metricas": ["PDR", "EneEff"], "erroRelativo": 0.02, "minRepeticoes": 3, "maxRepeticoes": 20}
+#
+# Desenhos:
+#   fatorial  - todas as combinações dos níveis dos eixos
+#   pareado   - os eixos, de mesmo tamanho, variam juntos (o i-ésimo nível de cada um)
+#   hipercubo - 'amostras' combinações em hipercubo latino: cada eixo é dividido em 'amostras' estratos e cada
+#               estrato é visitado uma única vez. Além de listas, aceita eixos contínuos {"min": a, "max": b}
+#               (com "inteiro": true para valores inteiros). 'semente' fixa o sorteio, e com ele as rodadas (e o cache)
+
+desenhos = ['fatorial', 'pareado', 'hipercubo']
+eixoImplicito = 'serie'   # dim2 das varreduras de um só eixo
+
+def carregarVarredura(arquivo):
+    with open(arquivo) as arq:
+        if os.path.splitext(arquivo)[1] in ('.yaml', '.yml'):
+            import yaml   # opcional: só é necessário para especificações em YAML
+            varredura = yaml.safe_load(arq)
+        else:
+            varredura = json.load(arq)
+    varredura.setdefault('nome', os.path.splitext(os.path.basename(arquivo))[0])
+    return validarVarredura(varredura)
+
+def validarVarredura(varredura):
+    varredura.setdefault('desenho', 'fatorial')
+    varredura.setdefault('fixos', {})
+    varredura.setdefault('repeticoes', 1)
+    eixos = varredura.get('eixos')
+    if not eixos:
+        raise ValueError("A varredura precisa de pelo menos um eixo em 'eixos'")
+    if varredura['desenho'] not in desenhos:
+        raise ValueError(f"Desenho desconhecido: {varredura['desenho']}. Opções: {desenhos}")
+    nomes = list(eixos)
+    varredura.setdefault('dim1', nomes[0])
+    if len(nomes) == 1 and 'dim2' not in varredura:
+        # Varredura de um só eixo: as séries dos gráficos vêm de um eixo implícito de um nível, sem parâmetros
+        eixos[eixoImplicito] = {varredura.get('nome', eixoImplicito): {}}
+        if varredura['desenho'] == 'pareado':
+            varredura['desenho'] = 'fatorial'   # com um só eixo real, os dois desenhos coincidem
+    varredura.setdefault('dim2', eixoImplicito if len(nomes) == 1 else nomes[1])
+    for dim in ('dim1', 'dim2'):
+        if varredura[dim] not in eixos:
+            raise ValueError(f"{dim} ({varredura[dim]}) não é um dos eixos da varredura")
+    if varredura['dim1'] == varredura['dim2']:
+        raise ValueError("dim1 e dim2 precisam ser eixos diferentes (um eixo de um só nível também serve)")
+    continuos = [nome for nome, eixo in eixos.items() if eixoContinuo(eixo)]
+    if varredura['desenho'] == 'hipercubo':
+        if int(varredura.get('amostras', 0)) < 1:
+            raise ValueError("O desenho 'hipercubo' precisa do número de 'amostras'")
+    elif continuos:
+        raise ValueError(f"Eixos contínuos ({continuos}) só podem ser usados no desenho 'hipercubo'")
+    if varredura['desenho'] == 'pareado' and len({len(eixo) for eixo in eixos.values()}) > 1:
+        raise ValueError("No desenho 'pareado', todos os eixos precisam ter o mesmo número de níveis")
+    return varredura
+
+def eixoContinuo(eixo):
+    return isinstance(eixo, dict) and 'min' in eixo and 'max' in eixo
+
+def niveisEixo(nome, eixo):
+    # Lista de (rótulo, parâmetros) de um eixo discreto
+    if isinstance(eixo, dict):
+        return [(rotulo, dict(params)) for rotulo, params in eixo.items()]
+    return [(valor, {nome: valor}) for valor in eixo]
+
+def gerarPontos(varredura):
+    # Gera, sob demanda, os pontos da varredura como (rótulos por eixo, parâmetros variáveis)
+    eixos = varredura['eixos']
+    nomes = list(eixos)
+    if varredura['desenho'] == 'hipercubo':
+        yield from gerarHipercubo(varredura)
+        return
+    niveis = [niveisEixo(nome, eixos[nome]) for nome in nomes]
+    combinacoes = itertools.product(*niveis) if varredura['desenho'] == 'fatorial' else zip(*niveis)
+    for combinacao in combinacoes:
+        rotulos, params = {}, {}
+        for nome, (rotulo, paramsNivel) in zip(nomes, combinacao):
+            rotulos[nome] = rotulo
+            params.update(paramsNivel)
+        yield rotulos, params
+
+def gerarHipercubo(varredura):
+    eixos = varredura['eixos']
+    n = int(varredura['amostras'])
+    sorteio = random.Random(varredura.get('semente', 0))
+    # Uma permutação dos estratos por eixo: o ponto k usa o estrato estratos[nome][k] de cada eixo
+    estratos = {nome: sorteio.sample(range(n), n) for nome in eixos}
+    for k in range(n):
+        rotulos, params = {}, {}
+        for nome, eixo in eixos.items():
+            u = (estratos[nome][k] + sorteio.random()) / n   # posição sorteada dentro do estrato, em [0, 1)
+            if eixoContinuo(eixo):
+                valor = eixo['min'] + u * (eixo['max'] - eixo['min'])
+                valor = int(round(valor)) if eixo.get('inteiro', False) else round(valor, 6)
+                rotulos[nome] = valor
+                params[nome] = valor
+            else:
+                rotulo, paramsNivel = niveisEixo(nome, eixo)[int(u * len(eixo))]
+                rotulos[nome] = rotulo
+                params.update(paramsNivel)
+        yield rotulos, params
+
+def gerarRodadas(varredura, extras=None, repsPonto=None):
+    # Gera, sob demanda, as rodadas da varredura: {'rotulos', 'params', 'rep'}. 'params' junta os parâmetros fixos,
+    # os do ponto e 'extras' (nessa ordem de prioridade crescente). repsPonto(rotulos) dá os índices das repetições
+    # de cada ponto (def.: range(repeticoes))
+    for rotulos, paramsPonto in gerarPontos(varredura):
+        params = dict(varredura['fixos'])
+        params.update(paramsPonto)
+        params.update(extras or {})
+        reps = range(int(varredura['repeticoes'])) if repsPonto is None else repsPonto(rotulos)
+        for rep in reps:
+            yield {'rotulos': rotulos, 'params': params, 'rep': rep}
+
+def obterNiveis(varredura, dim):
+    # Rótulos distintos do eixo 'dim' na ordem em que aparecem nas rodadas (crescente, se forem todos numéricos)
+    nome = varredura[dim]
+    rotulos = list(dict.fromkeys(rotulos[nome] for rotulos, _ in gerarPontos(varredura)))
+    if all(isinstance(r, (int, float)) and not isinstance(r, bool) for r in rotulos):
+        rotulos.sort()
+    return rotulos
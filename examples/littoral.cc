@@ -37,11 +37,13 @@
 #include "ns3/rectangle.h"
 #include "ns3/simulator.h"
 #include "ns3/string.h"
+#include "ns3/system-path.h"
 #include <algorithm>
 #include <chrono>
 #include <cmath>
 #include <ctime>
 #include <fstream>
+#include <numeric>
 #include <random>
 #include <sstream>
 
@@ -64,6 +66,8 @@ double sideLength = 100.0;   // If the region is circular, sideLength will repre
 double edHeight = 1.5;
 double gwHeight = 15.0;
 int baseSeedSetRun = 0;
+int nRuns = 1;              // Replicates run back to back in this process
+int firstRun = 0;           // RngSeedManager run of the first replicate (0: baseSeed)
 
 //-- Network Options --//
 bool initializeSF = false;
@@ -79,6 +83,16 @@ bool gridBuilAlloc = false;
 bool circularArea = true;  // true: circular area, false: square area  
 bool verbose = false;
 bool const saveToFile = true;
+bool binaryOutput = false; // true: periodic printers write .npy files instead of space-separated text
+
+//-- Periodic Printing --//
+double statusPeriod = 1;      // Sample period (s) of deviceStatus
+double phyPerfPeriod = 1;     // Sample period (s) of phyPerf
+double globalPerfPeriod = 1;  // Sample period (s) of globalPerf
+bool trackerStreaming = false; // true: the packet tracker folds finalized packets into per-interval counters
+std::string trackerSpill = ""; // Optional binary log of the packets folded in trackerStreaming mode
+bool statusOnChange = false;  // true: deviceStatus only gets a row when an ED's DR, TP or position changed
+double statusMinDist = 0;     // Displacement (m) that triggers a deviceStatus row in statusOnChange mode
 
 //-- Mobility Parameters --// 
 enum mobilityModel {
@@ -108,7 +122,6 @@ std::string adrType = "ns3::AdrLorawan";  // or "ns3::AdrComponent"
 std::string outputPath = "scratch/output/";     // base path to output data
 std::string filename, filenameCpsr;
 std::ofstream outputFile, outputFileCpsr;
-FileHelper fileHelper;
 
 // For Poisson arrival model
 double averageArrival = 1/appPeriodSecs*nDevices;
@@ -185,60 +198,14 @@ OnTxPowerChange(double oldTxPower, double newTxPower)
 }
 
 
-int
-main(int argc, char* argv[])
+// Runs one replicate of the scenario, writing its output files to runPath. The caller sets
+// the RngSeedManager run before each call. adrTypeFile is the ADR scheme that should be part
+// of the output file names (setInitialTxParams() may replace adrType).
+void
+runReplicate(int run, std::string runPath, std::string adrTypeFile)
 {
-    CommandLine cmd;
-
-    cmd.AddValue("nED", "Number of end devices to include in the simulation", nDevices);
-    cmd.AddValue("nGw", "Number of gateways to include in the simulation", nGateways);
-    cmd.AddValue("simTime", "The time for which to simulate", simulationTime);
-    cmd.AddValue("pktsPerDay", "Number of packets per day", pktsPerDay);
-    cmd.AddValue("appPeriodSecs", "The period in seconds to be used by periodically transmitting applications", appPeriodSecs);    
-    cmd.AddValue("pktSize", "Size of packet", packetSize);
-    cmd.AddValue("adrType", "ADR Class [ns3::AdrComponent, ns3::AdrLorawan, ns3::AdrPlus]", adrType);
-    cmd.AddValue("confMode", "Whether to use confirmed mode or not", confirmedMode);
-    //cmd.AddValue("poisson", "Whether to use Poisson packet arrival model or not", poissonModel);
-    cmd.AddValue("okumura", "Whether to use Okumura-Hata model or not", okumuraHataModel);
-    cmd.AddValue("environment", "Okumura-Hata environment type", okumuraHataEnvironment);
-    cmd.AddValue("building", "Whether to use GridBuildingAllocation model or not", gridBuilAlloc);
-    cmd.AddValue("nPeriods", "Number of periods to simulate", nPeriods);
-    cmd.AddValue("sideLength", "The side length of the area to simulate", sideLength);
-    cmd.AddValue("circArea", "Whether the simulation area is circular ou square", circularArea);
-    cmd.AddValue("mobEDProb", "Probability of mobile ED", mobileNodeProbability);
-    cmd.AddValue("baseSeed", "Which seed value to use on RngSeedManager", baseSeedSetRun);
-    cmd.AddValue("maxRandomLoss",
-                 "Maximum amount in dB of the random loss component",
-                 maxRandomLoss);
-    cmd.AddValue("initializeSF", "Whether to initialize the SFs", initializeSF);
-    cmd.AddValue("minSpeed", "Minimum speed for mobile devices", minSpeed);
-    cmd.AddValue("maxSpeed", "Maximum speed for mobile devices", maxSpeed);
-    cmd.AddValue("mobModel", "Set the mobility model class id", mobModel);
-    cmd.AddValue("pathLossExp", "Set the path loss exponent in LogDistancePropagationLossModel", pathLossExp);
-    cmd.AddValue("verbose", "Whether verbose mode is active", verbose);
-  
-    cmd.AddValue("MultipleGwCombiningMethod", "ns3::AdrComponent::MultipleGwCombiningMethod");
-    cmd.AddValue("MultiplePacketsCombiningMethod",
-                 "ns3::AdrComponent::MultiplePacketsCombiningMethod");
-    cmd.AddValue("HistoryRange", "ns3::AdrComponent::HistoryRange");
-    
-
-    cmd.Parse(argc, argv);
-  
-
-    /*******************
-     *  Initial Setup  *
-     ******************/
-       
-    // Setting simulation seed
-    if (baseSeedSetRun > 0)
-        RngSeedManager::SetRun(baseSeedSetRun);
-    else {
-        unsigned seed = std::chrono::system_clock::now().time_since_epoch().count();
-        RngSeedManager::SetSeed(seed);
-    }    
-    
-    std::string adrTypeFile = adrType;   // ADR scheme that should be part of the output file name
+    FileHelper fileHelper;
+    totEnergyCons = 0;
 
     // Set the end devices to allow data rate control (i.e. adaptive data rate) from the NS
     Config::SetDefault("ns3::EndDeviceLorawanMac::DRControl", BooleanValue(NSadrEnabled));
@@ -307,6 +274,8 @@ main(int argc, char* argv[])
         if (shadowingPropModel) {
             Ptr<CorrelatedShadowingPropagationLossModel> shadowing = 
             CreateObject<CorrelatedShadowingPropagationLossModel>();
+            // Size the shadowing grid for the simulation area
+            shadowing->SetAttribute("Bounds", RectangleValue(Rectangle(-sideLength/2, sideLength/2, -sideLength/2, sideLength/2)));
             // Aggregate shadowing to the logdistance loss
             loss->SetNext(shadowing);
             // Add the effect to the channel propagation loss
@@ -415,6 +384,14 @@ main(int argc, char* argv[])
     //LorawanHelper helper = LorawanHelper();
     LoraHelper helper = LoraHelper();
     helper.EnablePacketTracking();
+    if (trackerStreaming)
+    {
+        // Every window queried (printer periods and the whole simulation) must be a multiple of the interval
+        int64_t interval = std::gcd(std::gcd(std::llround(phyPerfPeriod * 1000),
+                                             std::llround(globalPerfPeriod * 1000)),
+                                    std::llround(simulationTime * 1000));
+        helper.GetPacketTracker().EnableStreaming(MilliSeconds(interval), Seconds(30), trackerSpill);
+    }
 
     /************************
     *  Create Gateway  *
@@ -602,7 +579,7 @@ main(int argc, char* argv[])
     if (saveToFile)
     {
         std::ofstream myfile;
-        myfile.open(outputPath+"buildings.txt");
+        myfile.open(runPath+"buildings.txt");
         std::vector<Ptr<Building>>::const_iterator it;
         int j = 1;
         for (it = bContainer.Begin(); it != bContainer.End(); ++it, ++j)
@@ -718,7 +695,7 @@ main(int argc, char* argv[])
             radioEnergyHelper.Install(endDevicesNetDevices, sources);
      
         NS_LOG_INFO("Preparing output file...");
-        fileHelper.ConfigureFile("battery-level", FileAggregator::SPACE_SEPARATED);
+        fileHelper.ConfigureFile(runPath + "battery-level", FileAggregator::SPACE_SEPARATED);
         fileHelper.WriteProbe("ns3::DoubleProbe", "/Names/EnergySource/RemainingEnergy", "Output");
     }
    
@@ -740,19 +717,20 @@ main(int argc, char* argv[])
     LoraPacketTracker& tracker = helper.GetPacketTracker ();
     
     if (saveToFile) {    
-        deviceStatus = outputPath + "deviceStatus-";
-        phyPerf = outputPath + "phyPerf-";
-        globalPerf = outputPath + "globalPerf-";
+        deviceStatus = runPath + "deviceStatus-";
+        phyPerf = runPath + "phyPerf-";
+        globalPerf = runPath + "globalPerf-";
 
-        deviceStatus += adrTypeFile + ".csv";
-        phyPerf += adrTypeFile + ".csv";
-        globalPerf += adrTypeFile + ".csv";
+        std::string extension = binaryOutput ? ".npy" : ".csv";
+        deviceStatus += adrTypeFile + extension;
+        phyPerf += adrTypeFile + extension;
+        globalPerf += adrTypeFile + extension;
+        helper.SetBinaryOutput(binaryOutput);
 
-        //Time stateSamplePeriod = Seconds(60*60);
-        Time stateSamplePeriod = Seconds(1);
-        helper.EnablePeriodicDeviceStatusPrinting(endDevices, gateways, deviceStatus, stateSamplePeriod);
-        helper.EnablePeriodicPhyPerformancePrinting(gateways, phyPerf, stateSamplePeriod);
-        helper.EnablePeriodicGlobalPerformancePrinting(globalPerf, stateSamplePeriod); 
+        helper.SetDeviceStatusOnChange(statusOnChange, statusMinDist);
+        helper.EnablePeriodicDeviceStatusPrinting(endDevices, gateways, deviceStatus, Seconds(statusPeriod));
+        helper.EnablePeriodicPhyPerformancePrinting(gateways, phyPerf, Seconds(phyPerfPeriod));
+        helper.EnablePeriodicGlobalPerformancePrinting(globalPerf, Seconds(globalPerfPeriod)); 
 
         // *-* deviceStatus header (DoPrintDeviceStatus ) *-* 
         // time edID posX poxY DR TP accEnergyED
@@ -764,7 +742,9 @@ main(int argc, char* argv[])
         // Refs:   https://doi.org/10.3390/en14185614 , https://doi.org/10.1016/j.icte.2021.12.013 
 
         // *-* globalPerf header (DoPrintGlobalPerformance -> CountMacPacketsGlobally) *-* 
-        // time snt rcvd rssi snr delay
+        // time snt rcvd pdr rssi snr delay
+
+        // With binaryOutput, the same fields are stored as named columns of a NumPy structured array
 
         // *-* GlobalPacketCount
         // snt rcvd pdr rssi snr delay totEnegED avgEnegED
@@ -785,13 +765,25 @@ main(int argc, char* argv[])
     Simulator::Stop (Seconds(simulationTime));
     Simulator::Run ();    
     getEnergyCons(endDevices);
+    if (verbose)
+        std::cout << "Link budget cache: " << channel->GetLinkCacheHits() << " hits, "
+                  << channel->GetLinkCacheMisses() << " misses" << std::endl;
+    if (saveToFile) {
+        // The stop event precedes the periodic prints scheduled at simulationTime: print the last interval here
+        helper.DoPrintDeviceStatus(endDevices, gateways, deviceStatus);
+        helper.DoPrintPhyPerformance(gateways, phyPerf);
+        helper.DoPrintGlobalPerformance(globalPerf);
+    }
     Simulator::Destroy ();
+    Names::Clear ();   // the next replicate registers its energy source again
 
 
     /*******************
      *  Print results  *
      *******************/
     NS_LOG_INFO ("Computing performance metrics...");  
+    if (nRuns > 1)
+        std::cout << "Run " << run << ". ";
     std::cout << "Sent,Rcvd,PDR,RSSI(dBm),SNR(dB),Delay(s),TotEneCon(J),AvgEneCon(J): ";
     std::cout << tracker.CountMacPacketsGlobally( Seconds(0),Seconds(simulationTime) );
     std::cout << ' ' << totEnergyCons << ' ' << avgEnergyCons << std::endl;
@@ -799,20 +791,107 @@ main(int argc, char* argv[])
         std::cout << "\nFor confirmed mode:\nSent,Rcvd,CPSR: " << tracker.CountMacPacketsGloballyCpsr( Seconds(0),Seconds(simulationTime) ) << std::endl;
     
     if (saveToFile) {
-        filename = outputPath + "GlobalPacketCount-" + adrTypeFile + ".csv";
+        filename = runPath + "GlobalPacketCount-" + adrTypeFile + ".csv";
         outputFile.open(filename.c_str(), std::ofstream::out | std::ofstream::trunc);          
         outputFile << tracker.CountMacPacketsGlobally( Seconds(0), Seconds(simulationTime) );
         outputFile << ' ' << totEnergyCons << ' ' << avgEnergyCons << std::endl;
         outputFile.close();
 
         if (confirmedMode) {
-            filenameCpsr = outputPath + "GlobalPacketCountCpsr-" + adrTypeFile + ".csv";
+            filenameCpsr = runPath + "GlobalPacketCountCpsr-" + adrTypeFile + ".csv";
             outputFileCpsr.open(filenameCpsr.c_str(), std::ofstream::out | std::ofstream::trunc); 
             outputFileCpsr << tracker.CountMacPacketsGloballyCpsr( Seconds(0), Seconds(simulationTime) ) << std::endl;
             outputFileCpsr.close();  
         }            
     }
+}
+
+int
+main(int argc, char* argv[])
+{
+    CommandLine cmd;
+
+    cmd.AddValue("nED", "Number of end devices to include in the simulation", nDevices);
+    cmd.AddValue("nGw", "Number of gateways to include in the simulation", nGateways);
+    cmd.AddValue("simTime", "The time for which to simulate", simulationTime);
+    cmd.AddValue("pktsPerDay", "Number of packets per day", pktsPerDay);
+    cmd.AddValue("appPeriodSecs", "The period in seconds to be used by periodically transmitting applications", appPeriodSecs);    
+    cmd.AddValue("pktSize", "Size of packet", packetSize);
+    cmd.AddValue("adrType", "ADR Class [ns3::AdrComponent, ns3::AdrLorawan, ns3::AdrPlus]", adrType);
+    cmd.AddValue("confMode", "Whether to use confirmed mode or not", confirmedMode);
+    //cmd.AddValue("poisson", "Whether to use Poisson packet arrival model or not", poissonModel);
+    cmd.AddValue("okumura", "Whether to use Okumura-Hata model or not", okumuraHataModel);
+    cmd.AddValue("environment", "Okumura-Hata environment type", okumuraHataEnvironment);
+    cmd.AddValue("building", "Whether to use GridBuildingAllocation model or not", gridBuilAlloc);
+    cmd.AddValue("nPeriods", "Number of periods to simulate", nPeriods);
+    cmd.AddValue("sideLength", "The side length of the area to simulate", sideLength);
+    cmd.AddValue("circArea", "Whether the simulation area is circular ou square", circularArea);
+    cmd.AddValue("mobEDProb", "Probability of mobile ED", mobileNodeProbability);
+    cmd.AddValue("baseSeed", "Which seed value to use on RngSeedManager", baseSeedSetRun);
+    cmd.AddValue("runs", "Number of replicates to run back to back in this process", nRuns);
+    cmd.AddValue("firstRun", "RngSeedManager run of the first replicate (default: baseSeed)", firstRun);
+    cmd.AddValue("maxRandomLoss",
+                 "Maximum amount in dB of the random loss component",
+                 maxRandomLoss);
+    cmd.AddValue("initializeSF", "Whether to initialize the SFs", initializeSF);
+    cmd.AddValue("minSpeed", "Minimum speed for mobile devices", minSpeed);
+    cmd.AddValue("maxSpeed", "Maximum speed for mobile devices", maxSpeed);
+    cmd.AddValue("mobModel", "Set the mobility model class id", mobModel);
+    cmd.AddValue("pathLossExp", "Set the path loss exponent in LogDistancePropagationLossModel", pathLossExp);
+    cmd.AddValue("verbose", "Whether verbose mode is active", verbose);
+    cmd.AddValue("outputPath", "Directory where the output files are written", outputPath);
+    cmd.AddValue("binaryOutput", "Whether periodic status files are written in binary (.npy) format", binaryOutput);
+    cmd.AddValue("statusPeriod", "Sample period (s) of the deviceStatus file", statusPeriod);
+    cmd.AddValue("phyPerfPeriod", "Sample period (s) of the phyPerf file", phyPerfPeriod);
+    cmd.AddValue("globalPerfPeriod", "Sample period (s) of the globalPerf file", globalPerfPeriod);
+    cmd.AddValue("trackerStreaming", "Whether the packet tracker keeps bounded memory by aggregating finalized packets", trackerStreaming);
+    cmd.AddValue("trackerSpill", "File that receives the per-packet records folded in trackerStreaming mode", trackerSpill);
+    cmd.AddValue("statusOnChange", "Whether deviceStatus only prints EDs whose DR, TP or position changed", statusOnChange);
+    cmd.AddValue("statusMinDist", "Displacement (m) that triggers a deviceStatus row in statusOnChange mode", statusMinDist);
+  
+    cmd.AddValue("MultipleGwCombiningMethod", "ns3::AdrComponent::MultipleGwCombiningMethod");
+    cmd.AddValue("MultiplePacketsCombiningMethod",
+                 "ns3::AdrComponent::MultiplePacketsCombiningMethod");
+    cmd.AddValue("HistoryRange", "ns3::AdrComponent::HistoryRange");
     
 
+    cmd.Parse(argc, argv);
+
+    // Parallel campaigns give each run its own directory
+    if (!outputPath.empty() && outputPath.back() != '/')
+        outputPath += '/';
+  
+
+    /*******************
+     *  Initial Setup  *
+     ******************/
+
+    // Setting simulation seed. Replicate k uses run firstRun + k; without an explicit run,
+    // runs are numbered from 1 under a time-based seed
+    if (firstRun <= 0)
+        firstRun = baseSeedSetRun;
+    if (firstRun <= 0) {
+        unsigned seed = std::chrono::system_clock::now().time_since_epoch().count();
+        RngSeedManager::SetSeed(seed);
+        firstRun = 1;
+    }
+
+    std::string adrTypeFile = adrType;   // ADR scheme that should be part of the output file name
+
+    // Topology-independent state (e.g. fuzzy engines) is shared, so startup is paid once.
+    // Each replicate writes to its own directory when there is more than one. Resetting the
+    // stream index makes the random variables of each replicate get the same streams they
+    // get when its run is launched alone
+    for (int run = firstRun; run < firstRun + nRuns; run++) {
+        std::string runPath = outputPath;
+        if (nRuns > 1) {
+            runPath += "run" + std::to_string(run) + "/";
+            SystemPath::MakeDirectories(runPath);
+        }
+        RngSeedManager::SetRun(run);
+        RngSeedManager::ResetNextStreamIndex();
+        runReplicate(run, runPath, adrTypeFile);
+    }
+
     return 0;
 }
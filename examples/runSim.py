@@ -1,22 +1,47 @@
 #!/usr/bin/python3
 import argparse
+import glob
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import matplotlib
+matplotlib.use('Agg')   # as figuras só são gravadas em arquivo, inclusive nos processos de renderização
 from matplotlib import ticker
 from matplotlib.font_manager import FontProperties
 from matplotlib.patches import Patch
 import matplotlib.pyplot as plt
 from matplotlib.ticker import MaxNLocator
-from scipy.stats import norm
 from scipy.interpolate import griddata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import filecmp
+import hashlib
+import inspect
+import json
 import os
+import re
+import shlex
 import shutil
+import socket
+import subprocess
+import sys
 import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'aux'))
+from lerDeviceStatus import lerUltimoSnapshot
+from lerSaidaBinaria import carregarNpy, paraDataFrame
+import filaRodadas
+from varredura import carregarVarredura, validarVarredura, gerarRodadas, obterNiveis
+from capacidade import avaliarGrade, classificarPontos
+from estatisticas import calcularEstatisticas, calcularDiferencas, iniciarAcumulador, acumularAmostra, estatisticasAcumulador, salvarAcumulador, carregarAcumulador
 
 # Ex.:  ./src/lorawan/examples/runSim.py 0
+# Ex. com paralelismo: ./src/lorawan/examples/runSim.py 0 --jobs 32
+# Ex. distribuído (todas as máquinas na raiz da mesma árvore do ns-3, compartilhada):
+#     coordenador: ./src/lorawan/examples/runSim.py 0 --queue [--local-workers 4]
+#     trabalhador: ./src/lorawan/examples/runSim.py --worker --jobs 16
 # Exemplo de chamada em lote: ./src/lorawan/examples/runSim.py 3 && ./src/lorawan/examples/runSim.py 4
+# Ex. com uma varredura declarativa (ver aux/varredura.py): ./src/lorawan/examples/runSim.py --sweep varredura.json --jobs 32
 # Ex. de comando gerado: time ./ns3 run "littoral --adrType=ns3::AdrMB --simTime=86400" --quiet
+# Com execDireta = True, o comando chama o executável diretamente: build/src/lorawan/examples/ns3.42-littoral-default --adrType=ns3::AdrMB ...
 # 'Tipos de cenário: {0:'numED', 1:'sideLength', 2:'pktsPerDay', 3:'modMob', 4:'speedClass'}
 
 # TO DO: 
@@ -26,6 +51,18 @@ import time
 tipoExecucao     = 1      # Tipos:  0 - Simulação Completa | 1 - Simulação Rápida (Teste)
 novaSim          = True   # True: executa um novo ciclo de simulações | False: atualiza dados e gráficos de um ciclo anterior (exige dados na pasta outputPath)
 backupOutputDir  = True   # Realiza um backup local dos resultados
+numJobs          = os.cpu_count()  # Nº de rodadas simultâneas (processos). Pode ser alterado via '--jobs'
+saidaBinaria     = False  # True: littoral grava phyPerf, globalPerf e deviceStatus em .npy (lidos via numpy.memmap, sem parsing)
+usarCache        = True   # True: reaproveita rodadas já simuladas (mesmos parâmetros, semente e versão do módulo) | False: simula tudo novamente
+execDireta       = True   # True: executa o binário do littoral já compilado, sem passar pelo './ns3 run' a cada rodada
+usarFila         = False  # True: publica as rodadas na fila de pastaFila para trabalhadores ('--worker') em outras máquinas. Pode ser ativado via '--queue'
+repsPorProcesso  = 1      # Nº máximo de repetições de um mesmo ponto executadas por um único processo do littoral ('--runs'), que paga a inicialização uma vez. '--batch'
+numTrabLocais    = 0      # Nº de trabalhadores locais iniciados pelo coordenador no modo fila ('--local-workers')
+duracaoLease     = 300    # (s) rodada em execução sem renovação do lease por esse tempo volta para a fila
+maxTentativas    = 3      # tentativas por rodada antes de movê-la para falhas/
+repAdaptativa    = False  # True: replica cada ponto (dim1, dim2) só até o IC das metricasParada convergir. Pode ser ativado via '--adaptive'
+preTriagem       = False  # True: estima PDR, colisões e energia de cada ponto com o modelo analítico (aux/capacidade.py) antes de simular. '--prescreen'
+podarPontos      = False  # True: não simula os pontos que a pré-triagem aponta como saturados ou ociosos. '--prune' (implica '--prescreen')
 
 # -= Parâmetros de Simulação =-
 numRep          = 10 if (tipoExecucao == 0) else 2
@@ -41,7 +78,20 @@ modMob          = 1    # def 1 RandomWalk
 minSpeed        = 0.5  # def: 0.5
 maxSpeed        = 3.0  # def: 3.0
 pathLossExp     = 3.76
+# Amostragem dos arquivos periódicos do littoral. As análises só usam buckets horários (tempoLst) e o último estado de cada ED
+periodoStatus   = 1      # (s) deviceStatus
+periodoPhyPerf  = 3600   # (s) phyPerf: o PLR é calculado sobre os totais, então independe do período
+periodoGlPerf   = 3600   # (s) globalPerf: uma linha por hora de simulação, conforme tempoLst
+statusNaMudanca = True   # deviceStatus só ganha linha quando o DR, o TP ou a posição (> distMinStatus) do ED muda
+distMinStatus   = 50     # (m)
 areaIC          = 0.975  # área gaussina para um intervalo de confiança bilateral de 95% 
+# Replicação adaptativa (repAdaptativa). Uma varredura pode substituí-los na seção 'adaptativa' (ver aux/varredura.py)
+metricasParada  = ['PDR', 'EneEff']   # métricas cujo IC decide a parada
+erroRelAlvo     = 0.02   # semiamplitude do IC alvo, relativa à média
+limiteSaturado  = 0.8    # pré-triagem: ponto saturado se a prob. de colisão estimada passar disso
+limiteOcioso    = 0.005  # pré-triagem: ponto ocioso se a prob. de colisão estimada ficar abaixo disso
+minRep          = 3      # repetições iniciais de cada ponto
+maxRep          = numRep # teto de repetições por ponto
 okumura         = False
 okumuraEnvrmnt  = 0      # 0: UrbanEnvironment, 1: SubUrbanEnvironment, 2: OpenAreasEnvironment. Só tem efeito quando 'okumura = "true" '
 modoConfirm     = False   # Caso True, ativa-se o modo confirmado e utiliza-se a métrica CPSR
@@ -82,21 +132,28 @@ trtmntDic = {
 "ns3::AdrFuzzyRep":"FL-ADR"
 '''
 
-dfMetricas      = {metric: pd.DataFrame() for metric in metricasDic.keys()}
-dfPLR           = {metric: pd.DataFrame() for metric in PLRDic.keys()} 
-amostrasMet     = {metric: [] for metric in metricasDic.keys()}
-amostrasPLR     = {metric: [] for metric in PLRDic.keys()}
-dfPDR_ST        = pd.DataFrame()
-amostrasPDR_ST  = []
+nomesAmostras   = list(metricasDic.keys()) + list(PLRDic.keys())   # eixo 'métrica' do array de amostras
+amostras        = np.empty((0, 0, 0, len(nomesAmostras)))   # Amostras das rodadas: (dim1, dim2, rep, métrica). NaN até a rodada concluir
+estatisticas    = None   # calcularEstatisticas(amostras), calculado uma vez e compartilhado por gráficos e relatórios
+acumST          = {}   # Acumulador online (n, média, M2) da série temporal do PDR por valor de dim1: arrays (hora, dim2)
+rodadasST       = {}   # Nº de rodadas já agregadas na série temporal de cada dim1
 dfTmpExc        = pd.DataFrame()
+dfRepExc        = pd.DataFrame()   # Nº de rodadas somadas em cada célula de dfTmpExc
 
 # -= Valores de referência. Não alterar (!) =-
 adrTypeDef      = list(trtmntDic['adrType'].keys())[0]  # Esquema ADR default: o 1º do dic.
 numED           = int(numEDLst[-1]/2)
-tempoLst        = list(range(1, int(simTime/3600) + 1))  # lista contendo as horas de simulação para ST
+tempoLst        = list(range(1, int(simTime/3600) + 1))  # lista contendo as horas de simulação para ST (ajustarDimensoes a estende ao maior simTime da varredura)
 gwDic           = {1:"1 Gateway"} if (not multiGw) else  {1:"1 Gateway", 2:"2 Gateways"}
-contagemSF      = {7: 0, 8: 0, 9: 0, 10: 0, 11: 0, 12: 0}
-tipoCenario     = 0      # Default
+contagemSF      = {}   # Contagem de SF final por ponto (dim1, dim2)
+repsSF          = {}
+tipoCenario     = 0      # Default. Com '--sweep', é o nome da varredura (usado nos nomes dos arquivos)
+varredura       = None   # Especificação da varredura em curso: um cenário clássico (cenarioPadrao) ou um arquivo '--sweep'
+aliasParams     = {'numED': 'nED'}   # Nomes de eixos das varreduras que diferem da opção correspondente do littoral
+esperadasST     = {}     # Nº de rodadas de cada dim1 já listadas (a série temporal é salva quando todas concluem)
+esperadasSF     = {}     # Nº de rodadas de cada ponto (dim1, dim2) já listadas
+modoTrabalhador = False  # '--worker': só executa rodadas da fila
+modoVerifLote   = False  # '--check-batch': só verifica se uma réplica de um lote ('--runs') é idêntica à mesma semente rodada sozinha
 
 # Controle dos Gráficos
 tamFonteGraf    = 20
@@ -122,325 +179,681 @@ grafSuperf      = False         # Se plotar ou não gráfico de superfície (3D)
 # -= Arquivos =-
 outputFile     = ""
 outputPath     = "scratch/output/"   #caminho base para a gerência de arquivos 
-glPcktCnt      = outputPath + 'GlobalPacketCount-' 
-glPcktCntConf  = outputPath + 'GlobalPacketCountCpsr-' 
-globalPerf     = outputPath + 'globalPerf-' 
-phyPerf        = outputPath + 'phyPerf-' 
-devStatus      = outputPath + 'deviceStatus-' 
+pastaCache     = "scratch/cacheSim/"   # resultados por rodada, endereçados pelo hash dos parâmetros. Sobrevive a apagarArqs/backupData
+pastaFila      = "scratch/filaSim/"    # fila de rodadas do modo distribuído (ver aux/filaRodadas.py)
+versaoModulo   = open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'VERSION')).read().strip()   # entra na chave do cache: incrementar sempre que a saída do simulador mudar
+glPcktCnt      = 'GlobalPacketCount-' 
+glPcktCntConf  = 'GlobalPacketCountCpsr-' 
+globalPerf     = 'globalPerf-' 
+phyPerf        = 'phyPerf-' 
+devStatus      = 'deviceStatus-' 
+extSaida       = '.npy' if saidaBinaria else '.csv'   # extensão dos arquivos periódicos (phyPerf, globalPerf, deviceStatus)
+estadoGraf     = ['dimDic', 'dimIdDic', 'tipoCenario', 'varredura', 'trtmntDic', 'trtmntLblDic', 'tempoLst', 'numRep', 'maxRep',
+                  'repAdaptativa', 'metricasParada', 'erroRelAlvo', 'minRep']   # globais ajustados em main() e lidos pelos gráficos
+arqFiguras     = 'figuras.json'   # assinaturas das últimas tarefas de renderização (ver executarTarefasGraf)
+limiteHashGraf = 64 << 20         # (bytes) acima disso, a assinatura usa tamanho e data de modificação em vez do conteúdo
+pastaBuild     = "build/"
+binLittoral    = None    # caminho do executável do littoral, localizado por compilarSim() quando execDireta = True
 
 
 def executarSim(): 
     rodCont = 1   
-    numTotRod = 0 
     tempoAcum = 0
     cmd = ""    
     apagarArqs(outputPath)
     reiniciarEstruturas()
     reiniciarEstruturasST() 
     inicializarDictTempo()
+    compilarSim()
     #print(f"dimDic = \n{dimDic}")       
     #print(f"dimIdDic = \n{dimIdDic}")       
         
-    print(f"Cenário selecionado: {cenarioLgdDic[tipoCenario]}.")   
+    print(f"Cenário selecionado: {cenarioLgdDic.get(tipoCenario, tipoCenario)}. Rodadas simultâneas: {numJobs}.")   
+    if repAdaptativa:
+        print(f"Replicação adaptativa: de {minRep} a {maxRep} repetições por ponto, até a semiamplitude do IC de {metricasParada} ficar abaixo de {erroRelAlvo:.1%} da média.")
+    numTotRod = len(mobDic)*len(gwDic)*sum(1 for _ in gerarRodadas(varredura, repsPonto=(lambda rotulos: range(maxRep)) if repAdaptativa else None))
     for mob in mobDic.keys(): 
         for gw in gwDic.keys():
-            for dim1 in dimDic['dim1']:
-                for dim2 in dimDic['dim2']:                    
-                    for rep in range(numRep):
-                        numTotRod = len(mobDic)*len(gwDic)*len(dimDic['dim1'])*len(dimDic['dim2'])*numRep
-                        print("=====================================================================================")
-                        print(f"   Ensaio: {dimIdDic['dim1']}={dim1} | {dimIdDic['dim2']}={dim2} - NumGw: {gw} - Mob.:{'Sim' if (float(mob)>0) else 'Não'} - Rep: {rep+1} - Rodada: {rodCont} de {numTotRod}")
-                        print("=====================================================================================")
-                        cmd = ajustarComandoSim(mob, gw, dim1, dim2)
-                        print (f"Comando submetido: {cmd}")
-                        print (f"Executando simulação...")
-                        inicio = time.time()
-                        os.system(cmd)
-                        fim = time.time()
-                        tempoExec = fim - inicio
-                        tempoAcum += tempoExec
-                        agora = datetime.now()  
-                        print(f"\nTempo de execução desta rodada: {round(tempoExec/60,2)} min. ({agora.strftime('%Y-%m-%d %H:%M:%S')})")                             
-                        rodCont += 1
-                        atualizarDados(dim1, dim2)
-                        atualizarDadosST(mob, gw, dim1, dim2, rep)
-                        atualizarDadosSfFinal(mob, gw, dim1, dim2, rep)
-                        atualizarDictTempo(dim1, dim2, tempoExec)
-                reiniciarEstruturasST()                
-                print(obterRelatorio(cmd))                
+            podados = preTriar(mob, gw) if preTriagem else set()
+            for rodada, tempoExec, emCache in executarOndas(mob, gw, podados):
+                tempoAcum += tempoExec
+                cmd = rodada['cmd']
+                agora = datetime.now()  
+                print("=====================================================================================")
+                print(f"   Ensaio: {dimIdDic['dim1']}={rodada['dim1']} | {dimIdDic['dim2']}={rodada['dim2']} - NumGw: {gw} - Mob.:{'Sim' if (float(mob)>0) else 'Não'} - Rep: {rodada['rep']+1} - Rodada: {rodCont} de {'até ' if repAdaptativa else ''}{numTotRod}")
+                print("=====================================================================================")
+                print(f"Comando: {cmd}")
+                if emCache:
+                    print(f"Resultado reaproveitado do cache: {rodada['pasta']}")
+                else:
+                    print(f"Tempo de execução desta rodada: {round(tempoExec/60,2)} min. ({agora.strftime('%Y-%m-%d %H:%M:%S')})")                             
+                rodCont += 1
+                atualizarDados(rodada)
+                atualizarDadosST(rodada)
+                atualizarDadosSfFinal(rodada)
+                atualizarDictTempo(rodada['dim1'], rodada['dim2'], tempoExec)
+                finalizarRodada(rodada)
+            reiniciarEstruturasST()                
+            print(obterRelatorio(cmd))                
             salvarDadosMetricasArq(mob, gw)
             salvarDadosPLRArq(mob, gw)
-            if (not grafSuperf):
-                plotarGraficos(mob, gw)
-                plotarGraficosPLR(mob, gw)
-                protarGraficoST(mob, gw)
-                plotarSFFinalPorc(mob, gw)
-                plotarSFFinalporED(mob, gw) if ((not mobility) and (tipoCenario==0)) else None
-            else:
-                plotarSuperficie(mob, gw)
+            renderizarGraficos(mob, gw)
             gerarRelatorioFinal(mob, gw, cmd)
             reiniciarEstruturas()
-        plotarGraficosMGP(mob) if (multiGw and multGWPar) else None
+        renderizarGraficosMGP(mob) if (multiGw and multGWPar) else None
     registrarTempoMedio()
             
+def executarOndas(mob, gw, podados=()):
+    # Gera (rodada, tempoExec, emCache) como executarRodadas. Sem repAdaptativa, numa única onda com todas as rodadas.
+    # Com repAdaptativa, a 1ª onda tem minRep repetições por ponto; as seguintes, só as repetições que faltam aos pontos
+    # cujo IC ainda não convergiu, até nenhum ponto precisar de mais. Os pontos (dim1, dim2) em podados não têm rodadas
+    repsPonto = (lambda rotulos: range(minRep)) if repAdaptativa else None
+    while True:
+        rodadas = listarRodadas(mob, gw, semPodados(repsPonto, podados))
+        yield from executarRodadas(rodadas)
+        if not repAdaptativa:
+            return
+        extras = repeticoesAdicionais()
+        if not extras:
+            return
+        print(f"Pontos sem convergência: {len(extras)}. Próxima onda: {sum(len(r) for r in extras.values())} rodada(s).")
+        repsPonto = lambda rotulos: extras.get((rotulos[dimIdDic['dim1']], rotulos[dimIdDic['dim2']]), range(0))
+
+def semPodados(repsPonto, podados):
+    # repsPonto que não dá repetições aos pontos podados (e, como elas não são listadas, a ST não as espera)
+    if not podados:
+        return repsPonto
+    def reps(rotulos):
+        if (rotulos[dimIdDic['dim1']], rotulos[dimIdDic['dim2']]) in podados:
+            return range(0)
+        return range(int(varredura['repeticoes'])) if repsPonto is None else repsPonto(rotulos)
+    return reps
+
+def preTriar(mob, gw):
+    # Estimativas analíticas (aux/capacidade.py) de cada ponto (dim1, dim2), salvas para comparação com as curvas
+    # simuladas. Retorna os pontos a podar: os obviamente saturados ou ociosos, com podarPontos. A grade
+    # numED × sideLength × pktsPerDay é avaliada de uma vez para cada combinação dos demais parâmetros do modelo
+    # (em geral, uma só: os fixos da varredura)
+    pontos, grupos = [], {}
+    for rodadaVarr in gerarRodadas(varredura, {'mobEDProb': mob, 'nGw': gw}, lambda rotulos: range(1)):
+        params = ajustarParamsSim(rodadaVarr['params'])
+        grade = (float(params['--nED']), float(params['--sideLength']), float(params['--pktsPerDay']))
+        grupo = (tamanhoPacote(params), float(params['--simTime']), int(params['--nGw']),
+                 float(params['--pathLossExp']), params['--circArea'] == 'true')
+        pontos.append((rodadaVarr['rotulos'], grade, grupo))
+        grupos.setdefault(grupo, set()).add(grade)
+
+    avaliacoes = {}
+    for grupo, grades in grupos.items():
+        eixos = [sorted({grade[k] for grade in grades}) for k in range(3)]
+        tamanho, tempo, numGw, expoente, circ = grupo
+        res = avaliarGrade(*eixos, pktSize=tamanho, simTime=tempo, nGw=numGw, pathLossExp=expoente, areaCirc=circ)
+        saturado, ocioso = classificarPontos(res, limiteSaturado, limiteOcioso)
+        avaliacoes[grupo] = (eixos, res, saturado, ocioso)
+
+    linhas = []
+    for rotulos, grade, grupo in pontos:
+        eixos, res, saturado, ocioso = avaliacoes[grupo]
+        idx = tuple(eixo.index(valor) for eixo, valor in zip(eixos, grade)) + (0,)
+        linha = {'dim1': rotulos[dimIdDic['dim1']], 'dim2': rotulos[dimIdDic['dim2']]}
+        linha.update({m: float(res[m][idx]) for m in ('PDR', 'ProbColisao', 'PLR_I', 'PLR_S', 'EneCon', 'EneEff')})
+        linha['Situacao'] = 'saturado' if saturado[idx] else ('ocioso' if ocioso[idx] else '')
+        linhas.append(linha)
+    df = pd.DataFrame(linhas)
+    df.to_csv(f"{outputPath}Cen{tipoCenario}-{dimIdDic['dim1']}-Analitico-MbltProb{mob}-{gw}Gw.csv", index=False)
+    print(f"Pré-triagem analítica (NumGw: {gw} - Mob.: {'Sim' if float(mob) > 0 else 'Não'}; ignora ADR e mobilidade):")
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+    if not podarPontos:
+        return set()
+    podados = {(l['dim1'], l['dim2']) for l in linhas if l['Situacao']}
+    if podados:
+        print(f"Pontos podados (não simulados): {sorted(podados, key=str)}")
+        gravarPodados(mob, gw, podados)
+    return podados
+
+def gravarPodados(mob, gw, podados):
+    # Saídas explícitas (NaN) dos pontos podados, que não terão rodadas: a distribuição final de SF de cada um e a ST
+    # dos dim1 sem nenhum ponto simulado. As métricas dos JSONs já aparecem como células vazias (amostrasParaDf)
+    for dim1, dim2 in podados:
+        mediaSF_df = pd.DataFrame({'SF': list(range(7, 13)), 'Percentage': [np.nan] * 6})
+        mediaSF_df.to_json(f"{outputPath}{dimIdDic['dim1']}-{dim1}-SFFinal{dim2}-MbltProb{mob}-{gw}Gw.json", orient='records')
+    for dim1 in dimDic['dim1']:
+        if all((dim1, dim2) in podados for dim2 in dimDic['dim2']):
+            salvarAcumulador(f"{outputPath}ST-{dimIdDic['dim1']}-{dim1}-MbltProb{mob}-{gw}Gw.npz", acumST[dim1], tempo=np.array(tempoLst))
+
+def repeticoesAdicionais():
+    # Repetições a acrescentar em cada ponto (dim1, dim2) já simulado: n·(h/alvo)² - n, pela pior das metricasParada,
+    # onde h é a semiamplitude atual do IC e o alvo é erroRelAlvo·|média|. O total por ponto é limitado a maxRep
+    est = obterEstatisticas()
+    extras = {}
+    for i, dim1 in enumerate(dimDic['dim1']):
+        for j, dim2 in enumerate(dimDic['dim2']):
+            n = int(est['n'][i, j, nomesAmostras.index(metricasParada[0])])
+            if n == 0 or n >= maxRep:
+                continue   # ponto fora do desenho, ou no teto
+            necessarias = n
+            for metrica in metricasParada:
+                k = nomesAmostras.index(metrica)
+                media, erroIC = est['media'][i, j, k], est['erroIC'][i, j, k]
+                if np.isnan(erroIC):
+                    necessarias = max(necessarias, n + 1)   # dp indefinido (n < 2): mais uma repetição
+                elif erroIC > erroRelAlvo * abs(media):
+                    alvo = erroRelAlvo * abs(media)
+                    necessarias = max(necessarias, int(np.ceil(n * (erroIC / alvo) ** 2)) if alvo > 0 else maxRep)
+            if necessarias > n:
+                extras[(dim1, dim2)] = range(n, min(necessarias, maxRep))
+    return extras
+
+def listarRodadas(mob, gw, repsPonto=None):
+    # repsPonto(rotulos): índices das repetições de cada ponto (def.: todas as da varredura)
+    rodadas = []
+    for rodadaVarr in gerarRodadas(varredura, {'mobEDProb': mob, 'nGw': gw}, repsPonto):
+        dim1, dim2 = rodadaVarr['rotulos'][dimIdDic['dim1']], rodadaVarr['rotulos'][dimIdDic['dim2']]
+        rep = rodadaVarr['rep']
+        semente = rep + 1   # RngSeedManager::SetRun do littoral. Sementes explícitas tornam a rodada reprodutível (e cacheável)
+        params = ajustarParamsSim(rodadaVarr['params'])
+        chave = obterChaveRodada(params, semente)
+        pasta = f"{pastaCache}{chave}/"
+        cmd = ajustarComandoSim(params, pasta, semente)   # a execução em si grava numa pasta temporária (ver rodarSimulacao)
+        rodadas.append({'mob': mob, 'gw': gw, 'dim1': dim1, 'dim2': dim2, 'rep': rep, 'semente': semente,
+                        'chave': chave, 'pasta': pasta, 'cmd': cmd, 'params': params, 'binario': binLittoral})
+        esperadasST[dim1] = esperadasST.get(dim1, 0) + 1
+        esperadasSF[(dim1, dim2)] = esperadasSF.get((dim1, dim2), 0) + 1
+    return rodadas
+
+def custoRodada(rodada):
+    # Estimativa do tempo de execução de uma rodada, só para ordená-las (a maior primeiro)
+    return float(rodada['params']['--nED']) * float(rodada['params']['--simTime'])
+
+def obterChaveRodada(params, semente):
+    # Endereço da rodada no cache: hash dos parâmetros completos, da semente e da versão do módulo
+    conteudo = json.dumps({'params': params, 'semente': semente, 'versao': versaoModulo}, sort_keys=True)
+    return hashlib.sha256(conteudo.encode()).hexdigest()[:20]
+
+def executarRodadas(rodadas):
+    # Gera (rodada, tempoExec, emCache): primeiro as rodadas já presentes no cache, depois as demais,
+    # executadas em paralelo e entregues na ordem de conclusão
+    pendentes = []
+    for rodada in rodadas:
+        arqMeta = rodada['pasta'] + 'rodada.json'
+        if usarCache and os.path.isfile(arqMeta):
+            with open(arqMeta) as arq:
+                yield rodada, json.load(arq)['tempoExec'], True
+        else:
+            pendentes.append(rodada)
+    print(f"Rodadas reaproveitadas do cache: {len(rodadas) - len(pendentes)} de {len(rodadas)}.")
+
+    if not pendentes:
+        return
+    # As mais longas primeiro: as últimas a terminar são curtas, e os processos ficam ocupados até o fim do lote
+    pendentes.sort(key=custoRodada, reverse=True)
+    if usarFila:
+        yield from executarRodadasFila(pendentes)
+        return
+    lotes = agruparRepeticoes(pendentes)
+    lotes.sort(key=lambda lote: custoRodada(lote[0]) * len(lote), reverse=True)
+    with ProcessPoolExecutor(max_workers=numJobs) as executor:
+        futuros = {executor.submit(rodarLote, lote): lote for lote in lotes}
+        for futuro in as_completed(futuros):
+            for rodada, tempoExec in zip(futuros[futuro], futuro.result()):
+                yield rodada, tempoExec, False
+
+def agruparRepeticoes(pendentes):
+    # Lotes de até repsPorProcesso rodadas do mesmo ponto (mesmos parâmetros) com sementes consecutivas, cada um
+    # executado por um único littoral. Cada rodada continua com sua própria entrada no cache
+    porPonto = {}
+    for rodada in pendentes:
+        porPonto.setdefault(json.dumps(rodada['params'], sort_keys=True), []).append(rodada)
+    lotes = []
+    for rodadas in porPonto.values():
+        rodadas.sort(key=lambda rodada: rodada['semente'])
+        lote = [rodadas[0]]
+        for rodada in rodadas[1:]:
+            if len(lote) == repsPorProcesso or rodada['semente'] != lote[-1]['semente'] + 1:
+                lotes.append(lote)
+                lote = []
+            lote.append(rodada)
+        lotes.append(lote)
+    return lotes
+
+def executarRodadasFila(pendentes):
+    # Coordenador do modo distribuído: publica as rodadas na fila e as entrega à medida que os trabalhadores
+    # concluem (os resultados chegam pelo cache, na mesma árvore compartilhada)
+    filaRodadas.iniciarFila(pastaFila)
+    for rodada in pendentes:
+        filaRodadas.publicarRodada(pastaFila, rodada)
+    print(f"Rodadas publicadas na fila {pastaFila}: {len(pendentes)}. Trabalhadores locais: {numTrabLocais}.")
+
+    locais = [subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker', '--jobs', '1']) for _ in range(numTrabLocais)]
+    try:
+        restantes = {rodada['chave']: rodada for rodada in pendentes}
+        while restantes:
+            filaRodadas.recuperarExpiradas(pastaFila, duracaoLease, maxTentativas)
+            for chave in list(restantes):
+                situacao = filaRodadas.obterSituacao(pastaFila, chave)
+                if situacao == 'concluidas':
+                    rodada = restantes.pop(chave)
+                    with open(rodada['pasta'] + 'rodada.json') as arq:
+                        yield rodada, json.load(arq)['tempoExec'], False
+                elif situacao == 'falhas':
+                    erros = filaRodadas.lerTarefa(filaRodadas.caminhoTarefa(pastaFila, 'falhas', chave))['erros']
+                    raise RuntimeError(f"Rodada {chave} falhou {len(erros)} vez(es): {erros[-1]}")
+            if restantes:
+                time.sleep(1)
+    finally:
+        for proc in locais:
+            proc.terminate()
+            proc.wait()
+
+def executarTrabalhador():
+    # Modo '--worker': executa rodadas da fila até ser interrompido, com numJobs rodadas simultâneas
+    idBase = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"Trabalhador {idBase}: {numJobs} rodada(s) simultânea(s), fila {pastaFila}.")
+    with ThreadPoolExecutor(max_workers=numJobs) as executor:
+        futuros = [executor.submit(filaRodadas.trabalhar, pastaFila, rodarSimulacao, f"{idBase}/{i}", duracaoLease, maxTentativas)
+                   for i in range(numJobs)]
+        for futuro in futuros:
+            futuro.result()
+
+def verificarLotes(simTimeVerif=3600):
+    # O cache é chaveado só por parâmetros e semente, então a réplica de semente 2 de um lote '--runs=2' precisa ser
+    # idêntica à semente 2 rodada sozinha. Compara os arquivos das duas no 1º ponto da varredura, com simTime reduzido
+    compilarSim()
+    rodadaVarr = next(gerarRodadas(varredura, {'mobEDProb': list(mobDic)[0], 'nGw': list(gwDic)[0]}, lambda rotulos: range(1)))
+    params = ajustarParamsSim(rodadaVarr['params'])
+    params['--simTime'] = str(simTimeVerif)
+    pasta = f"{pastaCache}verificacaoLote.{os.getpid()}/"
+    try:
+        for nome, semente, repeticoes in (('lote', 1, 2), ('sozinha', 2, 1)):
+            os.makedirs(pasta + nome)
+            cmd = ajustarComandoSim(params, f"{pasta}{nome}/", semente, repeticoes=repeticoes)
+            if subprocess.run(shlex.split(cmd), env=obterAmbienteSim()).returncode != 0:
+                raise RuntimeError(f"Rodada terminou com erro: {cmd}")
+        lote, sozinha = f"{pasta}lote/run2/", f"{pasta}sozinha/"
+        arquivos = sorted(set(os.listdir(lote)) | set(os.listdir(sozinha)))
+        diferentes = [arq for arq in arquivos if not (os.path.isfile(lote + arq) and os.path.isfile(sozinha + arq)
+                                                      and filecmp.cmp(lote + arq, sozinha + arq, shallow=False))]
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+    if diferentes:
+        print(f"A réplica do lote difere da rodada isolada em: {diferentes}")
+    else:
+        print(f"Réplica do lote idêntica à rodada isolada ({len(arquivos)} arquivos).")
+    return not diferentes
+
+def compilarSim():
+    # Compila uma única vez antes do lote: as rodadas em paralelo usam '--no-build' e não disputam o build
+    global binLittoral
+    print("Compilando littoral...")
+    os.system("./ns3 build littoral")
+    binLittoral = localizarLittoral() if execDireta else None
+    if execDireta and binLittoral is None:
+        print("Executável do littoral não encontrado em build/. Usando './ns3 run'.")
+
+def localizarLittoral():
+    # O CMake do ns-3 gera 'ns3.<versão>-littoral-<perfil>' (ou 'ns3-dev-littoral-<perfil>', num checkout do git) na
+    # árvore de build. Havendo mais de um perfil, usa o mais recente
+    candidatos = [arq for arq in glob.glob(f"{pastaBuild}**/ns3*-littoral-*", recursive=True)
+                  if re.fullmatch(r'ns3(\.[^-]*|-dev)-littoral-[A-Za-z]+', os.path.basename(arq))
+                  and os.path.isfile(arq) and os.access(arq, os.X_OK)]
+    return os.path.abspath(max(candidatos, key=os.path.getmtime)) if candidatos else None
+
+def obterAmbienteSim():
+    # Ambiente do littoral quando chamado diretamente: as bibliotecas do ns-3 ficam em build/lib
+    ambiente = dict(os.environ)
+    pastaLib = os.path.abspath(pastaBuild + "lib")
+    ambiente['LD_LIBRARY_PATH'] = pastaLib + (os.pathsep + ambiente['LD_LIBRARY_PATH'] if ambiente.get('LD_LIBRARY_PATH') else "")
+    return ambiente
+
+def rodarSimulacao(rodada, trabalhador=None):
+    # Executada pelos trabalhadores da fila: uma rodada por tarefa
+    return rodarLote([rodada], trabalhador)[0]
+
+def rodarLote(lote, trabalhador=None):
+    # Executada nos processos do pool (ou pelos trabalhadores da fila): roda o littoral numa pasta temporária e, se
+    # tudo correr bem, publica o resultado no cache com um rename (uma rodada interrompida nunca aparece como
+    # concluída). Cada tentativa tem sua pasta: com a fila, um lease expirado põe a mesma rodada em dois trabalhadores.
+    # As rodadas do lote (sementes consecutivas de um ponto) vão para um só littoral ('--runs'), que grava cada uma em
+    # run<semente>/, e o tempo de execução é rateado entre elas
+    primeira = lote[0]
+    tentativa = (trabalhador or socket.gethostname()).replace('/', '-').replace(':', '-')
+    pastaTmp = f"{pastaCache}{primeira['chave']}.{tentativa}.{os.getpid()}.tmp/"
+    cmd = ajustarComandoSim(primeira['params'], pastaTmp, primeira['semente'], primeira.get('binario'), len(lote))
+    shutil.rmtree(pastaTmp, ignore_errors=True)
+    os.makedirs(pastaTmp)
+    inicio = time.time()
+    try:
+        ret = subprocess.run(shlex.split(cmd), env=obterAmbienteSim())   # sem shell intermediário
+        tempoExec = (time.time() - inicio) / len(lote)
+        if ret.returncode != 0:
+            raise RuntimeError(f"Rodada terminou com código {ret.returncode}: {cmd}")
+        for rodada in lote:
+            pastaRodada = pastaTmp if len(lote) == 1 else f"{pastaTmp}run{rodada['semente']}/"
+            with open(pastaRodada + 'rodada.json', 'w') as arq:
+                json.dump({'params': rodada['params'], 'semente': rodada['semente'], 'versao': versaoModulo, 'tempoExec': tempoExec}, arq)
+            publicarResultado(pastaRodada, rodada['pasta'], rodada['chave'], trabalhador)
+    finally:
+        shutil.rmtree(pastaTmp, ignore_errors=True)
+    return [tempoExec] * len(lote)
+
+def publicarResultado(pastaTmp, pasta, chave, trabalhador=None):
+    # Move pastaTmp para o cache, a menos que o resultado já esteja lá (outra tentativa terminou antes) ou que a
+    # tarefa da fila tenha passado a outro trabalhador: nesses casos, a saída desta tentativa é descartada
+    if os.path.isfile(pasta + 'rodada.json'):
+        return False
+    if trabalhador is not None and not filaRodadas.pertenceA(pastaFila, chave, trabalhador):
+        print(f"[{trabalhador}] Rodada {chave} reatribuída após o lease expirar. Resultado descartado.")
+        return False
+    shutil.rmtree(pasta, ignore_errors=True)   # restos sem rodada.json
+    try:
+        os.replace(pastaTmp, pasta)
+    except OSError:
+        if os.path.isfile(pasta + 'rodada.json'):
+            return False   # outra tentativa publicou entre a verificação e o rename
+        raise
+    return True
+
+def finalizarRodada(rodada):
+    # Mantém em outputPath os arquivos de uma rodada do maior dim1 (usados por plotarSFFinalporED)
+    if rodada['dim1'] == dimDic['dim1'][-1]:
+        for arquivo in os.listdir(rodada['pasta']):
+            if arquivo != 'rodada.json':
+                shutil.copy(os.path.join(rodada['pasta'], arquivo), outputPath)
             
 def reiniciarEstruturas():
-    global dfMetricas, dfPLR
+    global amostras, estatisticas
 
-    modelo = pd.DataFrame()
-    modelo[dimIdDic['dim1']] = dimDic['dim1']  #1a coluna: ensaio dim1 - eixo x dos gráficos
-    for d in dimDic['dim2']:
-        modelo[d] = None
+    amostras = np.full((len(dimDic['dim1']), len(dimDic['dim2']), numRep, len(nomesAmostras)), np.nan)
+    estatisticas = None
 
-    for ml in metricasDic.keys():
-        dfMetricas[ml] = modelo.copy()
+def garantirRepeticoes(numReps):
+    # Amplia o eixo 'rep' do array de amostras (com NaN) para comportar numReps repetições
+    global amostras
+    if numReps > amostras.shape[2]:
+        extra = np.full(amostras.shape[:2] + (numReps - amostras.shape[2],) + amostras.shape[3:], np.nan)
+        amostras = np.concatenate([amostras, extra], axis=2)
 
-    for pl in PLRDic.keys():
-        dfPLR[pl] = modelo.copy()    
+def obterEstatisticas():
+    global estatisticas
+    if estatisticas is None:
+        estatisticas = calcularEstatisticas(amostras, areaIC)
+    return estatisticas
 
 def reiniciarEstruturasST():
-    global dfPDR_ST, amostrasPDR_ST
+    global acumST, rodadasST, contagemSF, repsSF, esperadasST, esperadasSF
 
-    modelo = pd.DataFrame()
-    modelo['Tempo'] = tempoLst
-    for d in dimDic['dim2']:
-        modelo[d] = [[] for _ in range(len(modelo))]    
-    dfPDR_ST = modelo.copy()
-    amostrasPDR_ST.clear()
+    acumST = {dim1: iniciarAcumulador((len(tempoLst), len(dimDic['dim2']))) for dim1 in dimDic['dim1']}
+    rodadasST = {dim1: 0 for dim1 in dimDic['dim1']}
+    contagemSF = {}
+    repsSF = {}
+    esperadasST = {}
+    esperadasSF = {}
 
 
-def atualizarDados(dim1, dim2):
-    global dfMetricas, amostrasMet
+def atualizarDados(rodada):
+    global estatisticas
 
-    arquivoGP = glPcktCnt + adrType + '.csv'
+    i, j = dimDic['dim1'].index(rodada['dim1']), dimDic['dim2'].index(rodada['dim2'])
+    adr = rodada['params']['--adrType']
+    arquivoGP = rodada['pasta'] + glPcktCnt + adr + '.csv'
     arqGP = pd.read_csv(arquivoGP, header=None, sep=' ') 
 
-    # Adiciona novos dados às amostras
-    amostrasMet[list(metricasDic.keys())[0]].append(arqGP.iloc[0, 2])  # PDR
+    valores = {}
+    valores['PDR'] = arqGP.iloc[0, 2]
     if energiaPorED:
-        amostrasMet[list(metricasDic.keys())[1]].append(arqGP.iloc[0, -1])  # Energia por ED
+        valores['EneCon'] = arqGP.iloc[0, -1]  # Energia por ED
     else:
-        amostrasMet[list(metricasDic.keys())[1]].append(arqGP.iloc[0, -2])  # Energia Total
+        valores['EneCon'] = arqGP.iloc[0, -2]  # Energia Total
     pacReceb = arqGP.iloc[0, 1]
     totEneCon = arqGP.iloc[0, -2]
-    effEne = (pacReceb * pktSize * 8) / totEneCon
-    amostrasMet[list(metricasDic.keys())[2]].append(effEne)
-    amostrasMet[list(metricasDic.keys())[3]].append(arqGP.iloc[0, 5])  # Latência
+    valores['EneEff'] = (pacReceb * tamanhoPacote(rodada['params']) * 8) / totEneCon
+    valores['Latencia'] = arqGP.iloc[0, 5]
 
     if modoConfirm:
-        arquivoGPC = glPcktCntConf + adrType + '.csv'
+        arquivoGPC = rodada['pasta'] + glPcktCntConf + adr + '.csv'
         arqGPC = pd.read_csv(arquivoGPC, header=None, sep=' ')   
-        amostrasMet['CPSR'].append(arqGPC.iloc[0, 2])  # CPSR
-
-    # Verifica se temos amostras suficientes para atualizar
-    if len( amostrasMet[list(metricasDic.keys())[0]] ) == numRep:
-        i = dimDic['dim1'].index(dim1)  # Índice para a linha
-
-        for ml in metricasDic.keys():
-            dfMetricas[ml].at[i, dim2] = amostrasMet[ml].copy()
-            amostrasMet[ml].clear()
+        valores['CPSR'] = arqGPC.iloc[0, 2]
        
     # Leitura do DF para PLR
-    arquivoPhy = phyPerf + adrType + '.csv'
-    arqPhy = pd.read_csv(arquivoPhy, header=None, sep=' ') 
-
-    env   = arqPhy[arqPhy[0] > 0][2]
-    pdr   = arqPhy[arqPhy[0] > 0][3]/env
-    plr_I = arqPhy[arqPhy[0] > 0][4]/env
-    plr_R = arqPhy[arqPhy[0] > 0][5]/env
-    plr_S = arqPhy[arqPhy[0] > 0][6]/env
-    plr_T = arqPhy[arqPhy[0] > 0][7]/env
-    unset = 1 - (pdr + plr_I + plr_R + plr_S + plr_T)  # Valor remanescente a ser acrescentado ao PDR
-        
-    amostrasPLR['PLR_I'].append(plr_I.mean())
-    amostrasPLR['PLR_R'].append(plr_R.mean())    
-    amostrasPLR['PLR_S'].append(plr_S.mean())
-    amostrasPLR['PLR_T'].append(plr_T.mean())
-    amostrasPLR['UNSET'].append(unset.mean())
-
-    if (len(amostrasPLR['PLR_I']) == numRep):   
-        i = dimDic['dim1'].index(dim1)  # Índice para a linha
-
-        for pl in PLRDic.keys():
-            dfPLR[pl].at[i, dim2] = amostrasPLR[pl].copy()
-            amostrasPLR[pl].clear()
-    
-   #print(f"dfPLR = \n{dfPLR}")
-
-def atualizarDadosST (mob, gw, dim1, dim2, rep):
-    global dfPDR_ST, amostrasPDR_ST
-
-    arquivoGP = globalPerf + adrType + '.csv'
-    arqGP = pd.read_csv(arquivoGP, header=None, sep=' ') 
+    arqPhy = lerSaidaPeriodica(rodada['pasta'] + phyPerf + adr + extSaida)
+
+    # Razões sobre os totais da rodada (por pacote), para não depender do período de amostragem do phyPerf
+    totais = arqPhy[arqPhy[0] > 0].sum()
+    env   = totais[2]
+    pdr   = totais[3]/env
+    valores['PLR_I'] = totais[4]/env
+    valores['PLR_R'] = totais[5]/env
+    valores['PLR_S'] = totais[6]/env
+    valores['PLR_T'] = totais[7]/env
+    valores['UNSET'] = 1 - (pdr + valores['PLR_I'] + valores['PLR_R'] + valores['PLR_S'] + valores['PLR_T'])  # Valor remanescente a ser acrescentado ao PDR
+
+    # Cada rodada ocupa a sua própria posição (dim1, dim2, rep) no array, independente da ordem de conclusão
+    garantirRepeticoes(rodada['rep'] + 1)
+    for nome, valor in valores.items():
+        amostras[i, j, rodada['rep'], nomesAmostras.index(nome)] = valor
+    estatisticas = None
+
+def atualizarDadosST(rodada):
+    global rodadasST
+
+    dim1, dim2 = rodada['dim1'], rodada['dim2']
+    arqGP = lerSaidaPeriodica(rodada['pasta'] + globalPerf + rodada['params']['--adrType'] + extSaida)
     arqGP = arqGP.drop(0)
     
-    amostrasPDR_ST.append( (arqGP[2]/arqGP[1]).tolist() )
-   
-    for i in range(0,len(dfPDR_ST['Tempo'])):
-        celulaPDR = dfPDR_ST.at[i,dim2]   
-        celulaPDR.append(amostrasPDR_ST[0][i])   
-        dfPDR_ST.at[i,dim2] = celulaPDR   
-    amostrasPDR_ST.clear()
+    amostraPDR_ST = np.full(len(tempoLst), np.nan)
+    pdrHora = (arqGP[2]/arqGP[1]).to_numpy()[:len(tempoLst)]
+    amostraPDR_ST[:len(pdrHora)] = pdrHora
+    acumularAmostra(acumST[dim1], (slice(None), dimDic['dim2'].index(dim2)), amostraPDR_ST)
         
-    if (rep == numRep-1) and (dim2 == list(dimDic['dim2'])[-1]):
-        dfPDR_ST.to_json(f"{outputPath}ST-{dimIdDic['dim1']}-{dim1}-MbltProb{mob}-{gw}Gw.json", orient='records')
-
-def atualizarDadosSfFinal(mob, gw, dim1, dim2, rep):
-    global contagemSF
-
-    arquivoDS = devStatus + adrType + '.csv'
-    SFdf = pd.read_csv(arquivoDS, sep=' ', header=None, skiprows=lambda x: x < len(pd.read_csv(arquivoDS, sep=' ', header=None)) - numED)
+    # Salva a série temporal de dim1 quando todas as suas rodadas listadas (todos os dim2 e repetições) tiverem concluído.
+    # Uma onda posterior da replicação adaptativa a regrava com as novas repetições
+    rodadasST[dim1] += 1
+    if rodadasST[dim1] == esperadasST[dim1]:
+        salvarAcumulador(f"{outputPath}ST-{dimIdDic['dim1']}-{dim1}-MbltProb{rodada['mob']}-{rodada['gw']}Gw.npz", acumST[dim1], tempo=np.array(tempoLst))
+
+def atualizarDadosSfFinal(rodada):
+    global contagemSF, repsSF
+
+    dim1, dim2 = rodada['dim1'], rodada['dim2']
+    nED = int(rodada['params']['--nED'])
+    arquivoDS = rodada['pasta'] + devStatus + rodada['params']['--adrType'] + extSaida
+    SFdf = lerUltimoSnapshot(arquivoDS, nED)
     valores = SFdf[4]
     valores = 12 - valores  # Converte DR para SF
+    contagem = contagemSF.setdefault((dim1, dim2), {7: 0, 8: 0, 9: 0, 10: 0, 11: 0, 12: 0})
     for valor in valores:
-        if valor in contagemSF:
-            contagemSF[valor] += 1
+        if valor in contagem:
+            contagem[valor] += 1
  
-    if (rep == numRep-1):
-        mediaSF = {sf: (contagemSF[sf] / (numED*numRep)) * 100 for sf in contagemSF}        
+    repsSF[(dim1, dim2)] = repsSF.get((dim1, dim2), 0) + 1
+    if (repsSF[(dim1, dim2)] == esperadasSF[(dim1, dim2)]):
+        mediaSF = {sf: (contagem[sf] / (nED*repsSF[(dim1, dim2)])) * 100 for sf in contagem}        
         mediaSF_df = pd.DataFrame(list(mediaSF.items()), columns=['SF', 'Percentage'])
-        mediaSF_df.to_json(f"{outputPath}{dimIdDic['dim1']}-{dim1}-SFFinal{dim2}-MbltProb{mob}-{gw}Gw.json", orient='records')
-        contagemSF = {7: 0, 8: 0, 9: 0, 10: 0, 11: 0, 12: 0}    # reinicia a contagem
+        mediaSF_df.to_json(f"{outputPath}{dimIdDic['dim1']}-{dim1}-SFFinal{dim2}-MbltProb{rodada['mob']}-{rodada['gw']}Gw.json", orient='records')
+
+def lerSaidaPeriodica(arquivo):
+    # phyPerf/globalPerf como DF de colunas numeradas, em qualquer dos dois formatos de saída
+    if saidaBinaria:
+        return paraDataFrame(carregarNpy(arquivo))
+    return pd.read_csv(arquivo, header=None, sep=' ')
 
 def inicializarDictTempo():
-    global dfTmpExc
+    global dfTmpExc, dfRepExc
    
     modelo = pd.DataFrame()
     modelo[dimIdDic['dim1']] = dimDic['dim1']  #1a coluna: ensaio dim1 - eixo x dos gráficos
     for d in dimDic['dim2']:
         modelo[d] = float(0)
     dfTmpExc = modelo.copy()
+    dfRepExc = modelo.copy()
 
 def atualizarDictTempo(dim1,dim2,tempo):
     global dfTmpExc
     dfTmpExc.at[dimDic['dim1'].index(dim1), dim2] += tempo    
+    dfRepExc.at[dimDic['dim1'].index(dim1), dim2] += 1
 
 def registrarTempoMedio():
     global dfTmpExc
-    dfTmpExc.iloc[:, 1:] = dfTmpExc.iloc[:, 1:] / numRep
+    # Média por rodada: o nº de repetições varia entre os pontos na replicação adaptativa
+    dfTmpExc.iloc[:, 1:] = dfTmpExc.iloc[:, 1:] / dfRepExc.iloc[:, 1:].where(dfRepExc.iloc[:, 1:] > 0)
     dfTmpExc = dfTmpExc.round(5)
     dfTmpExc.to_csv(f'{outputPath}tempoMedioExec.csv', index=True)
     
 def ajustarLstCenarios(parser):
-    global tipoCenario, dimDic, dimIdDic
+    global tipoCenario, varredura, numRep, numJobs, usarFila, numTrabLocais, modoTrabalhador, repsPorProcesso, modoVerifLote
+    global repAdaptativa, metricasParada, erroRelAlvo, minRep, maxRep, preTriagem, podarPontos
     
-    parser.add_argument('arg1', type=int, help=str(cenarioLgdDic))    
+    parser.add_argument('arg1', type=int, nargs='?', default=tipoCenario, help=str(cenarioLgdDic))    
+    parser.add_argument('--sweep', help='Arquivo (JSON/YAML) com a especificação da varredura, no lugar de arg1 (ver aux/varredura.py)')
+    parser.add_argument('--adaptive', action='store_true', help='Replica cada ponto só até o IC das metricasParada convergir (até maxRep)')
+    parser.add_argument('--prescreen', action='store_true', help='Estima cada ponto com o modelo analítico de capacidade antes de simular (ver aux/capacidade.py)')
+    parser.add_argument('--prune', action='store_true', help='Não simula os pontos que a pré-triagem aponta como saturados ou ociosos')
+    parser.add_argument('--jobs', type=int, default=numJobs, help='Número de rodadas executadas simultaneamente (def.: nº de núcleos)')
+    parser.add_argument('--batch', type=int, default=repsPorProcesso, help="Máx. de repetições de um ponto por processo do littoral (opção '--runs'), só no pool local")
+    parser.add_argument('--queue', action='store_true', help=f'Publica as rodadas na fila {pastaFila} em vez de executá-las localmente')
+    parser.add_argument('--local-workers', type=int, default=numTrabLocais, help='Nº de trabalhadores locais iniciados no modo fila')
+    parser.add_argument('--worker', action='store_true', help=f'Executa rodadas publicadas na fila {pastaFila} (sem cenário)')
+    parser.add_argument('--check-batch', action='store_true', help='Verifica se o littoral reproduz, num lote, a mesma réplica de uma semente rodada sozinha')
     args = parser.parse_args()
-    tipoCenario = args.arg1
-
-    if (tipoCenario == 0):
-        dimIdDic['dim1'] = 'numED'
-        dimDic['dim1'] = numEDLst if (tipoExecucao == 0) else numEDLst[1:4]
-        dimIdDic['dim2'] = 'adrType'
-        dimDic['dim2'] = trtmntDic['adrType'].keys() if (tipoExecucao == 0) else list(trtmntDic['adrType'].keys())[:2]
-        if (multiGw):
-            dimDic['dim2'] = list(trtmntDic['adrType'].keys())[:numTratMG]
-    elif (tipoCenario == 1):
-        dimIdDic['dim1'] = 'sideLength'
-        dimDic['dim1'] = sideLengthLst if (tipoExecucao == 0) else sideLengthLst[-2:]
-        dimIdDic['dim2'] = 'adrType'
-        dimDic['dim2'] = trtmntDic['adrType'].keys() if (tipoExecucao == 0) else list(trtmntDic['adrType'].keys())[:2]
-        if (multiGw):
-            dimDic['dim2'] = list(trtmntDic['adrType'].keys())[:numTratMG]
-    elif (tipoCenario == 2):
-        dimIdDic['dim1'] = 'pktsPerDay'
-        dimDic['dim1'] = pktsPerDayLst if (tipoExecucao == 0) else pktsPerDayLst[-2:]
-        dimIdDic['dim2'] = 'adrType'
-        dimDic['dim2'] = trtmntDic['adrType'].keys() if (tipoExecucao == 0) else list(trtmntDic['adrType'].keys())[:2]
-        if (multiGw):
-            dimDic['dim2'] = list(trtmntDic['adrType'].keys())[:numTratMG]
-    elif (tipoCenario == 3):
-        dimIdDic['dim1'] = 'numED'
-        dimDic['dim1'] = numEDLst if (tipoExecucao == 0) else numEDLst[1:4]
-        dimIdDic['dim2'] = 'mobModel'
-        dimDic['dim2'] = trtmntDic['mobModel'].keys() if (tipoExecucao == 0) else list(trtmntDic['mobModel'].keys())[-2:]
-        if (multiGw):
-            dimDic['dim2'] = list(trtmntDic['mobModel'].keys())[:numTratMG]
-    elif (tipoCenario == 4):
-        dimIdDic['dim1'] = 'numED'
-        dimDic['dim1'] = numEDLst if (tipoExecucao == 0) else numEDLst[1:4]
-        dimIdDic['dim2'] = 'speedClass'
-        dimDic['dim2'] = trtmntDic['speedClass'].keys() if (tipoExecucao == 0) else list(trtmntDic['speedClass'].keys())[:2]
+    numJobs = max(1, args.jobs)
+    repsPorProcesso = max(1, args.batch)
+    usarFila = usarFila or args.queue or (args.local_workers > 0)
+    numTrabLocais = max(0, args.local_workers)
+    modoTrabalhador = args.worker
+    modoVerifLote = args.check_batch
+    podarPontos = podarPontos or args.prune
+    preTriagem = preTriagem or args.prescreen or podarPontos
+
+    if args.sweep:
+        varredura = carregarVarredura(args.sweep)
+        tipoCenario = varredura['nome']
+    else:
+        tipoCenario = args.arg1
+        varredura = cenarioPadrao(tipoCenario)
+    numRep = int(varredura['repeticoes'])
+    maxRep = numRep
+    if 'adaptativa' in varredura:
+        adaptativa = varredura['adaptativa']
+        repAdaptativa = adaptativa.get('ativa', True)
+        metricasParada = adaptativa.get('metricas', metricasParada)
+        erroRelAlvo = adaptativa.get('erroRelativo', erroRelAlvo)
+        minRep = adaptativa.get('minRepeticoes', minRep)
+        maxRep = adaptativa.get('maxRepeticoes', maxRep)
+    repAdaptativa = repAdaptativa or args.adaptive
+    if repAdaptativa:
+        minRep = max(2, min(minRep, maxRep))   # o IC precisa de pelo menos 2 repetições
+        numRep = maxRep
+    ajustarDimensoes()
+
+def cenarioPadrao(tipo):
+    # Os cenários clássicos (cenarioLgdDic) como especificações de varredura
+    completa = (tipoExecucao == 0)
+
+    def tratamentos(nome, selecaoRapida):
+        chaves = list(trtmntDic[nome].keys())
         if (multiGw):
-            dimDic['dim2'] = list(trtmntDic['speedClass'].keys())[:numTratMG]
-
-    if (grafSuperf):        
-        dimIdDic['dim1'] = 'numED'
-        dimDic['dim1'] = numEDLst if (tipoExecucao == 0) else numEDLst[1:4]
-        dimIdDic['dim2'] = 'pktsPerDay'
-        dimDic['dim2'] = pktsPerDayLst if (tipoExecucao == 0) else pktsPerDayLst[-2:]
-
-def ajustarComandoSim(mob, gw, dim1, dim2 ):
-    global numED, adrType, sideLength, pktsPerDay, modMob, minSpeed, maxSpeed
-
-    if (tipoCenario == 0):
-        numED = dim1
-        adrType = dim2
-    elif (tipoCenario == 1):
-        sideLength = dim1
-        adrType = dim2
-    elif (tipoCenario == 2):
-        pktsPerDay = dim1
-        adrType = dim2
-    elif (tipoCenario == 3):
-        numED = dim1
-        modMob = dim2
-        minSpeed = minSpeedLst[1]  #Classe de velocidade intermediária
-        maxSpeed = maxSpeedLst[1]
-        adrType = adrTypeDef  # Esquema ADR default
-    elif (tipoCenario == 4):
-        numED = dim1
-        minSpeed = minSpeedLst[int(dim2)]
-        maxSpeed = maxSpeedLst[int(dim2)]
-        modMob = 2    # Fixa o modelo no Steady-State Random Waypoint
-        adrType = adrTypeDef
-    
-    if (grafSuperf):
-        numED = dim1
-        pktsPerDay = dim2
-        adrType = adrTypeDef
+            return chaves[:numTratMG]
+        return chaves if completa else selecaoRapida(chaves)
 
-    
-    base_params = {
-        '--nGw': str(gw),
-        '--nED': str(numED),
-        '--adrType': adrType,
-        '--sideLength': str(sideLength),
-        '--pktsPerDay': str(pktsPerDay),
-        '--pktSize': str(pktSize),
-        '--simTime': str(simTime),
-        '--circArea': str(areaCirc).lower(),
-        '--pathLossExp': str(pathLossExp),
-        '--okumura': str(okumura).lower(),
-        '--environment': str(okumuraEnvrmnt),
-        '--mobEDProb': str(mob),
-        '--mobModel': str(modMob),
-        '--minSpeed': str(minSpeed),
-        '--maxSpeed': str(maxSpeed),
-        '--confMode': str(modoConfirm).lower() 
+    listaNumED = numEDLst if completa else numEDLst[1:4]
+    listaAdr = tratamentos('adrType', lambda chaves: chaves[:2])
+    fixos = {}
+    if (grafSuperf):
+        eixos = {'numED': listaNumED, 'pktsPerDay': pktsPerDayLst if completa else pktsPerDayLst[-2:]}
+        fixos = {'adrType': adrTypeDef}
+    elif (tipo == 0):
+        eixos = {'numED': listaNumED, 'adrType': listaAdr}
+    elif (tipo == 1):
+        eixos = {'sideLength': sideLengthLst if completa else sideLengthLst[-2:], 'adrType': listaAdr}
+    elif (tipo == 2):
+        eixos = {'pktsPerDay': pktsPerDayLst if completa else pktsPerDayLst[-2:], 'adrType': listaAdr}
+    elif (tipo == 3):
+        eixos = {'numED': listaNumED, 'mobModel': tratamentos('mobModel', lambda chaves: chaves[-2:])}
+        fixos = {'minSpeed': minSpeedLst[1], 'maxSpeed': maxSpeedLst[1], 'adrType': adrTypeDef}   # Classe de velocidade intermediária
+    elif (tipo == 4):
+        # Cada classe de velocidade fixa um par (minSpeed, maxSpeed), no Steady-State Random Waypoint
+        classes = tratamentos('speedClass', lambda chaves: chaves[:2])
+        eixos = {'numED': listaNumED,
+                 'speedClass': {c: {'minSpeed': minSpeedLst[int(c)], 'maxSpeed': maxSpeedLst[int(c)]} for c in classes}}
+        fixos = {'mobModel': 2, 'adrType': adrTypeDef}
+    else:
+        raise ValueError(f"Cenário desconhecido: {tipo}. Opções: {cenarioLgdDic}")
+
+    return validarVarredura({'nome': str(tipo), 'desenho': 'fatorial', 'eixos': eixos, 'fixos': fixos, 'repeticoes': numRep})
+
+def ajustarDimensoes():
+    # dim1 e dim2 (eixo x e séries dos gráficos) a partir da varredura. Rótulos sem legenda conhecida usam o próprio valor.
+    # As horas da ST vão até o maior simTime da varredura (que pode sobrescrever o global em 'fixos' ou num eixo)
+    global tempoLst
+    maxSimTime = max(float(ajustarParamsSim(rodada['params'])['--simTime'])
+                     for rodada in gerarRodadas(varredura, repsPonto=lambda rotulos: range(1)))
+    tempoLst = list(range(1, int(maxSimTime/3600) + 1))
+    for dim in ('dim1', 'dim2'):
+        dimIdDic[dim] = varredura[dim]
+        dimDic[dim] = obterNiveis(varredura, dim)
+        trtmntLblDic.setdefault(dimIdDic[dim], dimIdDic[dim])
+    legendas = trtmntDic.setdefault(dimIdDic['dim2'], {})
+    legendas.update(varredura.get('legendas', {}))
+    for rotulo in dimDic['dim2']:
+        legendas.setdefault(rotulo, str(rotulo))
+
+def ajustarParamsSim(paramsVarredura):
+    # Parâmetros do littoral de uma rodada: os valores globais, substituídos pelos da varredura (que também pode
+    # usar os nomes de aliasParams)
+    valores = {
+        'nGw': list(gwDic)[0],
+        'nED': numED,
+        'adrType': adrTypeDef,
+        'sideLength': sideLength,
+        'pktsPerDay': pktsPerDay,
+        'pktSize': pktSize,
+        'simTime': simTime,
+        'circArea': areaCirc,
+        'pathLossExp': pathLossExp,
+        'okumura': okumura,
+        'environment': okumuraEnvrmnt,
+        'mobEDProb': list(mobDic)[0],
+        'mobModel': modMob,
+        'minSpeed': minSpeed,
+        'maxSpeed': maxSpeed,
+        'confMode': modoConfirm,
+        'binaryOutput': saidaBinaria,
+        'statusPeriod': periodoStatus,
+        'phyPerfPeriod': periodoPhyPerf,
+        'globalPerfPeriod': periodoGlPerf,
+        'statusOnChange': statusNaMudanca,
+        'statusMinDist': distMinStatus
     }
-
-    params = " ".join([f"{k}={v}" for k, v in base_params.items()])
-    return f"./ns3 run \"littoral {params}\" --quiet"
+    valores.update({aliasParams.get(k, k): v for k, v in paramsVarredura.items()})
+    return {f"--{k}": (str(v).lower() if isinstance(v, bool) else str(v)) for k, v in valores.items()}
+
+def tamanhoPacote(params):
+    # Tamanho (bytes) da carga útil de uma rodada. pktSize = 0 mantém o padrão do PeriodicSenderHelper (10 bytes)
+    return int(params['--pktSize']) if int(params['--pktSize']) > 0 else 10
+
+def ajustarComandoSim(params, pastaSaida=outputPath, semente=0, binario=None, repeticoes=1):
+    # binario: executável do littoral (def.: binLittoral). Os trabalhadores da fila usam o do coordenador.
+    # repeticoes > 1: sementes semente, semente+1, ... num só processo, cada uma em <pastaSaida>/run<semente>/
+    binario = binLittoral if binario is None else binario
+    params = " ".join([f"{k}={v}" for k, v in params.items()] + ([f"--runs={repeticoes}"] if repeticoes > 1 else []))
+    if binario is not None:
+        return f"{binario} {params} --baseSeed={semente} --outputPath={pastaSaida}"
+    return f"./ns3 run --no-build \"littoral {params} --baseSeed={semente} --outputPath={pastaSaida}\" --quiet"
 
 ##### GRÁFICOS ######
 # Plotar gráfico de acordo com alguma métrica específica
 def plotarGraficos(mob, gw):
     global marcadores
 
-    if (not novaSim):
-        carregarDadosMetricasArq(mob, gw)
+    est = obterEstatisticas()
     
     # Obtem um gráfico para cada métrica
     for metK, metV in metricasDic.items():
         if (metK == 'CPSR' and not modoConfirm):
             continue
 
-        eixo_x = dfMetricas[metK].iloc[:, 0]   
-        dados = dfMetricas[metK].iloc[:, 1:]   # Removendo o primeiro elemento de cada Series (que corresponde ao rótulo da coluna)
-        dfMedia = dados.map(lambda lista: np.mean(lista))
-        dfDP = dados.map(lambda lista: np.std(lista, ddof=1))           
-        z = norm.ppf(areaIC)
+        k = nomesAmostras.index(metK)
+        eixo_x = dimDic['dim1']
 
         plt.subplots(figsize=(7, 6))  # Definindo o tamanho do gráfico
             
@@ -448,10 +861,9 @@ def plotarGraficos(mob, gw):
         if not exibirMarc:
             marc = [' ']
 
-        for i, coluna in enumerate(dfMedia.columns):
-            eixo_y = dfMedia[coluna]
-            desvio = dfDP[coluna]            
-            erro_padrao = desvio / np.sqrt(numRep) * z  # Calcula o erro padrão 
+        for i, coluna in enumerate(dimDic['dim2']):
+            eixo_y = est['media'][:, i, k]
+            erro_padrao = est['erroIC'][:, i, k]  # Semiamplitude do IC
             cor = corLinhas[i % len(corLinhas)]            
             lbl = trtmntDic[dimIdDic['dim2']][coluna]   # Obtem a respectiva legenda a partir da chave em dimIdDic['dim2']            
             
@@ -468,7 +880,7 @@ def plotarGraficos(mob, gw):
         # Legenda
         legend_font = FontProperties(family=nomeFonte, style='normal', size=tamFonteGraf-3)
         if legendaAcima:        
-            plt.legend(prop=legend_font, loc='upper center', bbox_to_anchor=(0.5, 1.2), ncol=len(dfMedia.columns))
+            plt.legend(prop=legend_font, loc='upper center', bbox_to_anchor=(0.5, 1.2), ncol=len(dimDic['dim2']))
         else:        
             leg = plt.legend(prop=legend_font)
             leg.get_frame().set_alpha(0.5)  # Ajustando a transparência da legenda
@@ -491,21 +903,18 @@ def plotarGraficosMGP(mob):
         for gwK, gwV in gwDic.items():
 
             carregarDadosMetricasArq(mob, gwK)
+            est = obterEstatisticas()
 
-            eixo_x = dfMetricas[metK].iloc[:, 0]   
-            dados = dfMetricas[metK].iloc[:, 1:]   # Removendo o primeiro elemento de cada Series (que corresponde ao rótulo da coluna)
-            dfMedia = dados.map(lambda lista: np.mean(lista))
-            dfDP = dados.map(lambda lista: np.std(lista, ddof=1))           
-            z = norm.ppf(areaIC)           
+            k = nomesAmostras.index(metK)
+            eixo_x = dimDic['dim1']
                 
             marc = marcadores
             if not exibirMarc:
                 marc = [' ']
 
-            for i, coluna in enumerate(dfMedia.columns):
-                eixo_y = dfMedia[coluna]
-                desvio = dfDP[coluna]            
-                erro_padrao = desvio / np.sqrt(numRep) * z  # Calcula o erro padrão 
+            for i, coluna in enumerate(dimDic['dim2']):
+                eixo_y = est['media'][:, i, k]
+                erro_padrao = est['erroIC'][:, i, k]  # Semiamplitude do IC
                 #cor = corLinhas[i % len(corLinhas)]            
                 
                 cor = corLinhas[cont % len(corLinhas)]
@@ -528,7 +937,7 @@ def plotarGraficosMGP(mob):
         # Legenda
         legend_font = FontProperties(family=nomeFonte, style='normal', size=tamFonteGraf-3)
         if legendaAcima:        
-            plt.legend(prop=legend_font, loc='upper center', bbox_to_anchor=(0.5, 1.2), ncol=len(dfMedia.columns))
+            plt.legend(prop=legend_font, loc='upper center', bbox_to_anchor=(0.5, 1.2), ncol=len(dimDic['dim2']))
         else:        
             leg = plt.legend(prop=legend_font)
             leg.get_frame().set_alpha(0.5)  # Ajustando a transparência da legenda
@@ -539,20 +948,14 @@ def plotarGraficosMGP(mob):
 
 def plotarGraficosPLR(mob, gw):    
     colors = ['lightslategray', 'lightcoral', 'lightgreen', 'plum', 'cyan']
-        
-    if (not novaSim):
-        carregarDadosPLRArq(mob, gw)
     
-    eixo_x = dfMetricas['PDR'].iloc[:, 0]
-    dfMedia_PDR = dfMetricas['PDR'].map(lambda lista: np.mean(lista))
-    dfMedia_PLR_I = dfPLR['PLR_I'].map(lambda lista: np.mean(lista))
-    dfMedia_PLR_R = dfPLR['PLR_R'].map(lambda lista: np.mean(lista))
-    dfMedia_PLR_T = dfPLR['PLR_T'].map(lambda lista: np.mean(lista))
-    dfMedia_PLR_S = dfPLR['PLR_S'].map(lambda lista: np.mean(lista))   
-    dfMedia_Unset = dfPLR['UNSET'].map(lambda lista: np.mean(lista))  
+    eixo_x = dimDic['dim1']
+    media = obterEstatisticas()['media']
+    dfMedia_PDR, dfMedia_PLR_I, dfMedia_PLR_R, dfMedia_PLR_T, dfMedia_PLR_S, dfMedia_Unset = [
+        pd.DataFrame(media[:, :, nomesAmostras.index(nome)], columns=dimDic['dim2']) for nome in ['PDR', 'PLR_I', 'PLR_R', 'PLR_T', 'PLR_S', 'UNSET']]
     dfMedia_PDR = dfMedia_PDR + dfMedia_Unset
     
-    for column in dfMedia_PDR.columns[1:]:
+    for column in dimDic['dim2']:
         # Cria uma nova figura para cada esquema
         fig, ax = plt.subplots(figsize=(8, 6))
         ax.grid(axis='y', linestyle='--', alpha=0.7, zorder=0) 
@@ -590,12 +993,8 @@ def protarGraficoST(mob, gw):
         #plt.figure(figsize=(12, 6)) 
         plt.grid(axis='y', linestyle='--', alpha=0.7, zorder=0)
     
-        nomeArq = f"{outputPath}ST-{dimIdDic['dim1']}-{dim1}-MbltProb{mob}-{gw}Gw.json"            
-        dfPDR_ST = pd.read_json(nomeArq, orient='records')        
-        eixo_x = dfPDR_ST.iloc[:, 0] 
-        dados = dfPDR_ST.iloc[:, 1:]    
-        dfMedia = dados.map(lambda lista: np.mean(lista))    
-        z = norm.ppf(areaIC)
+        eixo_x, media = carregarDadosST(mob, gw, dim1)
+        dfMedia = pd.DataFrame(media, columns=dimDic['dim2'])
 
         for dim2 in dimDic['dim2']:            
             eixo_y = dfMedia[dim2]
@@ -612,7 +1011,7 @@ def protarGraficoST(mob, gw):
         
         legend_font = FontProperties(family=nomeFonte, style='normal', size=tamFonteGraf-4)
         if legendaAcima:        
-            plt.legend(prop=legend_font, loc='upper center', bbox_to_anchor=(0.5, 1.2), ncol=len(dfMedia.columns))
+            plt.legend(prop=legend_font, loc='upper center', bbox_to_anchor=(0.5, 1.2), ncol=len(dimDic['dim2']))
         else:        
             leg = plt.legend(prop=legend_font)
             leg.get_frame().set_alpha(0.5)  # Ajustando a transparência da legenda
@@ -639,7 +1038,7 @@ def plotarSFFinalPorc(mob, gw):
 
             for sf in range(7, 13):
                 if sf in mediaSf:
-                    dados_sf[sf].append(mediaSf[sf])
+                    dados_sf[sf].append(mediaSf[sf])   # NaN nos pontos podados pela pré-triagem: barra ausente
                 else:
                     dados_sf[sf].append(0)
 
@@ -656,8 +1055,9 @@ def plotarSFFinalPorc(mob, gw):
         ax.set_xticklabels(range(7, 13), fontsize=tamFonteGraf, fontname=nomeFonte)
 
         # Calcula o maior valor e ajusta o limite do eixo Y
-        max_value = max(max(dados_sf[sf]) for sf in range(7, 13))
-        y_upper_limit = np.ceil(max_value / 10) * 10  # Arredonda para a dezena mais próxima
+        valores_sf = np.array([dados_sf[sf] for sf in range(7, 13)], dtype=float)
+        max_value = np.nanmax(valores_sf) if np.isfinite(valores_sf).any() else 0
+        y_upper_limit = max(np.ceil(max_value / 10) * 10, 10)  # Arredonda para a dezena mais próxima
         ax.set_ylim(0, y_upper_limit)
 
         # Configurações dos ticks do eixo Y
@@ -690,13 +1090,15 @@ def plotarSFFinalporED(mob, gw):
     for dim1 in dimDic['dim1']:
         for idx, dim2 in enumerate(dimDic['dim2']):
             #arquivoDS = devStatus + adrType + '.csv'
-            arquivoDS = devStatus + dim2 + '.csv'
-            SFdf = pd.read_csv(arquivoDS, header=None, sep=' ')
+            arquivoDS = outputPath + devStatus + dim2 + extSaida
+            if not os.path.isfile(arquivoDS):
+                continue   # maior dim1 podado pela pré-triagem: nenhuma rodada deixou seus arquivos em outputPath
             maiorED = dimDic['dim1'][-1]
+            SFdf = lerUltimoSnapshot(arquivoDS, maiorED)
 
-            coordX         = SFdf.iloc[-maiorED:, 2]
-            coordY         = SFdf.iloc[-maiorED:, 3]
-            valoresSF = 12 - SFdf.iloc[-maiorED:, 4]
+            coordX         = SFdf[2]
+            coordY         = SFdf[3]
+            valoresSF = 12 - SFdf[4]
 
             # Cria um novo DataFrame com as colunas atualizadas
             EDdf = pd.DataFrame({'X': coordX, 'Y': coordY, 'SF': valoresSF})        
@@ -712,9 +1114,8 @@ def plotarSFFinalporED(mob, gw):
             plt.xlim(-sideLength / 2 - tol, sideLength / 2 + tol)
             plt.ylim(-sideLength / 2 - tol, sideLength / 2 + tol)
 
-            # Plota os nós da rede com destaque em suas circunferências
-            for index, row in EDdf.iterrows():
-                plt.scatter(row['X'], row['Y'], s=200, color=coresSF[row['SF']], edgecolor='black', linewidth=0.5)
+            # Plota os nós da rede com destaque em suas circunferências (uma única chamada para todos os EDs)
+            plt.scatter(EDdf['X'], EDdf['Y'], s=200, c=EDdf['SF'].map(coresSF).tolist(), edgecolor='black', linewidth=0.5)
                 
             # Adiciona legendas
             legend_elements = [Patch(color=color, label=f'SF{sf}') for sf, color in coresSF.items()]
@@ -734,9 +1135,6 @@ def plotarSFFinalporED(mob, gw):
 
 def plotarSuperficie(mob, gw):
 
-    if (not novaSim):
-        carregarDadosMetricasArq(mob, gw)
-
     # Obtem um gráfico para cada métrica
     for metK, metV in metricasDic.items():
         if (metK == 'CPSR' and not modoConfirm):
@@ -745,9 +1143,8 @@ def plotarSuperficie(mob, gw):
         eixoX = dimDic['dim1']
         eixoY = dimDic['dim2']
 
-        # Calcular a média dos valores de PDR em cada célula, lidando com None ou valores não numéricos
-        #valores = dfMetricas[metK].iloc[:, 1:].applymap(lambda x: np.mean(x) if isinstance(x, list) else np.nan).values
-        valores = dfMetricas[metK].iloc[:, 1:].map(lambda x: np.mean(x) if isinstance(x, list) else np.nan).values
+        # Média de cada célula (dim1, dim2). Células sem amostras ficam como NaN
+        valores = obterEstatisticas()['media'][:, :, nomesAmostras.index(metK)]
 
         print(f"eixoX = \n{eixoX}")
         print(f"eixoY = \n{eixoY}")
@@ -804,25 +1201,141 @@ def plotarSuperficie(mob, gw):
         plt.close()
 
     
+##### RENDERIZAÇÃO ######
+# Os gráficos são gerados numa etapa própria, a partir dos arquivos de resultados já gravados em outputPath.
+# Cada tarefa (função de plotagem + argumentos) tem uma assinatura: código da função, opções de estilo e conteúdo
+# dos arquivos de entrada. Só são renderizadas as tarefas cuja assinatura mudou desde a última renderização (arqFiguras).
+def renderizarGraficos(mob, gw):
+    if (not grafSuperf):
+        tarefas = [('plotarGraficos', arquivosMetricas(mob, gw)),
+                   ('plotarGraficosPLR', arquivosMetricas(mob, gw) + arquivosPLR(mob, gw)),
+                   ('protarGraficoST', [f"{outputPath}ST-{dimIdDic['dim1']}-{dim1}-MbltProb{mob}-{gw}Gw.npz" for dim1 in dimDic['dim1']]),
+                   ('plotarSFFinalPorc', [f"{outputPath}{dimIdDic['dim1']}-{dim1}-SFFinal{dim2}-MbltProb{mob}-{gw}Gw.json" for dim1 in dimDic['dim1'] for dim2 in dimDic['dim2']])]
+        if ((not mobility) and (tipoCenario==0)):
+            tarefas.append(('plotarSFFinalporED', [outputPath + devStatus + dim2 + extSaida for dim2 in dimDic['dim2']]))
+    else:
+        tarefas = [('plotarSuperficie', arquivosMetricas(mob, gw))]
+    executarTarefasGraf([(nome, (mob, gw), arquivos) for nome, arquivos in tarefas])
+
+def renderizarGraficosMGP(mob):
+    arquivos = [arq for gw in gwDic.keys() for arq in arquivosMetricas(mob, gw)]
+    executarTarefasGraf([('plotarGraficosMGP', (mob,), arquivos)])
+
+def arquivosMetricas(mob, gw):
+    return [f"{outputPath}Cen{tipoCenario}-{dimIdDic['dim1']}-{ml}-MbltProb{mob}-{gw}Gw.json" for ml in metricasDic.keys()]
+
+def arquivosPLR(mob, gw):
+    return [f"{outputPath}Cen{tipoCenario}-{dimIdDic['dim1']}-{pl}-MbltProb{mob}-{gw}Gw.json" for pl in PLRDic.keys()]
+
+def executarTarefasGraf(tarefas):
+    arqManifesto = outputPath + arqFiguras
+    manifesto = {}
+    if os.path.isfile(arqManifesto):
+        with open(arqManifesto) as arq:
+            manifesto = json.load(arq)
+
+    pendentes = []
+    for nome, args, arquivos in tarefas:
+        chave = f"{nome}{args}"
+        assinatura = obterAssinaturaGraf(nome, arquivos)
+        if manifesto.get(chave) != assinatura:
+            pendentes.append((nome, args, chave, assinatura))
+    print(f"Gráficos a renderizar: {len(pendentes)} de {len(tarefas)} tarefas (as demais não mudaram).")
+    if not pendentes:
+        return
+
+    estado = {nome: globals()[nome] for nome in estadoGraf}
+    with ProcessPoolExecutor(max_workers=min(numJobs, len(pendentes)), initializer=iniciarRenderizador, initargs=(estado,)) as executor:
+        futuros = {executor.submit(renderizarTarefa, nome, args): (chave, assinatura) for nome, args, chave, assinatura in pendentes}
+        for futuro in as_completed(futuros):
+            futuro.result()
+            chave, assinatura = futuros[futuro]
+            manifesto[chave] = assinatura
+
+    with open(arqManifesto, 'w') as arq:
+        json.dump(manifesto, arq, indent=1)
+
+def obterAssinaturaGraf(nome, arquivos):
+    estilo = {'tamFonteGraf': tamFonteGraf, 'nomeFonte': nomeFonte, 'marcadores': marcadores, 'estilos': estilos, 'padroesHachura': padroesHachura,
+              'corPreenc': corPreenc, 'corLinhas': corLinhas, 'legendaAcima': legendaAcima, 'exibirMarc': exibirMarc, 'barraErro': barraErro,
+              'intervaloST': intervaloST, 'areaIC': areaIC, 'trtmntDic': trtmntDic, 'trtmntLblDic': trtmntLblDic, 'metricasDic': metricasDic,
+              'dimDic': dimDic, 'dimIdDic': dimIdDic, 'sideLength': sideLength, 'multiGw': multiGw, 'modoConfirm': modoConfirm}
+    h = hashlib.sha256()
+    h.update(inspect.getsource(globals()[nome]).encode())
+    h.update(json.dumps(estilo, sort_keys=True, default=str).encode())
+    for arquivo in sorted(arquivos):
+        h.update(arquivo.encode())
+        if not os.path.isfile(arquivo):
+            h.update(b'ausente')
+        elif os.path.getsize(arquivo) <= limiteHashGraf:
+            with open(arquivo, 'rb') as arq:
+                h.update(hashlib.file_digest(arq, 'sha256').digest())
+        else:
+            # Arquivos grandes (deviceStatus) entram pelo tamanho e data de modificação, para não serem lidos por inteiro
+            info = os.stat(arquivo)
+            h.update(f"{info.st_size}-{info.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+def iniciarRenderizador(estado):
+    # Com 'spawn' ou 'forkserver', os processos reimportam o módulo e só veem o estado ajustado em main() por aqui
+    globals().update(estado)
+
+def renderizarTarefa(nome, args):
+    # Executada nos processos de renderização: carrega do disco as amostras que a função de plotagem usa
+    if nome in ('plotarGraficos', 'plotarGraficosPLR', 'plotarSuperficie'):
+        carregarDadosMetricasArq(*args)
+        carregarDadosPLRArq(*args)
+    globals()[nome](*args)
+
 ##### ARQUIVOS ######
 # Função para salvar um DF em um arquivo JSON
 def salvarDadosMetricasArq(mob, gw):
     for ml in metricasDic.keys():
-        dfMetricas[ml].to_json(f"{outputPath}Cen{tipoCenario}-{dimIdDic['dim1']}-{ml}-MbltProb{mob}-{gw}Gw.json", orient='records')
+        amostrasParaDf(ml).to_json(f"{outputPath}Cen{tipoCenario}-{dimIdDic['dim1']}-{ml}-MbltProb{mob}-{gw}Gw.json", orient='records')
 
 def salvarDadosPLRArq(mob, gw):
     for pl in PLRDic.keys():
-        dfPLR[pl].to_json(f"{outputPath}Cen{tipoCenario}-{dimIdDic['dim1']}-{pl}-MbltProb{mob}-{gw}Gw.json", orient='records')
+        amostrasParaDf(pl).to_json(f"{outputPath}Cen{tipoCenario}-{dimIdDic['dim1']}-{pl}-MbltProb{mob}-{gw}Gw.json", orient='records')
 
 def carregarDadosMetricasArq(mob, gw):
-    global dfMetricas
+    reiniciarEstruturas()
     for ml in metricasDic.keys():
-        dfMetricas[ml] = pd.read_json(f"{outputPath}Cen{tipoCenario}-{dimIdDic['dim1']}-{ml}-MbltProb{mob}-{gw}Gw.json", orient='records')
+        dfParaAmostras(ml, pd.read_json(f"{outputPath}Cen{tipoCenario}-{dimIdDic['dim1']}-{ml}-MbltProb{mob}-{gw}Gw.json", orient='records'))
 
 def carregarDadosPLRArq(mob, gw):
-    global dfPLR
     for pl in PLRDic.keys():
-        dfPLR[pl] = pd.read_json(f"{outputPath}Cen{tipoCenario}-{dimIdDic['dim1']}-{pl}-MbltProb{mob}-{gw}Gw.json", orient='records')
+        dfParaAmostras(pl, pd.read_json(f"{outputPath}Cen{tipoCenario}-{dimIdDic['dim1']}-{pl}-MbltProb{mob}-{gw}Gw.json", orient='records'))
+
+def carregarDadosST(mob, gw, dim1):
+    # Retorna (horas, média do PDR por hora e dim2). Ciclos anteriores ao acumulador guardavam a ST em JSON (listas por célula)
+    nomeArq = f"{outputPath}ST-{dimIdDic['dim1']}-{dim1}-MbltProb{mob}-{gw}Gw"
+    if os.path.isfile(nomeArq + '.npz'):
+        acum = carregarAcumulador(nomeArq + '.npz')
+        return acum['tempo'], estatisticasAcumulador(acum, areaIC)['media']
+    dfST = pd.read_json(nomeArq + '.json', orient='records')
+    dados = np.array(dfST.iloc[:, 1:].values.tolist(), dtype=float)   # (hora, dim2, rep)
+    return dfST.iloc[:, 0].to_numpy(), calcularEstatisticas(dados[..., np.newaxis], areaIC)['media'][:, :, 0]
+
+def amostrasParaDf(nome):
+    # Formato dos JSONs de resultados: 1a coluna dim1 e uma lista de repetições por célula (None se não houver amostras)
+    k = nomesAmostras.index(nome)
+    df = pd.DataFrame()
+    df[dimIdDic['dim1']] = dimDic['dim1']
+    for j, d in enumerate(dimDic['dim2']):
+        celulas = [amostras[i, j, :, k] for i in range(len(dimDic['dim1']))]
+        df[d] = [c[~np.isnan(c)].tolist() if (~np.isnan(c)).any() else None for c in celulas]
+    return df
+
+def dfParaAmostras(nome, df):
+    global estatisticas
+    k = nomesAmostras.index(nome)
+    for i in range(min(len(df), amostras.shape[0])):
+        for j in range(min(df.shape[1] - 1, amostras.shape[1])):
+            lista = df.iat[i, j + 1]
+            if isinstance(lista, list) and lista:
+                garantirRepeticoes(len(lista))
+                amostras[i, j, :len(lista), k] = lista
+    estatisticas = None
 
 def apagarArqs(path, extensao=None):
     try:
@@ -854,49 +1367,37 @@ def backupData(path):
 ##### MISC ######
 def obterRelatorio(relFinal=False):
     saida = ""
+    est = obterEstatisticas()
+    dif, difPerc = calcularDiferencas(est['media'])
 
     for metK, metV in metricasDic.items():
         if (metK == 'CPSR' and not modoConfirm):
             continue
 
-        dados = dfMetricas[metK].copy()
-        dados = dados.dropna()
-        dim1 = dados.iloc[:, 0]
-        dados = dados.iloc[:, 1:]
-        #print(f"dados = \n{dados}")
-        
-        dfMedia = dados.map(lambda lista: np.mean(lista))        
-        dfDP = dados.map(lambda lista: np.std(lista, ddof=1))
-        
-        # Valor crítico para um intervalo de confiança de 95%
-        z = norm.ppf(areaIC)  # 0.975 para a área de 0.025 em cada cauda
-        # Cálculo do erro do intervalo de confiança
-        erro_IC = (dfDP / np.sqrt(numRep)) * z        
+        k = nomesAmostras.index(metK)
+        validas = ~np.isnan(est['media'][:, :, k]).any(axis=1)   # linhas de dim1 com todas as células preenchidas
+        dim1 = pd.Series(dimDic['dim1'], name=dimIdDic['dim1'])[validas]
+        dfMedia = pd.DataFrame(est['media'][:, :, k], columns=dimDic['dim2'])[validas]
+        dfDP = pd.DataFrame(est['dp'][:, :, k], columns=dimDic['dim2'])[validas]
+        erro_IC = pd.DataFrame(est['erroIC'][:, :, k], columns=dimDic['dim2'])[validas]
         
         saida += ":::::::::::::::::::::::::::::::::::::::::::::::::::::\n"
         saida += f"Resultado para métrica: {metK}.\n"
         saida += "Média: \n"
-        #saida += str(dfMedia) + "\n"
         saida += str(pd.concat([dim1, dfMedia], axis=1)) + "\n"
         saida += "DesvPdr: \n"
-        #saida += str(dfDP) + "\n"
         saida += str(pd.concat([dim1, dfDP], axis=1)) + "\n"
         saida += "Erro IC: \n"
-        #saida += str(erro_IC) + "\n"
         saida += str(pd.concat([dim1, erro_IC], axis=1)) + "\n"
 
         if relFinal:
             for i in range(1, dfMedia.shape[1]):            
-                resultado =      dfMedia.iloc[:, 0] - dfMedia.iloc[:, i]
-                resultadoPerc = (dfMedia.iloc[:, 0] - dfMedia.iloc[:, i])/dfMedia.iloc[:, i] * 100                
-                meanResPer    = resultadoPerc.mean()
-                resultadoPerc = resultadoPerc.astype(str) + '%'
-                resultado = resultado.astype(float)
-                resultadoPerc = resultadoPerc.str.rstrip('%').astype(float)                
+                resultado     = pd.Series(dif[validas, i-1, k], index=dfMedia.index)
+                resultadoPerc = pd.Series(difPerc[validas, i-1, k], index=dfMedia.index)
                 saida += f"\nDiferença de {metK} entre {dfMedia.columns[0]} e {dfMedia.columns[i]}:\n{round(resultado,7)}\n"
                 saida += f"\nDiferença perc.  de {metK} entre {dfMedia.columns[0]} e {dfMedia.columns[i]}:\n{round(resultadoPerc,7)} \n"
                 saida += f"===> Diferença média: {round(resultado.mean(),7)} \n"
-                saida += f"===> Diferença média perc.: {round(meanResPer,7)}% \n"
+                saida += f"===> Diferença média perc.: {round(resultadoPerc.mean(),7)}% \n"
     saida += ":::::::::::::::::::::::::::::::::::::::::::::::::::::\n"
     
     return saida
@@ -924,7 +1425,11 @@ def main():
     parser = argparse.ArgumentParser(description='Run simulations regarding different scenarios')
     ajustarLstCenarios(parser)
 
-    if ( novaSim ):
+    if ( modoTrabalhador ):
+        executarTrabalhador()
+    elif ( modoVerifLote ):
+        sys.exit(0 if verificarLotes() else 1)
+    elif ( novaSim ):
         inicio = time.time()
         executarSim()
         fim = time.time()
@@ -938,18 +1443,13 @@ def main():
         backupData(outputPath) if backupOutputDir else None  # Realiza uma cópia do diretório de saída
     else:                           
         print("Replotando gráficos...")
-        reiniciarEstruturas() 
         for mob in mobDic.keys(): 
             for gw in gwDic.keys():                
-                if (not grafSuperf):
-                    plotarGraficos(mob, gw)
-                    plotarGraficosPLR(mob, gw)
-                    protarGraficoST(mob, gw)
-                    plotarSFFinalPorc(mob, gw)
-                    plotarSFFinalporED(mob, gw) if ((not mobility) and (tipoCenario==0)) else None
-                else:
-                    plotarSuperficie(mob, gw)
+                carregarDadosMetricasArq(mob, gw)
+                carregarDadosPLRArq(mob, gw)
+                renderizarGraficos(mob, gw)
                 gerarRelatorioFinal(mob, gw, "")            
+            renderizarGraficosMGP(mob) if (multiGw and multGWPar) else None
 
 if __name__ == '__main__':
     main()
@@ -23,6 +23,7 @@
 #include "ns3/log.h"
 
 #include <fstream>
+#include <sstream>
 
 namespace ns3
 {
@@ -31,14 +32,42 @@ namespace lorawan
 
 NS_LOG_COMPONENT_DEFINE("LoraHelper");
 
+/// Size of the .npy header. It is fixed so that the record count can be rewritten in place.
+static const std::size_t NPY_HEADER_SIZE = 512;
+
+/**
+ * Append the raw (little-endian) representation of a value to a binary file.
+ *
+ * \param stream The output stream.
+ * \param value The value to write.
+ */
+template <typename T>
+static void
+WriteBinary(std::ofstream& stream, T value)
+{
+    stream.write(reinterpret_cast<const char*>(&value), sizeof(T));
+}
+
 LoraHelper::LoraHelper()
     : m_lastPhyPerformanceUpdate(Seconds(0)),
-      m_lastGlobalPerformanceUpdate(Seconds(0))
+      m_lastGlobalPerformanceUpdate(Seconds(0)),
+      m_binaryOutput(false),
+      m_deviceStatusOnChange(false),
+      m_deviceStatusMinDistance(0)
 {
 }
 
 LoraHelper::~LoraHelper()
 {
+    // Store the final record count in the headers of binary files
+    for (auto& it : m_periodicOutputs)
+    {
+        if (m_binaryOutput)
+        {
+            WriteNpyHeader(it.second);
+        }
+        it.second.stream.close();
+    }
 }
 
 NetDeviceContainer
@@ -166,6 +195,78 @@ LoraHelper::EnableSimulationTimePrinting(Time interval)
     Simulator::Schedule(Seconds(0), &LoraHelper::DoPrintSimulationTime, this, interval);
 }
 
+void
+LoraHelper::SetBinaryOutput(bool binary)
+{
+    NS_LOG_FUNCTION(this << binary);
+
+    NS_ASSERT_MSG(m_periodicOutputs.empty(),
+                  "The output format must be set before periodic printing starts");
+    m_binaryOutput = binary;
+}
+
+void
+LoraHelper::SetDeviceStatusOnChange(bool enable, double minDistance)
+{
+    NS_LOG_FUNCTION(this << enable << minDistance);
+
+    m_deviceStatusOnChange = enable;
+    m_deviceStatusMinDistance = minDistance;
+    m_lastDeviceStatus.clear();
+}
+
+LoraHelper::PeriodicOutput&
+LoraHelper::GetPeriodicOutput(std::string filename, std::string descr)
+{
+    auto it = m_periodicOutputs.find(filename);
+    if (it != m_periodicOutputs.end())
+    {
+        return it->second;
+    }
+
+    PeriodicOutput& output = m_periodicOutputs[filename];
+    output.descr = descr;
+    output.nRecords = 0;
+    if (m_binaryOutput)
+    {
+        output.stream.open(filename.c_str(),
+                           std::ofstream::out | std::ofstream::trunc | std::ofstream::binary);
+        WriteNpyHeader(output);
+    }
+    else
+    {
+        output.stream.open(filename.c_str(), std::ofstream::out | std::ofstream::trunc);
+    }
+    NS_ABORT_MSG_UNLESS(output.stream.is_open(), "Unable to open output file " << filename);
+    return output;
+}
+
+void
+LoraHelper::WriteNpyHeader(PeriodicOutput& output)
+{
+    std::ostringstream dict;
+    dict << "{'descr': [" << output.descr << "], 'fortran_order': False, 'shape': ("
+         << output.nRecords << ",), }";
+    std::string header = dict.str();
+
+    // Magic string (6 bytes), version (2 bytes) and header length (2 bytes) precede the header,
+    // which is padded with spaces and terminated by a newline
+    std::size_t headerLength = NPY_HEADER_SIZE - 10;
+    NS_ASSERT(header.size() < headerLength);
+    header.resize(headerLength - 1, ' ');
+    header += '\n';
+
+    std::streampos current = output.stream.tellp();
+    output.stream.seekp(0);
+    output.stream.write("\x93NUMPY\x01\x00", 8);
+    WriteBinary<uint16_t>(output.stream, headerLength);
+    output.stream.write(header.data(), header.size());
+    if (current > std::streampos(NPY_HEADER_SIZE))
+    {
+        output.stream.seekp(current);
+    }
+}
+
 void
 LoraHelper::EnablePeriodicDeviceStatusPrinting(NodeContainer endDevices,
                                                NodeContainer gateways,
@@ -191,18 +292,11 @@ LoraHelper::DoPrintDeviceStatus(NodeContainer endDevices,
                                 NodeContainer gateways,
                                 std::string filename)
 {
-    const char* c = filename.c_str();
-    std::ofstream outputFile;
-    if (Simulator::Now() == Seconds(0))
-    {
-        // Delete contents of the file as it is opened
-        outputFile.open(c, std::ofstream::out | std::ofstream::trunc);
-    }
-    else
-    {
-        // Only append to the file
-        outputFile.open(c, std::ofstream::out | std::ofstream::app);
-    }
+    PeriodicOutput& output =
+        GetPeriodicOutput(filename,
+                          "('time', '<f8'), ('edId', '<u4'), ('posX', '<f8'), ('posY', '<f8'), "
+                          "('dataRate', '<i4'), ('txPower', '<u4'), ('energy', '<f8')");
+    std::ofstream& outputFile = output.stream;
 
     Time currentTime = Simulator::Now();
     for (auto j = endDevices.Begin(); j != endDevices.End(); ++j)
@@ -218,28 +312,54 @@ LoraHelper::DoPrintDeviceStatus(NodeContainer endDevices,
         int dr = int(mac->GetDataRate());
         double txPower = mac->GetTransmissionPower();
         Vector pos = position->GetPosition();
-        //outputFile << currentTime.GetSeconds() << " " << object->GetId() << " " << pos.x << " "
-        //           << pos.y << " " << dr << " " << unsigned(txPower) << std::endl;
-        outputFile << currentTime.GetSeconds() << " " << object->GetId() << " " << pos.x << " "
-                   << pos.y << " " << dr << " " << unsigned(txPower) << " ";
 
+        if (m_deviceStatusOnChange)
+        {
+            auto last = m_lastDeviceStatus.find(object->GetId());
+            if (last != m_lastDeviceStatus.end() && last->second.dataRate == dr &&
+                last->second.txPower == unsigned(txPower) &&
+                CalculateDistance(last->second.position, pos) <= m_deviceStatusMinDistance)
+            {
+                continue;
+            }
+            m_lastDeviceStatus[object->GetId()] = {dr, unsigned(txPower), pos};
+        }
 
         // @geraldosamento: Energy accumulated per ED
+        bool hasEnergy = false;
+        double energy = 0;
         if (auto esc = object->GetObject<ns3::energy::EnergySourceContainer>())
         {
             auto demc = esc->Get(0)->FindDeviceEnergyModels("ns3::LoraRadioEnergyModel");
             if (demc.GetN())
-            {                
-                outputFile << demc.Get(0)->GetTotalEnergyConsumption() << std::endl;             
+            {
+                hasEnergy = true;
+                energy = demc.Get(0)->GetTotalEnergyConsumption();
             }
         }
-    }
-    
 
+        if (m_binaryOutput)
+        {
+            WriteBinary<double>(outputFile, currentTime.GetSeconds());
+            WriteBinary<uint32_t>(outputFile, object->GetId());
+            WriteBinary<double>(outputFile, pos.x);
+            WriteBinary<double>(outputFile, pos.y);
+            WriteBinary<int32_t>(outputFile, dr);
+            WriteBinary<uint32_t>(outputFile, unsigned(txPower));
+            WriteBinary<double>(outputFile, energy);
+            output.nRecords++;
+            continue;
+        }
 
-    
-
-    outputFile.close();
+        //outputFile << currentTime.GetSeconds() << " " << object->GetId() << " " << pos.x << " "
+        //           << pos.y << " " << dr << " " << unsigned(txPower) << std::endl;
+        outputFile << currentTime.GetSeconds() << " " << object->GetId() << " " << pos.x << " "
+                   << pos.y << " " << dr << " " << unsigned(txPower) << " ";
+        if (hasEnergy)
+        {
+            outputFile << energy << '\n';
+        }
+    }
 }
 
 void
@@ -264,32 +384,39 @@ LoraHelper::DoPrintPhyPerformance(NodeContainer gateways, std::string filename)
 {
     NS_LOG_FUNCTION(this);
 
-    const char* c = filename.c_str();
-    std::ofstream outputFile;
-    if (Simulator::Now() == Seconds(0))
-    {
-        // Delete contents of the file as it is opened
-        outputFile.open(c, std::ofstream::out | std::ofstream::trunc);
-    }
-    else
-    {
-        // Only append to the file
-        outputFile.open(c, std::ofstream::out | std::ofstream::app);
-    }
+    PeriodicOutput& output = GetPeriodicOutput(
+        filename,
+        "('time', '<f8'), ('gwId', '<u4'), ('sent', '<i4'), ('received', '<i4'), "
+        "('interfered', '<i4'), ('noMoreReceivers', '<i4'), ('underSensitivity', '<i4'), "
+        "('lostBecauseTx', '<i4')");
+    std::ofstream& outputFile = output.stream;
 
     for (auto it = gateways.Begin(); it != gateways.End(); ++it)
     {
         int systemId = (*it)->GetId();
+        if (m_binaryOutput)
+        {
+            std::vector<int> packetCounts =
+                m_packetTracker->CountPhyPacketsPerGw(m_lastPhyPerformanceUpdate,
+                                                      Simulator::Now(),
+                                                      systemId);
+            WriteBinary<double>(outputFile, Simulator::Now().GetSeconds());
+            WriteBinary<uint32_t>(outputFile, systemId);
+            for (int count : packetCounts)
+            {
+                WriteBinary<int32_t>(outputFile, count);
+            }
+            output.nRecords++;
+            continue;
+        }
         outputFile << Simulator::Now().GetSeconds() << " " << std::to_string(systemId) << " "
                    << m_packetTracker->PrintPhyPacketsPerGw(m_lastPhyPerformanceUpdate,
                                                             Simulator::Now(),
                                                             systemId)
-                   << std::endl;
+                   << '\n';
     }
 
     m_lastPhyPerformanceUpdate = Simulator::Now();
-
-    outputFile.close();
 }
 
 void
@@ -311,27 +438,35 @@ LoraHelper::DoPrintGlobalPerformance(std::string filename)
 {
     NS_LOG_FUNCTION(this);
 
-    const char* c = filename.c_str();
-    std::ofstream outputFile;
-    if (Simulator::Now() == Seconds(0))
+    PeriodicOutput& output =
+        GetPeriodicOutput(filename,
+                          "('time', '<f8'), ('sent', '<i4'), ('received', '<i4'), ('pdr', '<f8'), "
+                          "('rssi', '<f8'), ('snr', '<f8'), ('delay', '<f8')");
+    std::ofstream& outputFile = output.stream;
+
+    if (m_binaryOutput)
     {
-        // Delete contents of the file as it is opened
-        outputFile.open(c, std::ofstream::out | std::ofstream::trunc);
+        std::vector<double> values =
+            m_packetTracker->ComputeMacPacketsGlobally(m_lastGlobalPerformanceUpdate,
+                                                       Simulator::Now());
+        WriteBinary<double>(outputFile, Simulator::Now().GetSeconds());
+        WriteBinary<int32_t>(outputFile, int32_t(values.at(0)));
+        WriteBinary<int32_t>(outputFile, int32_t(values.at(1)));
+        for (std::size_t i = 2; i < values.size(); ++i)
+        {
+            WriteBinary<double>(outputFile, values.at(i));
+        }
+        output.nRecords++;
     }
     else
     {
-        // Only append to the file
-        outputFile.open(c, std::ofstream::out | std::ofstream::app);
+        outputFile << Simulator::Now().GetSeconds() << " "
+                   << m_packetTracker->CountMacPacketsGlobally(m_lastGlobalPerformanceUpdate,
+                                                               Simulator::Now())
+                   << '\n';
     }
 
-    outputFile << Simulator::Now().GetSeconds() << " "
-               << m_packetTracker->CountMacPacketsGlobally(m_lastGlobalPerformanceUpdate,
-                                                           Simulator::Now())
-               << std::endl;
-
     m_lastGlobalPerformanceUpdate = Simulator::Now();
-
-    outputFile.close();
 }
 
 void
@@ -30,6 +30,8 @@
 #include "ns3/node-container.h"
 
 #include <ctime>
+#include <fstream>
+#include <map>
 
 namespace ns3
 {
@@ -89,6 +91,30 @@ class LoraHelper
      */
     void EnableSimulationTimePrinting(Time interval);
 
+    /**
+     * Select the format of the files written by the periodic printing functions.
+     *
+     * In text mode (the default), each sample is a line of space-separated values. In binary
+     * mode, each file is a NumPy .npy file holding a structured array with one fixed-width record
+     * per sample, so that it can be memory-mapped from Python without any parsing. The field
+     * names and types are stored in the .npy header.
+     *
+     * \param binary Whether to write the binary format.
+     */
+    void SetBinaryOutput(bool binary);
+
+    /**
+     * Only print the status of a device when it changed since it was last printed.
+     *
+     * When enabled, DoPrintDeviceStatus skips a device unless its data rate or transmission power
+     * changed, or it moved by more than minDistance, since its last printed row. The first call
+     * always prints every device. The last row of each device still describes its final state.
+     *
+     * \param enable Whether to enable the on-change mode.
+     * \param minDistance Minimum displacement (m) that triggers a new row.
+     */
+    void SetDeviceStatusOnChange(bool enable, double minDistance);
+
     /**
      * Periodically prints the status of devices in the network to a file.
      *
@@ -183,8 +209,49 @@ class LoraHelper
      */
     void DoPrintSimulationTime(Time interval);
 
+    /**
+     * An output file of the periodic printing functions, kept open for the whole simulation.
+     */
+    struct PeriodicOutput
+    {
+        std::ofstream stream; //!< Buffered output stream
+        std::string descr;    //!< Record layout (NumPy descr), only used in binary mode
+        uint64_t nRecords;    //!< Number of records written, only used in binary mode
+    };
+
+    /**
+     * Get the output file associated to a filename, opening (and truncating) it on first use.
+     *
+     * \param filename The output filename.
+     * \param descr The NumPy descr of the records, written in the header in binary mode.
+     * \return The output file.
+     */
+    PeriodicOutput& GetPeriodicOutput(std::string filename, std::string descr);
+
+    /**
+     * Write (or rewrite, once the number of records is known) the .npy header of a binary file.
+     *
+     * \param output The output file.
+     */
+    void WriteNpyHeader(PeriodicOutput& output);
+
+    /**
+     * The last printed status of a device, used by the on-change mode of DoPrintDeviceStatus.
+     */
+    struct DeviceStatusSample
+    {
+        int dataRate;         //!< Data rate
+        unsigned txPower;     //!< Transmission power
+        Vector position;      //!< Position
+    };
+
     Time m_lastPhyPerformanceUpdate;    //!< Timestamp of the last PHY performance update
     Time m_lastGlobalPerformanceUpdate; //!< Timestamp of the last global performance update
+    bool m_binaryOutput;                //!< Whether periodic printing uses the binary format
+    std::map<std::string, PeriodicOutput> m_periodicOutputs; //!< Open files, mapped by filename
+    bool m_deviceStatusOnChange;       //!< Whether device status is only printed on changes
+    double m_deviceStatusMinDistance;  //!< Displacement (m) that triggers a device status row
+    std::map<uint32_t, DeviceStatusSample> m_lastDeviceStatus; //!< Last printed status, by node id
 };
 
 } // namespace lorawan
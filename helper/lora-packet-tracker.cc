@@ -25,6 +25,7 @@
 #include "ns3/lorawan-mac-header.h"
 #include "ns3/simulator.h"
 
+#include <algorithm>
 #include <fstream>
 #include <iostream>
 
@@ -61,7 +62,21 @@ LoraPacketTracker::MacTransmissionCallback(Ptr<const Packet> packet)
         status.senderId = Simulator::GetContext();
         status.receivedTime = Time::Max();
 
-        m_macPacketTracker.insert(std::pair<Ptr<const Packet>, MacPacketStatus>(packet, status));
+        auto inserted =
+            m_macPacketTracker.insert(std::pair<Ptr<const Packet>, MacPacketStatus>(packet, status));
+        if (inserted.second)
+        {
+            m_macTimeIndex.push_back(inserted.first);
+
+            // Retransmissions reuse the packet: keep it until the end of the process
+            LorawanMacHeader mHdr;
+            packet->Copy()->RemoveHeader(mHdr);
+            if (m_streaming && mHdr.IsConfirmed())
+            {
+                m_openRetransmissions.insert(packet);
+            }
+        }
+        EvictFinalized();
     }
 }
 
@@ -75,6 +90,21 @@ LoraPacketTracker::RequiredTransmissionsCallback(uint8_t reqTx,
     NS_LOG_DEBUG("Packet: " << packet << "ReqTx " << unsigned(reqTx) << ", succ: " << success
                             << ", firstAttempt: " << firstAttempt.GetSeconds());
 
+    // The outcome of a finished retransmission process is final: fold it right away. Processes
+    // without a packet (a downlink received after an unconfirmed uplink) share the null key and
+    // are kept in the map, as in the default mode
+    if (m_streaming && packet)
+    {
+        LoraTag tag;
+        packet->PeekPacketTag(tag);
+        Fold(firstAttempt, tag.GetSpreadingFactor(), [success](TrackerAggregate& aggregate) {
+            aggregate.reTxSent++;
+            aggregate.reTxSuccessful += success;
+        });
+        m_openRetransmissions.erase(packet);
+        return;
+    }
+
     RetransmissionStatus entry;
     entry.firstAttempt = firstAttempt;
     entry.finishTime = Simulator::Now();
@@ -99,6 +129,10 @@ LoraPacketTracker::MacGwReceptionCallback(Ptr<const Packet> packet)
             (*it).second.receptionTimes.insert(
                 std::pair<int, Time>(Simulator::GetContext(), Simulator::Now()));
         }
+        else if (m_streaming)
+        {
+            NS_LOG_WARN("Packet received after being folded: increase the streaming horizon");
+        }
         else
         {
             NS_ABORT_MSG("Packet not found in tracker");
@@ -122,7 +156,13 @@ LoraPacketTracker::TransmissionCallback(Ptr<const Packet> packet, uint32_t edId)
         status.sendTime = Simulator::Now();
         status.senderId = edId;
 
-        m_packetTracker.insert(std::pair<Ptr<const Packet>, PacketStatus>(packet, status));
+        auto inserted =
+            m_packetTracker.insert(std::pair<Ptr<const Packet>, PacketStatus>(packet, status));
+        if (inserted.second)
+        {
+            m_phyTimeIndex.push_back(inserted.first);
+        }
+        EvictFinalized();
     }
 }
 
@@ -134,8 +174,7 @@ LoraPacketTracker::PacketReceptionCallback(Ptr<const Packet> packet, uint32_t gw
         // Remove the successfully received packet from the list of sent ones
         NS_LOG_INFO("PHY packet " << packet << " was successfully received at gateway " << gwId);
 
-        auto it = m_packetTracker.find(packet);
-        (*it).second.outcomes.insert(std::pair<int, enum PhyPacketOutcome>(gwId, RECEIVED));
+        SetPhyOutcome(packet, gwId, RECEIVED);
     }
 }
 
@@ -146,8 +185,7 @@ LoraPacketTracker::InterferenceCallback(Ptr<const Packet> packet, uint32_t gwId)
     {
         NS_LOG_INFO("PHY packet " << packet << " was interfered at gateway " << gwId);
 
-        auto it = m_packetTracker.find(packet);
-        (*it).second.outcomes.insert(std::pair<int, enum PhyPacketOutcome>(gwId, INTERFERED));
+        SetPhyOutcome(packet, gwId, INTERFERED);
     }
 }
 
@@ -158,9 +196,7 @@ LoraPacketTracker::NoMoreReceiversCallback(Ptr<const Packet> packet, uint32_t gw
     {
         NS_LOG_INFO("PHY packet " << packet << " was lost because no more receivers at gateway "
                                   << gwId);
-        auto it = m_packetTracker.find(packet);
-        (*it).second.outcomes.insert(
-            std::pair<int, enum PhyPacketOutcome>(gwId, NO_MORE_RECEIVERS));
+        SetPhyOutcome(packet, gwId, NO_MORE_RECEIVERS);
     }
 }
 
@@ -172,9 +208,7 @@ LoraPacketTracker::UnderSensitivityCallback(Ptr<const Packet> packet, uint32_t g
         NS_LOG_INFO("PHY packet " << packet << " was lost because under sensitivity at gateway "
                                   << gwId);
 
-        auto it = m_packetTracker.find(packet);
-        (*it).second.outcomes.insert(
-            std::pair<int, enum PhyPacketOutcome>(gwId, UNDER_SENSITIVITY));
+        SetPhyOutcome(packet, gwId, UNDER_SENSITIVITY);
     }
 }
 
@@ -188,11 +222,25 @@ LoraPacketTracker::LostBecauseTxCallback(Ptr<const Packet> packet, uint32_t gwId
                           << " was lost because of concurrent downlink transmission at gateway "
                           << gwId);
 
-        auto it = m_packetTracker.find(packet);
-        (*it).second.outcomes.insert(std::pair<int, enum PhyPacketOutcome>(gwId, LOST_BECAUSE_TX));
+        SetPhyOutcome(packet, gwId, LOST_BECAUSE_TX);
     }
 }
 
+void
+LoraPacketTracker::SetPhyOutcome(Ptr<const Packet> packet,
+                                 uint32_t gwId,
+                                 enum PhyPacketOutcome outcome)
+{
+    auto it = m_packetTracker.find(packet);
+    if (it == m_packetTracker.end())
+    {
+        NS_ABORT_MSG_UNLESS(m_streaming, "Packet not found in tracker");
+        NS_LOG_WARN("Packet outcome set after being folded: increase the streaming horizon");
+        return;
+    }
+    (*it).second.outcomes.insert(std::pair<int, enum PhyPacketOutcome>(gwId, outcome));
+}
+
 bool
 LoraPacketTracker::IsUplink(Ptr<const Packet> packet)
 {
@@ -208,6 +256,19 @@ LoraPacketTracker::IsUplink(Ptr<const Packet> packet)
 // Counting Functions //
 ////////////////////////
 
+template <typename Index>
+std::pair<typename Index::const_iterator, typename Index::const_iterator>
+LoraPacketTracker::FindTimeWindow(const Index& index, Time startTime, Time stopTime)
+{
+    auto first = std::partition_point(index.begin(), index.end(), [startTime](const auto& entry) {
+        return (*entry).second.sendTime < startTime;
+    });
+    auto last = std::partition_point(first, index.end(), [stopTime](const auto& entry) {
+        return (*entry).second.sendTime <= stopTime;
+    });
+    return {first, last};
+}
+
 std::vector<int>
 LoraPacketTracker::CountPhyPacketsPerGw(Time startTime, Time stopTime, int gwId)
 {
@@ -217,44 +278,58 @@ LoraPacketTracker::CountPhyPacketsPerGw(Time startTime, Time stopTime, int gwId)
 
     std::vector<int> packetCounts(6, 0);
 
-    for (auto itPhy = m_packetTracker.begin(); itPhy != m_packetTracker.end(); ++itPhy)
+    ForEachFolded(startTime,
+                  stopTime,
+                  m_foldedUpTo,
+                  [&packetCounts, gwId](const TrackerAggregate& aggregate) {
+                      packetCounts.at(0) += aggregate.phySent;
+                      auto it = aggregate.phyOutcomes.find(gwId);
+                      if (it != aggregate.phyOutcomes.end())
+                      {
+                          for (int i = 0; i < UNSET; ++i)
+                          {
+                              packetCounts.at(i + 1) += (*it).second.at(i);
+                          }
+                      }
+                  });
+
+    auto window = FindTimeWindow(m_phyTimeIndex, startTime, stopTime);
+    for (auto itIndex = window.first; itIndex != window.second; ++itIndex)
     {
-        if ((*itPhy).second.sendTime >= startTime && (*itPhy).second.sendTime <= stopTime)
-        {
-            packetCounts.at(0)++;
+        auto itPhy = *itIndex;
+        packetCounts.at(0)++;
 
-            NS_LOG_DEBUG("Dealing with packet " << (*itPhy).second.packet);
-            NS_LOG_DEBUG("This packet was received by " << (*itPhy).second.outcomes.size()
-                                                        << " gateways");
+        NS_LOG_DEBUG("Dealing with packet " << (*itPhy).second.packet);
+        NS_LOG_DEBUG("This packet was received by " << (*itPhy).second.outcomes.size()
+                                                    << " gateways");
 
-            if ((*itPhy).second.outcomes.count(gwId) > 0)
+        if ((*itPhy).second.outcomes.count(gwId) > 0)
+        {
+            switch ((*itPhy).second.outcomes.at(gwId))
             {
-                switch ((*itPhy).second.outcomes.at(gwId))
-                {
-                case RECEIVED: {
-                    packetCounts.at(1)++;
-                    break;
-                }
-                case INTERFERED: {
-                    packetCounts.at(2)++;
-                    break;
-                }
-                case NO_MORE_RECEIVERS: {
-                    packetCounts.at(3)++;
-                    break;
-                }
-                case UNDER_SENSITIVITY: {
-                    packetCounts.at(4)++;
-                    break;
-                }
-                case LOST_BECAUSE_TX: {
-                    packetCounts.at(5)++;
-                    break;
-                }
-                case UNSET: {
-                    break;
-                }
-                }
+            case RECEIVED: {
+                packetCounts.at(1)++;
+                break;
+            }
+            case INTERFERED: {
+                packetCounts.at(2)++;
+                break;
+            }
+            case NO_MORE_RECEIVERS: {
+                packetCounts.at(3)++;
+                break;
+            }
+            case UNDER_SENSITIVITY: {
+                packetCounts.at(4)++;
+                break;
+            }
+            case LOST_BECAUSE_TX: {
+                packetCounts.at(5)++;
+                break;
+            }
+            case UNSET: {
+                break;
+            }
             }
         }
     }
@@ -265,53 +340,7 @@ LoraPacketTracker::CountPhyPacketsPerGw(Time startTime, Time stopTime, int gwId)
 std::string
 LoraPacketTracker::PrintPhyPacketsPerGw(Time startTime, Time stopTime, int gwId)
 {
-    // Vector packetCounts will contain - for the interval given in the input of
-    // the function, the following fields: totPacketsSent receivedPackets
-    // interferedPackets noMoreGwPackets underSensitivityPackets lostBecauseTxPackets
-
-    std::vector<int> packetCounts(6, 0);
-
-    for (auto itPhy = m_packetTracker.begin(); itPhy != m_packetTracker.end(); ++itPhy)
-    {
-        if ((*itPhy).second.sendTime >= startTime && (*itPhy).second.sendTime <= stopTime)
-        {
-            packetCounts.at(0)++;
-
-            NS_LOG_DEBUG("Dealing with packet " << (*itPhy).second.packet);
-            NS_LOG_DEBUG("This packet was received by " << (*itPhy).second.outcomes.size()
-                                                        << " gateways");
-
-            if ((*itPhy).second.outcomes.count(gwId) > 0)
-            {
-                switch ((*itPhy).second.outcomes.at(gwId))
-                {
-                case RECEIVED: {
-                    packetCounts.at(1)++;
-                    break;
-                }
-                case INTERFERED: {
-                    packetCounts.at(2)++;
-                    break;
-                }
-                case NO_MORE_RECEIVERS: {
-                    packetCounts.at(3)++;
-                    break;
-                }
-                case UNDER_SENSITIVITY: {
-                    packetCounts.at(4)++;
-                    break;
-                }
-                case LOST_BECAUSE_TX: {
-                    packetCounts.at(5)++;
-                    break;
-                }
-                case UNSET: {
-                    break;
-                }
-                }
-            }
-        }
-    }
+    std::vector<int> packetCounts = CountPhyPacketsPerGw(startTime, stopTime, gwId);
 
     std::string output("");
     for (int i = 0; i < 6; ++i)
@@ -353,9 +382,21 @@ LoraPacketTracker::RxPowerToSNR(double transmissionPower) const
     return transmissionPower + 174 - 10 * log10(B) - NF;
 }
 
-// By @thiagoallisson90
 std::string
-LoraPacketTracker::CountMacPacketsGlobally (Time startTime, Time stopTime)
+LoraPacketTracker::CountMacPacketsGlobally(Time startTime, Time stopTime)
+{
+    NS_LOG_FUNCTION(this << startTime << stopTime);
+
+    std::vector<double> values = ComputeMacPacketsGlobally(startTime, stopTime);
+
+    return std::to_string(int(values.at(0))) + " " + std::to_string(int(values.at(1))) + " " +
+           std::to_string(values.at(2)) + " " + std::to_string(values.at(3)) + " " +
+           std::to_string(values.at(4)) + " " + std::to_string(values.at(5));
+}
+
+// By @thiagoallisson90
+std::vector<double>
+LoraPacketTracker::ComputeMacPacketsGlobally (Time startTime, Time stopTime)
   {
     NS_LOG_FUNCTION (this << startTime << stopTime);
 
@@ -365,41 +406,55 @@ LoraPacketTracker::CountMacPacketsGlobally (Time startTime, Time stopTime)
     double snrRec = 0;
     double delay = 0;
 
-       
-    for (auto it = m_macPacketTracker.begin ();
-         it != m_macPacketTracker.end ();
-         ++it)
+    // Packets already folded (streaming mode)
+    int64_t foldedDelay = 0;
+    ForEachFolded(startTime, stopTime, m_foldedUpTo, [&](const TrackerAggregate& aggregate) {
+        sent += aggregate.macSent;
+        received += aggregate.macReceived;
+        rssiRec += aggregate.rssiSum;
+        snrRec += aggregate.snrSum;
+        foldedDelay += aggregate.delaySum;
+    });
+    delay += foldedDelay;
+
+    // Visit the packets of the window in the key order of m_macPacketTracker, as a full scan of
+    // the map would, so that the floating-point sums below are bit-identical
+    auto window = FindTimeWindow(m_macTimeIndex, startTime, stopTime);
+    std::vector<MacPacketData::iterator> packets(window.first, window.second);
+    auto keyComp = m_macPacketTracker.key_comp();
+    std::sort(packets.begin(), packets.end(), [&keyComp](const auto& a, const auto& b) {
+        return keyComp((*a).first, (*b).first);
+    });
+
+    for (auto it : packets)
       {
-        if ((*it).second.sendTime >= startTime && (*it).second.sendTime <= stopTime)
-          {
-            sent++;
+        sent++;
 
-            if ((*it).second.receptionTimes.size ())
+        if ((*it).second.receptionTimes.size ())
+          {
+            LoraTag tag;
+            (*it).first->PeekPacketTag (tag);
+            double rssi = tag.GetReceivePower ();
+            double snr = RxPowerToSNR (rssi);
+            double sendTime = (*it).second.sendTime.GetNanoSeconds ();
+
+            received++;
+            rssiRec += rssi;
+            snrRec += snr;    
+            
+            double useInterval = -1;
+            auto itRec = (*it).second.receptionTimes.begin ();
+            while (itRec != (*it).second.receptionTimes.end ())                
               {
-                LoraTag tag;
-                (*it).first->PeekPacketTag (tag);
-                double rssi = tag.GetReceivePower ();
-                double snr = RxPowerToSNR (rssi);
-                double sendTime = (*it).second.sendTime.GetNanoSeconds ();
-
-                received++;
-                rssiRec += rssi;
-                snrRec += snr;    
+                double recTime = (*itRec).second.GetNanoSeconds ();
                 
-                double useInterval = -1;
-                auto itRec = (*it).second.receptionTimes.begin ();
-                while (itRec != (*it).second.receptionTimes.end ())                
-                  {
-                    double recTime = (*itRec).second.GetNanoSeconds ();
-                    
-                    double interval = recTime - sendTime;
-                    if (useInterval == -1 or interval < useInterval)
-                      useInterval = interval;
-
-                    ++itRec;
-                  }
-                delay += useInterval;
+                double interval = recTime - sendTime;
+                if (useInterval == -1 or interval < useInterval)
+                  useInterval = interval;
+
+                ++itRec;
               }
+            delay += useInterval;
           }
       }
     
@@ -410,8 +465,7 @@ LoraPacketTracker::CountMacPacketsGlobally (Time startTime, Time stopTime)
     if (sent > 0 && received > 0)
       pdr = (double) received / sent;
 
-    return std::to_string (sent) + " " + std::to_string (received) + " " + std::to_string(pdr) + " "
-           + std::to_string (rssiRec) + " " + std::to_string (snrRec) + " " + std::to_string (delay);
+    return {double (sent), double (received), pdr, rssiRec, snrRec, delay};
 }
 
 std::string
@@ -421,6 +475,11 @@ LoraPacketTracker::CountMacPacketsGloballyCpsr(Time startTime, Time stopTime)
 
     int sent = 0;
     int received = 0;
+    // Retransmission processes are folded as soon as they end (streaming mode)
+    ForEachFolded(startTime, stopTime, Time::Max(), [&](const TrackerAggregate& aggregate) {
+        sent += aggregate.reTxSent;
+        received += aggregate.reTxSuccessful;
+    });
     for (auto it = m_reTransmissionTracker.begin(); it != m_reTransmissionTracker.end(); ++it)
     {
         if ((*it).second.firstAttempt >= startTime && (*it).second.firstAttempt <= stopTime)
@@ -443,5 +502,221 @@ LoraPacketTracker::CountMacPacketsGloballyCpsr(Time startTime, Time stopTime)
     return std::to_string(sent) + " " + std::to_string(received) + " " + std::to_string(cpsr);
 }
 
+//////////////////////
+// Streaming mode   //
+//////////////////////
+
+/**
+ * Write a record of the binary log of folded packets (see LoraPacketTracker::EnableStreaming).
+ *
+ * \param log The log stream.
+ * \param kind 0 for PHY records, 1 for MAC records.
+ * \param sf Spreading factor of the packet.
+ * \param outcome PhyPacketOutcome (PHY) or received flag (MAC).
+ * \param senderId Node id of the sender.
+ * \param gwId Node id of the gateway (PHY).
+ * \param time Send time (s).
+ * \param rssi RSSI (dBm) of received MAC packets.
+ * \param delay Delay (s) of received MAC packets.
+ */
+static void
+WriteSpillRecord(std::ofstream& log,
+                 uint8_t kind,
+                 uint8_t sf,
+                 uint8_t outcome,
+                 uint32_t senderId,
+                 uint32_t gwId,
+                 double time,
+                 double rssi,
+                 double delay)
+{
+    uint8_t pad = 0;
+    log.write(reinterpret_cast<const char*>(&kind), sizeof(kind));
+    log.write(reinterpret_cast<const char*>(&sf), sizeof(sf));
+    log.write(reinterpret_cast<const char*>(&outcome), sizeof(outcome));
+    log.write(reinterpret_cast<const char*>(&pad), sizeof(pad));
+    log.write(reinterpret_cast<const char*>(&senderId), sizeof(senderId));
+    log.write(reinterpret_cast<const char*>(&gwId), sizeof(gwId));
+    log.write(reinterpret_cast<const char*>(&time), sizeof(time));
+    log.write(reinterpret_cast<const char*>(&rssi), sizeof(rssi));
+    log.write(reinterpret_cast<const char*>(&delay), sizeof(delay));
+}
+
+void
+LoraPacketTracker::EnableStreaming(Time interval, Time horizon, std::string spillFilename)
+{
+    NS_LOG_FUNCTION(this << interval << horizon << spillFilename);
+
+    NS_ABORT_MSG_IF(!m_packetTracker.empty() || !m_macPacketTracker.empty() ||
+                        !m_reTransmissionTracker.empty(),
+                    "The streaming mode must be enabled before any packet is tracked");
+    NS_ABORT_MSG_UNLESS(interval.IsStrictlyPositive(), "The aggregation interval must be positive");
+
+    m_streaming = true;
+    m_interval = interval;
+    m_horizon = horizon;
+    if (!spillFilename.empty())
+    {
+        m_spillLog.open(spillFilename, std::ios::binary | std::ios::trunc);
+        NS_ABORT_MSG_UNLESS(m_spillLog.is_open(), "Could not open " << spillFilename);
+    }
+}
+
+void
+LoraPacketTracker::EvictFinalized()
+{
+    if (!m_streaming)
+    {
+        return;
+    }
+
+    Time limit = Simulator::Now() - m_horizon;
+
+    while (!m_phyTimeIndex.empty() && (*m_phyTimeIndex.front()).second.sendTime < limit &&
+           !m_openRetransmissions.count((*m_phyTimeIndex.front()).first))
+    {
+        auto it = m_phyTimeIndex.front();
+        const PacketStatus& status = (*it).second;
+        LoraTag tag;
+        status.packet->PeekPacketTag(tag);
+        uint8_t sf = tag.GetSpreadingFactor();
+
+        Fold(status.sendTime, sf, [&status](TrackerAggregate& aggregate) {
+            aggregate.phySent++;
+            for (const auto& [gwId, outcome] : status.outcomes)
+            {
+                if (outcome != UNSET)
+                {
+                    aggregate.phyOutcomes[gwId].at(outcome)++;
+                }
+            }
+        });
+
+        if (m_spillLog.is_open())
+        {
+            if (status.outcomes.empty())
+            {
+                WriteSpillRecord(m_spillLog, 0, sf, UNSET, status.senderId, UINT32_MAX,
+                                 status.sendTime.GetSeconds(), 0, 0);
+            }
+            for (const auto& [gwId, outcome] : status.outcomes)
+            {
+                WriteSpillRecord(m_spillLog, 0, sf, outcome, status.senderId, gwId,
+                                 status.sendTime.GetSeconds(), 0, 0);
+            }
+        }
+
+        m_foldedUpTo = std::max(m_foldedUpTo, status.sendTime);
+        m_packetTracker.erase(it);
+        m_phyTimeIndex.pop_front();
+    }
+
+    while (!m_macTimeIndex.empty() && (*m_macTimeIndex.front()).second.sendTime < limit &&
+           !m_openRetransmissions.count((*m_macTimeIndex.front()).first))
+    {
+        auto it = m_macTimeIndex.front();
+        const MacPacketStatus& status = (*it).second;
+        LoraTag tag;
+        status.packet->PeekPacketTag(tag);
+        uint8_t sf = tag.GetSpreadingFactor();
+        bool received = !status.receptionTimes.empty();
+        double rssi = tag.GetReceivePower();
+        int64_t delay = 0; // Delay to the earliest reception, in ns as in ComputeMacPacketsGlobally
+        if (received)
+        {
+            delay = INT64_MAX;
+            for (const auto& [gwId, receptionTime] : status.receptionTimes)
+            {
+                delay = std::min(delay,
+                                 receptionTime.GetNanoSeconds() - status.sendTime.GetNanoSeconds());
+            }
+        }
+
+        Fold(status.sendTime, sf, [this, received, rssi, delay](TrackerAggregate& aggregate) {
+            aggregate.macSent++;
+            if (received)
+            {
+                aggregate.macReceived++;
+                aggregate.rssiSum += rssi;
+                aggregate.snrSum += RxPowerToSNR(rssi);
+                aggregate.delaySum += delay;
+            }
+        });
+
+        if (m_spillLog.is_open())
+        {
+            WriteSpillRecord(m_spillLog, 1, sf, received, status.senderId, UINT32_MAX,
+                             status.sendTime.GetSeconds(), received ? rssi : 0,
+                             received ? delay / 1e9 : 0);
+        }
+
+        m_foldedUpTo = std::max(m_foldedUpTo, status.sendTime);
+        m_macPacketTracker.erase(it);
+        m_macTimeIndex.pop_front();
+    }
+}
+
+void
+LoraPacketTracker::Fold(Time time, uint8_t sf, std::function<void(TrackerAggregate&)> update)
+{
+    int64_t step = m_interval.GetTimeStep();
+    TrackerBucket& bucket = m_buckets[{time.GetTimeStep() / step, sf}];
+    update(bucket.all);
+    if (time.GetTimeStep() % step == 0)
+    {
+        if (!bucket.atStart)
+        {
+            bucket.atStart = std::make_unique<TrackerAggregate>();
+        }
+        update(*bucket.atStart);
+    }
+}
+
+void
+LoraPacketTracker::ForEachFolded(Time startTime,
+                                 Time stopTime,
+                                 Time foldedUpTo,
+                                 std::function<void(const TrackerAggregate&)> visit) const
+{
+    if (m_buckets.empty())
+    {
+        return;
+    }
+
+    int64_t step = m_interval.GetTimeStep();
+    int64_t start = startTime.GetTimeStep();
+    int64_t stop = stopTime.GetTimeStep();
+    NS_ABORT_MSG_IF(start % step != 0 && startTime <= foldedUpTo,
+                    "In streaming mode, the start of the window ("
+                        << startTime << ") must be a multiple of the aggregation interval");
+    NS_ABORT_MSG_IF(stop % step != 0 && stopTime < foldedUpTo,
+                    "In streaming mode, the end of the window ("
+                        << stopTime << ") must be a multiple of the aggregation interval");
+
+    // Intervals entirely inside the window...
+    int64_t first = (start + step - 1) / step;
+    int64_t end = (stop % step == 0) ? stop / step : stop / step + 1;
+    for (auto it = m_buckets.lower_bound({first, 0});
+         it != m_buckets.end() && (*it).first.first < end;
+         ++it)
+    {
+        visit((*it).second.all);
+    }
+
+    // ...and, since the window is inclusive, the packets sent exactly at its end
+    if (stop % step == 0 && stop >= start)
+    {
+        for (auto it = m_buckets.lower_bound({stop / step, 0});
+             it != m_buckets.end() && (*it).first.first == stop / step;
+             ++it)
+        {
+            if ((*it).second.atStart)
+            {
+                visit(*(*it).second.atStart);
+            }
+        }
+    }
+}
+
 } // namespace lorawan
 } // namespace ns3
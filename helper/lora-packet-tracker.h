@@ -23,8 +23,15 @@
 #include "ns3/nstime.h"
 #include "ns3/packet.h"
 
+#include <array>
+#include <deque>
+#include <fstream>
+#include <functional>
 #include <map>
+#include <memory>
+#include <set>
 #include <string>
+#include <vector>
 
 namespace ns3
 {
@@ -90,6 +97,41 @@ typedef std::map<Ptr<const Packet>, MacPacketStatus> MacPacketData;
 typedef std::map<Ptr<const Packet>, PacketStatus> PhyPacketData;
 typedef std::map<Ptr<const Packet>, RetransmissionStatus> RetransmissionData;
 
+typedef std::deque<PhyPacketData::iterator> PhyPacketTimeIndex; //!< PHY entries in send-time order
+typedef std::deque<MacPacketData::iterator> MacPacketTimeIndex; //!< MAC entries in send-time order
+
+/**
+ * \ingroup lorawan
+ *
+ * Running totals of the packets folded by a LoraPacketTracker in streaming mode, for one
+ * aggregation interval and spreading factor.
+ */
+struct TrackerAggregate
+{
+    uint32_t phySent = 0; //!< Uplink packets sent over the radio medium
+    std::map<int, std::array<uint32_t, UNSET>> phyOutcomes; //!< Count of each PhyPacketOutcome
+                                                            //!< (but UNSET), by gateway's node id
+    uint32_t macSent = 0;        //!< MAC uplink packets sent
+    uint32_t macReceived = 0;    //!< MAC uplink packets received by at least one gateway
+    double rssiSum = 0;          //!< Sum of the RSSI (dBm) of the received MAC packets
+    double snrSum = 0;           //!< Sum of the SNR (dB) of the received MAC packets
+    int64_t delaySum = 0;        //!< Sum of the delays (ns) of the received MAC packets
+    uint32_t reTxSent = 0;       //!< Finished retransmission processes
+    uint32_t reTxSuccessful = 0; //!< Successful retransmission processes
+};
+
+/**
+ * \ingroup lorawan
+ *
+ * Aggregates of one interval of a LoraPacketTracker in streaming mode.
+ */
+struct TrackerBucket
+{
+    TrackerAggregate all; //!< All packets sent in the interval
+    std::unique_ptr<TrackerAggregate> atStart; //!< Subset sent exactly at the start of the interval,
+                                               //!< which also belongs to a query window ending there
+};
+
 /**
  * \ingroup lorawan
  *
@@ -270,6 +312,13 @@ class LoraPacketTracker
      * number of packets that were received by at least one gateway.
      */
     std::string CountMacPacketsGlobally(Time startTime, Time stopTime);
+
+    /**
+     * \copydoc ns3::lorawan::LoraPacketTracker::CountMacPacketsGlobally
+     * \return A vector comprised of the following fields: [sent, received, pdr, avgRssi, avgSnr,
+     * avgDelay], i.e., the same values formatted by CountMacPacketsGlobally.
+     */
+    std::vector<double> ComputeMacPacketsGlobally(Time startTime, Time stopTime);
     
     /**
      * In a time interval, count packets to evaluate the performance at MAC level of the whole
@@ -284,10 +333,104 @@ class LoraPacketTracker
      */
     std::string CountMacPacketsGloballyCpsr(Time startTime, Time stopTime);
 
+    /**
+     * Enable the bounded-memory streaming mode.
+     *
+     * Packets whose outcome can no longer change, i.e., sent more than a horizon ago, are folded
+     * into per-interval and per-SF aggregates and evicted from the packet maps, releasing the
+     * references to the Packet objects. Packets of a confirmed retransmission process, which reuse
+     * the same Packet object, are only folded once the process ends (and so are the ones sent
+     * after them). Retransmission processes are folded as soon as they end.
+     * Counting functions keep returning exact counts, provided that the bounds of the queried
+     * window are multiples of the aggregation interval (or more recent than the evicted packets).
+     * RSSI, SNR and delay averages only differ from the ones of the default mode by the rounding
+     * of the floating-point sums.
+     *
+     * \remark Must be called before any packet is tracked.
+     *
+     * \param interval Aggregation interval (e.g., the greatest common divisor of the periods of the
+     * performance printing and of the simulation time).
+     * \param horizon Age after which a packet is folded. It must exceed the longest time on air.
+     * \param spillFilename If not empty, binary log where every folded packet is also written.
+     * Each record is packed (36 bytes) as the numpy dtype [('kind', 'u1'), ('sf', 'u1'),
+     * ('outcome', 'u1'), ('pad', 'u1'), ('senderId', '<u4'), ('gwId', '<u4'), ('time', '<f8'),
+     * ('rssi', '<f8'), ('delay', '<f8')]. PHY records (kind 0) have one row per gateway outcome
+     * (gwId 0xFFFFFFFF and outcome UNSET if there is none); MAC records (kind 1) use outcome as the
+     * received flag and carry the RSSI (dBm) and delay (s) of received packets.
+     */
+    void EnableStreaming(Time interval, Time horizon = Seconds(30), std::string spillFilename = "");
+
   private:
+    /**
+     * Record the reception outcome of a PHY packet at a gateway. The first outcome is kept.
+     *
+     * \param packet The packet.
+     * \param gwId Node id of the gateway.
+     * \param outcome The reception outcome.
+     */
+    void SetPhyOutcome(Ptr<const Packet> packet, uint32_t gwId, enum PhyPacketOutcome outcome);
+
+    /**
+     * Fold and evict (streaming mode) the packets sent before the horizon.
+     */
+    void EvictFinalized();
+
+    /**
+     * Apply an update to the aggregate of the interval of a timestamp (and to its atStart subset
+     * if the timestamp is exactly at the start of the interval).
+     *
+     * \param time The timestamp.
+     * \param sf The spreading factor of the packet.
+     * \param update The update to be applied.
+     */
+    void Fold(Time time, uint8_t sf, std::function<void(TrackerAggregate&)> update);
+
+    /**
+     * Visit the folded aggregates of the packets sent in [startTime, stopTime].
+     *
+     * \param startTime Timestamp of the start of the measurement.
+     * \param stopTime Timestamp of the end of the measurement.
+     * \param foldedUpTo Send time of the most recent folded packet of the quantity being counted.
+     * \param visit Function called on each aggregate in the window.
+     */
+    void ForEachFolded(Time startTime,
+                       Time stopTime,
+                       Time foldedUpTo,
+                       std::function<void(const TrackerAggregate&)> visit) const;
+
+    /**
+     * Find the entries of a time index whose send time falls in [startTime, stopTime].
+     *
+     * Entries are appended to the index as packets are sent, i.e., in non-decreasing send time,
+     * so the window is found with two binary searches.
+     *
+     * \param index The time index to be searched.
+     * \param startTime Timestamp of the start of the window.
+     * \param stopTime Timestamp of the end of the window.
+     * 
+eturn The [first, last) range of index entries in the window.
+     */
+    template <typename Index>
+    static std::pair<typename Index::const_iterator, typename Index::const_iterator> FindTimeWindow(
+        const Index& index,
+        Time startTime,
+        Time stopTime);
+
     PhyPacketData m_packetTracker;              //!< Packet map of PHY layer metrics
     MacPacketData m_macPacketTracker;           //!< Packet map of MAC layer metrics
     RetransmissionData m_reTransmissionTracker; //!< Packet map of retransmission process metrics
+    PhyPacketTimeIndex m_phyTimeIndex; //!< m_packetTracker entries ordered by send time
+    MacPacketTimeIndex m_macTimeIndex; //!< m_macPacketTracker entries ordered by send time
+
+    bool m_streaming = false; //!< Whether the streaming mode is enabled
+    Time m_interval;          //!< Aggregation interval of the streaming mode
+    Time m_horizon;           //!< Age after which packets are folded in streaming mode
+    Time m_foldedUpTo = Time(-1); //!< Send time of the most recent folded PHY/MAC packet
+    std::map<std::pair<int64_t, uint8_t>, TrackerBucket>
+        m_buckets;             //!< Folded aggregates, by interval index and SF
+    std::ofstream m_spillLog;  //!< Binary log of folded packets (optional)
+    std::set<Ptr<const Packet>>
+        m_openRetransmissions; //!< Confirmed packets whose retransmission process is running
 };
 } // namespace lorawan
 } // namespace ns3
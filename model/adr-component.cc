@@ -64,7 +64,7 @@ AdrComponent::GetTypeId()
                           "Number of packets to use for averaging",
                           IntegerValue(4),
                           MakeIntegerAccessor(&AdrComponent::historyRange),
-                          MakeIntegerChecker<int>(0, 100))
+                          MakeIntegerChecker<int>(0, static_cast<int>(EndDeviceStatus::historyCapacity)))
             .AddAttribute("ChangeTransmissionPower",
                           "Whether to toggle the transmission power or not",
                           BooleanValue(true),
@@ -107,10 +107,10 @@ AdrComponent::BeforeSendingReply(Ptr<EndDeviceStatus> status, Ptr<NetworkStatus>
     // Execute the Adaptive Data Rate (ADR) algorithm only if the request bit is set
     if (fHdr.GetAdr())
     {
-        if (int(status->GetReceivedPacketList().size()) < historyRange)
+        if (int(status->GetReceivedPacketHistory().GetSize()) < historyRange)
         {
             NS_LOG_ERROR("Not enough packets received by this device ("
-                         << status->GetReceivedPacketList().size()
+                         << status->GetReceivedPacketHistory().GetSize()
                          << ") for the algorithm to work (need " << historyRange << ")");
         }
         else
@@ -186,16 +186,16 @@ AdrComponent::AdrImplementation(uint8_t* newDataRate,
     switch (historyAveraging)
     {
     case AdrComponent::AVERAGE:
-        m_SNR = GetAverageSNR(status->GetReceivedPacketList(), historyRange);
+        m_SNR = GetAverageSNR(status->GetReceivedPacketHistory(), historyRange);
         break;
     case AdrComponent::MAXIMUM:
-        m_SNR = GetMaxSNR(status->GetReceivedPacketList(), historyRange);
+        m_SNR = GetMaxSNR(status->GetReceivedPacketHistory(), historyRange);
         break;
     case AdrComponent::MINIMUM:
-        m_SNR = GetMinSNR(status->GetReceivedPacketList(), historyRange);
+        m_SNR = GetMinSNR(status->GetReceivedPacketHistory(), historyRange);
     }
 
-    m_SNR = GetMinSNR(status->GetReceivedPacketList(), historyRange); //test
+    m_SNR = GetMinSNR(status->GetReceivedPacketHistory(), historyRange); //test
 
     NS_LOG_DEBUG("m_SNR = " << m_SNR);
 
@@ -362,21 +362,36 @@ AdrComponent::GetReceivedPower(EndDeviceStatus::GatewayList gwList)
     }
 }
 
+double
+AdrComponent::GetReceivedPower(const EndDeviceStatus::ReceivedPacketSummary& summary) const
+{
+    switch (tpAveraging)
+    {
+    case AdrComponent::AVERAGE:
+        return summary.averageRxPower;
+    case AdrComponent::MAXIMUM:
+        return summary.maxRxPower;
+    case AdrComponent::MINIMUM:
+        return summary.minRxPower;
+    default:
+        return -1;
+    }
+}
+
 // TODO Make this more elegant
 double
-AdrComponent::GetMinSNR(EndDeviceStatus::ReceivedPacketList packetList, int historyRange)
+AdrComponent::GetMinSNR(const EndDeviceStatus::ReceivedPacketHistory& history, int historyRange)
 {
     double m_SNR;
 
-    // Take elements from the list starting at the end
-    auto it = packetList.rbegin();
-    double min = RxPowerToSNR(GetReceivedPower(it->second.gwList));
+    // Take elements from the history starting at the last received packet
+    double min = RxPowerToSNR(GetReceivedPower(history.Get(0)));
 
-    for (int i = 0; i < historyRange; i++, it++)
+    for (int i = 0; i < historyRange; i++)
     {
-        m_SNR = RxPowerToSNR(GetReceivedPower(it->second.gwList));
+        m_SNR = RxPowerToSNR(GetReceivedPower(history.Get(i)));
 
-        NS_LOG_DEBUG("Received power: " << GetReceivedPower(it->second.gwList));
+        NS_LOG_DEBUG("Received power: " << GetReceivedPower(history.Get(i)));
         NS_LOG_DEBUG("m_SNR = " << m_SNR);
 
         if (m_SNR < min)
@@ -391,19 +406,18 @@ AdrComponent::GetMinSNR(EndDeviceStatus::ReceivedPacketList packetList, int hist
 }
 
 double
-AdrComponent::GetMaxSNR(EndDeviceStatus::ReceivedPacketList packetList, int historyRange)
+AdrComponent::GetMaxSNR(const EndDeviceStatus::ReceivedPacketHistory& history, int historyRange)
 {
     double m_SNR;
 
-    // Take elements from the list starting at the end
-    auto it = packetList.rbegin();
-    double max = RxPowerToSNR(GetReceivedPower(it->second.gwList));
+    // Take elements from the history starting at the last received packet
+    double max = RxPowerToSNR(GetReceivedPower(history.Get(0)));
 
-    for (int i = 0; i < historyRange; i++, it++)
+    for (int i = 0; i < historyRange; i++)
     {
-        m_SNR = RxPowerToSNR(GetReceivedPower(it->second.gwList));
+        m_SNR = RxPowerToSNR(GetReceivedPower(history.Get(i)));
 
-        NS_LOG_DEBUG("Received power: " << GetReceivedPower(it->second.gwList));
+        NS_LOG_DEBUG("Received power: " << GetReceivedPower(history.Get(i)));
         NS_LOG_DEBUG("m_SNR = " << m_SNR);
 
         if (m_SNR > max)
@@ -418,18 +432,17 @@ AdrComponent::GetMaxSNR(EndDeviceStatus::ReceivedPacketList packetList, int hist
 }
 
 double
-AdrComponent::GetAverageSNR(EndDeviceStatus::ReceivedPacketList packetList, int historyRange)
+AdrComponent::GetAverageSNR(const EndDeviceStatus::ReceivedPacketHistory& history, int historyRange)
 {
     double sum = 0;
     double m_SNR;
 
-    // Take elements from the list starting at the end
-    auto it = packetList.rbegin();
-    for (int i = 0; i < historyRange; i++, it++)
+    // Take elements from the history starting at the last received packet
+    for (int i = 0; i < historyRange; i++)
     {
-        m_SNR = RxPowerToSNR(GetReceivedPower(it->second.gwList));
+        m_SNR = RxPowerToSNR(GetReceivedPower(history.Get(i)));
 
-        NS_LOG_DEBUG("Received power: " << GetReceivedPower(it->second.gwList));
+        NS_LOG_DEBUG("Received power: " << GetReceivedPower(history.Get(i)));
         NS_LOG_DEBUG("m_SNR = " << m_SNR);
 
         sum += m_SNR;
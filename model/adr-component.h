@@ -131,31 +131,38 @@ class AdrComponent : public NetworkControllerComponent
      * \return RSSI of tranmsmission as double.
      */
     double GetReceivedPower(EndDeviceStatus::GatewayList gwList);
+    /**
+     * Get RSSI metric for a transmission according to chosen gateway aggregation policy.
+     *
+     * \param summary Summary of the packet reception at all gateways.
+     * \return RSSI of tranmsmission as double.
+     */
+    double GetReceivedPower(const EndDeviceStatus::ReceivedPacketSummary& summary) const;
 
     /**
      * Get the min Signal to Noise Ratio (SNR) of the receive packet history.
      *
-     * \param packetList History of received packets with reception information.
+     * \param history History of received packets with reception information.
      * \param historyRange Number of packets to consider going back in time.
      * \return Min SNR among packets as double.
      */
-    double GetMinSNR(EndDeviceStatus::ReceivedPacketList packetList, int historyRange);
+    double GetMinSNR(const EndDeviceStatus::ReceivedPacketHistory& history, int historyRange);
     /**
      * Get the max Signal to Noise Ratio (SNR) of the receive packet history.
      *
-     * \param packetList History of received packets with reception information.
+     * \param history History of received packets with reception information.
      * \param historyRange Number of packets to consider going back in time.
      * \return Max SNR among packets as double.
      */
-    double GetMaxSNR(EndDeviceStatus::ReceivedPacketList packetList, int historyRange);
+    double GetMaxSNR(const EndDeviceStatus::ReceivedPacketHistory& history, int historyRange);
     /**
      * Get the average Signal to Noise Ratio (SNR) of the received packet history.
      *
-     * \param packetList History of received packets with reception information.
+     * \param history History of received packets with reception information.
      * \param historyRange Number of packets to consider going back in time.
      * \return Average SNR of packets as double.
      */
-    double GetAverageSNR(EndDeviceStatus::ReceivedPacketList packetList, int historyRange);
+    double GetAverageSNR(const EndDeviceStatus::ReceivedPacketHistory& history, int historyRange);
 
     /**
      * Get the LoRaWAN protocol TXPower configuration index from the Equivalent Isotropically
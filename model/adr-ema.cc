@@ -49,10 +49,10 @@ AdrEMA::BeforeSendingReply(Ptr<EndDeviceStatus> status, Ptr<NetworkStatus> netwo
     //if (fHdr.GetAdr())
     if (fHdr.GetAdr() && fHdr.GetAdrAckReq())
     {
-        if (int(status->GetReceivedPacketList().size()) < historyRange)
+        if (int(status->GetReceivedPacketHistory().GetSize()) < historyRange)
         {
             NS_LOG_ERROR("Not enough packets received by this device ("
-                         << status->GetReceivedPacketList().size()
+                         << status->GetReceivedPacketHistory().GetSize()
                          << ") for the algorithm to work (need " << historyRange << ")");
         }
         else
@@ -121,11 +121,10 @@ double AdrEMA::ImplementationCore(Ptr<EndDeviceStatus> status)  {
     bool invertedSeries = false;
 
     //smoothing SNR with EMA filter
-    EndDeviceStatus::ReceivedPacketList packetList = status->GetReceivedPacketList ();
-    auto it = packetList.rbegin ();
+    const EndDeviceStatus::ReceivedPacketHistory& history = status->GetReceivedPacketHistory ();
         
-    for (int i = 0; i < historyRange; i++, it++)    
-        curSNR[i] = RxPowerToSNR (GetReceivedPower (it->second.gwList));
+    for (int i = 0; i < historyRange; i++)    
+        curSNR[i] = RxPowerToSNR (GetReceivedPower (history.Get (i)));
     
     
     if (invertedSeries)  {
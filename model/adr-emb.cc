@@ -121,11 +121,10 @@ double AdrEMB::ImplementationCore(Ptr<EndDeviceStatus> status)  {
     //m_deviceMargin = 0;
     
     //std::cout << "ADR Central implementation core activated..." << std::endl;
-    EndDeviceStatus::ReceivedPacketList packetList = status->GetReceivedPacketList ();
-    auto it = packetList.rbegin ();
+    const EndDeviceStatus::ReceivedPacketHistory& history = status->GetReceivedPacketHistory ();
         
-    for (int i = 0; i < historyRange; i++, it++)    
-        curSNR[i] = RxPowerToSNR (GetReceivedPower (it->second.gwList));
+    for (int i = 0; i < historyRange; i++)    
+        curSNR[i] = RxPowerToSNR (GetReceivedPower (history.Get (i)));
 
     
     // Printing SNR values
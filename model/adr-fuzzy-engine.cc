@@ -0,0 +1,181 @@
+/*
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License version 2 as
+ * published by the Free Software Foundation;
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program; if not, write to the Free Software
+ * Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+ */
+
+#include "adr-fuzzy-engine.h"
+
+#include "ns3/abort.h"
+#include "ns3/log.h"
+
+#include <algorithm>
+#include <cmath>
+
+namespace ns3
+{
+namespace lorawan
+{
+
+NS_LOG_COMPONENT_DEFINE("AdrFuzzyEngine");
+
+/**
+ * Get the absolute difference between an interpolated and an exact output.
+ * Outputs are NaN when no rule fires, which the two must agree on.
+ *
+ * \param value The interpolated output.
+ * \param exact The exact output.
+ * \return The absolute difference, or infinity if only one of them is NaN.
+ */
+static double
+Deviation(double value, double exact)
+{
+    if (std::isnan(value) || std::isnan(exact))
+    {
+        return std::isnan(value) == std::isnan(exact) ? 0 : INFINITY;
+    }
+    return std::abs(value - exact);
+}
+
+std::map<std::string, Ptr<AdrFuzzyEngine>> AdrFuzzyEngine::m_engines;
+std::mutex AdrFuzzyEngine::m_enginesMutex;
+
+Ptr<AdrFuzzyEngine>
+AdrFuzzyEngine::Get(const std::string& filename)
+{
+    NS_LOG_FUNCTION(filename);
+
+    std::lock_guard<std::mutex> lock(m_enginesMutex);
+    auto it = m_engines.find(filename);
+    if (it == m_engines.end())
+    {
+        it = m_engines.emplace(filename, Create<AdrFuzzyEngine>(filename)).first;
+    }
+    return it->second;
+}
+
+AdrFuzzyEngine::AdrFuzzyEngine(const std::string& filename)
+    : m_engine(fl::FllImporter().fromFile(filename))
+{
+    NS_LOG_FUNCTION(this << filename);
+
+    m_snr = m_engine->getInputVariable("SNR");
+    m_sf = m_engine->getOutputVariable("SF");
+    m_tp = m_engine->getOutputVariable("TP");
+    NS_ABORT_MSG_IF(!m_snr || !m_sf || !m_tp,
+                    "Fuzzy engine " << filename << " needs an SNR input and SF, TP outputs");
+
+    m_minSnr = m_snr->getMinimum();
+    m_maxSnr = m_snr->getMaximum();
+}
+
+void
+AdrFuzzyEngine::Process(double snr, double* sf, double* tp)
+{
+    std::lock_guard<std::mutex> lock(m_mutex);
+    DoProcess(snr, sf, tp);
+}
+
+void
+AdrFuzzyEngine::DoProcess(double snr, double* sf, double* tp)
+{
+    m_snr->setValue(snr);
+    m_engine->process();
+    *sf = m_sf->getValue();
+    *tp = m_tp->getValue();
+}
+
+void
+AdrFuzzyEngine::BuildLookupSurface(uint32_t resolution)
+{
+    NS_LOG_FUNCTION(this << resolution);
+
+    std::lock_guard<std::mutex> lock(m_mutex);
+    GetSurface(resolution);
+}
+
+const AdrFuzzyEngine::LookupSurface&
+AdrFuzzyEngine::GetSurface(uint32_t resolution)
+{
+    NS_ASSERT_MSG(resolution > 0, "A lookup surface needs at least one interval");
+
+    auto it = m_surfaces.find(resolution);
+    if (it != m_surfaces.end())
+    {
+        return it->second;
+    }
+
+    LookupSurface& surface = m_surfaces[resolution];
+    surface.sf.resize(resolution + 1);
+    surface.tp.resize(resolution + 1);
+    double step = (m_maxSnr - m_minSnr) / resolution;
+    for (uint32_t i = 0; i <= resolution; i++)
+    {
+        DoProcess(m_minSnr + i * step, &surface.sf[i], &surface.tp[i]);
+    }
+
+    NS_LOG_DEBUG("Built a lookup surface with " << resolution + 1 << " samples over ["
+                                                << m_minSnr << ", " << m_maxSnr << "]");
+
+    return surface;
+}
+
+void
+AdrFuzzyEngine::Lookup(double snr, uint32_t resolution, double* sf, double* tp)
+{
+    std::lock_guard<std::mutex> lock(m_mutex);
+
+    if (resolution == 0)
+    {
+        DoProcess(snr, sf, tp);
+        return;
+    }
+
+    const LookupSurface& surface = GetSurface(resolution);
+
+    // Inputs out of range are clamped to it, as the engine does with a locked range
+    double position = (snr - m_minSnr) / (m_maxSnr - m_minSnr) * resolution;
+    position = std::min(std::max(position, 0.0), double(resolution));
+    uint32_t i = std::min(uint32_t(position), resolution - 1);
+    double weight = position - i;
+
+    *sf = surface.sf[i] + weight * (surface.sf[i + 1] - surface.sf[i]);
+    *tp = surface.tp[i] + weight * (surface.tp[i + 1] - surface.tp[i]);
+}
+
+double
+AdrFuzzyEngine::ValidateLookupSurface(uint32_t resolution, uint32_t points)
+{
+    NS_LOG_FUNCTION(this << resolution << points);
+
+    double maxDeviation = 0;
+    double step = (m_maxSnr - m_minSnr) / points;
+    for (uint32_t i = 0; i <= points; i++)
+    {
+        double snr = m_minSnr + i * step;
+        double exactSf;
+        double exactTp;
+        double sf;
+        double tp;
+        Process(snr, &exactSf, &exactTp);
+        Lookup(snr, resolution, &sf, &tp);
+        maxDeviation = std::max({maxDeviation, Deviation(sf, exactSf), Deviation(tp, exactTp)});
+    }
+
+    NS_LOG_INFO("Maximum deviation of the lookup surface with resolution "
+                << resolution << " from exact inference: " << maxDeviation);
+
+    return maxDeviation;
+}
+
+} // namespace lorawan
+} // namespace ns3
@@ -0,0 +1,156 @@
+/*
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License version 2 as
+ * published by the Free Software Foundation;
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program; if not, write to the Free Software
+ * Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+ */
+
+#ifndef ADR_FUZZY_ENGINE_H
+#define ADR_FUZZY_ENGINE_H
+
+#include "ns3/ptr.h"
+#include "ns3/simple-ref-count.h"
+
+#include "fl/Headers.h"
+
+#include <map>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <vector>
+
+namespace ns3
+{
+namespace lorawan
+{
+
+/**
+ * \ingroup lorawan
+ *
+ * Fuzzy inference engine used by the fuzzy Adaptive Data Rate (ADR) components.
+ *
+ * The engine is read from a fuzzylite (.fll) file with one input variable (SNR)
+ * and two output variables (SF and TP). Engines are shared: all the ADR
+ * components that use the same file get the same instance, which is parsed only
+ * once. Inference is serialized, so the engine can be used from several
+ * threads.
+ *
+ * Since the output variables only depend on the input, the engine can also
+ * sample them on a regular grid over the input range (a lookup surface), and
+ * answer later queries by linear interpolation between the two closest
+ * samples.
+ */
+class AdrFuzzyEngine : public SimpleRefCount<AdrFuzzyEngine>
+{
+  public:
+    /**
+     * Get the engine defined in a file, parsing it on first use.
+     *
+     * \param filename The path of the .fll file.
+     * \return A pointer to the shared engine.
+     */
+    static Ptr<AdrFuzzyEngine> Get(const std::string& filename);
+
+    /**
+     * Constructor.
+     *
+     * \param filename The path of the .fll file.
+     */
+    AdrFuzzyEngine(const std::string& filename);
+
+    /**
+     * Run the fuzzy inference.
+     *
+     * \param snr The value of the input variable.
+     * \param sf [out] The value of the SF output variable (NaN if no rule fired).
+     * \param tp [out] The value of the TP output variable (NaN if no rule fired).
+     */
+    void Process(double snr, double* sf, double* tp);
+
+    /**
+     * Sample the outputs on a regular grid over the input range.
+     *
+     * Surfaces are kept per resolution and shared by all the users of this
+     * engine. Building an existing surface does nothing.
+     *
+     * \param resolution The number of intervals of the grid.
+     */
+    void BuildLookupSurface(uint32_t resolution);
+
+    /**
+     * Get the outputs by interpolating a lookup surface.
+     *
+     * If resolution is 0, exact inference is run instead.
+     *
+     * \param snr The value of the input variable.
+     * \param resolution The resolution of the surface to use.
+     * \param sf [out] The interpolated value of the SF output variable.
+     * \param tp [out] The interpolated value of the TP output variable.
+     */
+    void Lookup(double snr, uint32_t resolution, double* sf, double* tp);
+
+    /**
+     * Compare a lookup surface with exact inference.
+     *
+     * The outputs are compared at the given number of points evenly spaced in
+     * the input range, which includes the points halfway between the samples
+     * of the surface when the number is a multiple of its resolution.
+     *
+     * \param resolution The resolution of the surface to validate.
+     * \param points The number of intervals between the points to compare.
+     * \return The maximum absolute deviation, among both outputs.
+     */
+    double ValidateLookupSurface(uint32_t resolution, uint32_t points);
+
+  private:
+    /**
+     * The outputs sampled on a regular grid over the input range.
+     */
+    struct LookupSurface
+    {
+        std::vector<double> sf; //!< SF samples
+        std::vector<double> tp; //!< TP samples
+    };
+
+    /**
+     * Get a lookup surface, building it if needed. m_mutex must be held.
+     *
+     * \param resolution The resolution of the surface.
+     * \return A reference to the surface.
+     */
+    const LookupSurface& GetSurface(uint32_t resolution);
+
+    /**
+     * Run the fuzzy inference. m_mutex must be held.
+     *
+     * \param snr The value of the input variable.
+     * \param sf [out] The value of the SF output variable.
+     * \param tp [out] The value of the TP output variable.
+     */
+    void DoProcess(double snr, double* sf, double* tp);
+
+    std::unique_ptr<fl::Engine> m_engine; //!< The fuzzylite engine
+    fl::InputVariable* m_snr;             //!< The SNR input variable
+    fl::OutputVariable* m_sf;             //!< The SF output variable
+    fl::OutputVariable* m_tp;             //!< The TP output variable
+    double m_minSnr;                      //!< Lower bound of the input range
+    double m_maxSnr;                      //!< Upper bound of the input range
+    std::map<uint32_t, LookupSurface> m_surfaces; //!< Lookup surfaces, by resolution
+    std::mutex m_mutex;                           //!< Serializes inference and surfaces
+
+    static std::map<std::string, Ptr<AdrFuzzyEngine>> m_engines; //!< Engines, by file
+    static std::mutex m_enginesMutex; //!< Protects m_engines
+};
+
+} // namespace lorawan
+} // namespace ns3
+
+#endif /* ADR_FUZZY_ENGINE_H */
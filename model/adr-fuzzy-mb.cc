@@ -1,5 +1,7 @@
 #include "ns3/adr-fuzzy-mb.h"
 
+#include "ns3/uinteger.h"
+
 using namespace fl;
 
 namespace ns3 {
@@ -19,6 +21,12 @@ TypeId AdrFuzzyMB::GetTypeId (void)
     .SetGroupName ("lorawan")
     .AddConstructor<AdrFuzzyMB> ()
     .SetParent<AdrLorawan> ()       
+    .AddAttribute ("LookupResolution",
+                   "Number of intervals of the precomputed fuzzy lookup surface "
+                   "(0 runs exact fuzzy inference on every decision)",
+                   UintegerValue (0),
+                   MakeUintegerAccessor (&AdrFuzzyMB::m_lookupResolution),
+                   MakeUintegerChecker<uint32_t> ())
   ;
   return tid;
 }
@@ -28,13 +36,12 @@ TypeId AdrFuzzyMB::GetTypeId (void)
 AdrFuzzyMB::AdrFuzzyMB ()
 {    
     std::string filename = path + "adr-fuzzy-mb.fll";
-    m_engine = FllImporter().fromFile(filename);    
+    m_engine = AdrFuzzyEngine::Get (filename);
     
 }
 
 AdrFuzzyMB::~AdrFuzzyMB ()
 {
-    delete m_engine;
 }
 
 
@@ -49,11 +56,10 @@ void AdrFuzzyMB::AdrImplementation(uint8_t* newDataRate,
     std::vector<double> curSNR(historyRange);
     bool printFileSNRmagin = true;
 
-    EndDeviceStatus::ReceivedPacketList packetList = status->GetReceivedPacketList ();
-    auto it = packetList.rbegin ();
+    const EndDeviceStatus::ReceivedPacketHistory& history = status->GetReceivedPacketHistory ();
         
-    for (int i = 0; i < historyRange; i++, it++)    
-        curSNR[i] = RxPowerToSNR (GetReceivedPower (it->second.gwList));
+    for (int i = 0; i < historyRange; i++)    
+        curSNR[i] = RxPowerToSNR (GetReceivedPower (history.Get (i)));
 
     fq = AdrMB::GetFirstQuartile(curSNR);
     tq = AdrMB::GetThirdQuartile(curSNR);
@@ -126,21 +132,17 @@ void AdrFuzzyMB::AdrImplementation(uint8_t* newDataRate,
     //std::cout << "margin_SNR= " << margin_SNR << ", m_SNR= " << m_SNR << ", req_SNR= " << req_SNR << ", m_deviceMargin= " << m_deviceMargin <<std::endl;
 
     //Fuzzy 
-    InputVariable* snr = m_engine->getInputVariable ("SNR");
-    OutputVariable* tp = m_engine->getOutputVariable ("TP");
-    OutputVariable* sf = m_engine->getOutputVariable ("SF");
-
-    snr->setValue (margin_SNR);
-    m_engine->process ();
+    double sf, tp;
+    m_engine->Lookup (margin_SNR, m_lookupResolution, &sf, &tp);
 
-    if ( Op::isNaN ( sf->getValue () ) == false )
+    if ( Op::isNaN ( sf ) == false )
     {
-      double r = stod ( Op::str (sf->getValue ()) );
+      double r = stod ( Op::str (sf) );
       spreadingFactor = round (r);
     } 
-    if (Op::isNaN ( tp->getValue () ) == false)
+    if (Op::isNaN ( tp ) == false)
     {
-      transmissionPower = stod ( Op::str (tp->getValue ()) );
+      transmissionPower = stod ( Op::str (tp) );
     }
 
     *newDataRate = 12 - spreadingFactor;
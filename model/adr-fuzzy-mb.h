@@ -7,6 +7,7 @@
 #include "ns3/network-status.h"
 #include "ns3/network-controller-components.h"
 #include "ns3/adr-lorawan.h"
+#include "ns3/adr-fuzzy-engine.h"
 #include "ns3/adr-mb.h"
 
 
@@ -37,7 +38,8 @@ private:
 
 
   std::string path = "src/lorawan/examples/aux/";
-  fl::Engine * m_engine;
+  Ptr<AdrFuzzyEngine> m_engine;
+  uint32_t m_lookupResolution;
   std::string m_file;
 
   // Number of previous packets to consider
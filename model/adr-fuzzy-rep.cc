@@ -1,5 +1,7 @@
 #include "ns3/adr-fuzzy-rep.h"
 
+#include "ns3/uinteger.h"
+
 using namespace fl;
 
 namespace ns3 {
@@ -19,6 +21,12 @@ TypeId AdrFuzzyRep::GetTypeId (void)
     .SetGroupName ("lorawan")
     .AddConstructor<AdrFuzzyRep> ()
     .SetParent<AdrLorawan> ()       
+    .AddAttribute ("LookupResolution",
+                   "Number of intervals of the precomputed fuzzy lookup surface "
+                   "(0 runs exact fuzzy inference on every decision)",
+                   UintegerValue (0),
+                   MakeUintegerAccessor (&AdrFuzzyRep::m_lookupResolution),
+                   MakeUintegerChecker<uint32_t> ())
   ;
   return tid;
 }
@@ -28,12 +36,11 @@ TypeId AdrFuzzyRep::GetTypeId (void)
 AdrFuzzyRep::AdrFuzzyRep ()
 {    
     std::string filename = path + "adr-fuzzy-rep.fll";
-    m_engine = FllImporter().fromFile(filename);    
+    m_engine = AdrFuzzyEngine::Get (filename);
 }
 
 AdrFuzzyRep::~AdrFuzzyRep ()
 {
-    delete m_engine;
 }
 
 
@@ -45,7 +52,7 @@ void AdrFuzzyRep::AdrImplementation(uint8_t* newDataRate,
     // Compute the maximum or median SNR, based on the boolean value historyAveraging
     double m_SNR = 0;
           
-    m_SNR = GetAverageSNR(status->GetReceivedPacketList(), historyRange);
+    m_SNR = GetAverageSNR(status->GetReceivedPacketHistory(), historyRange);
     
     NS_LOG_DEBUG("m_SNR = " << m_SNR);
 
@@ -72,21 +79,17 @@ void AdrFuzzyRep::AdrImplementation(uint8_t* newDataRate,
     
     //-- Fuzzy Logic Operations:      
     
-    InputVariable* snr = m_engine->getInputVariable ("SNR");
-    OutputVariable* tp = m_engine->getOutputVariable ("TP");
-    OutputVariable* sf = m_engine->getOutputVariable ("SF");
-
-    snr->setValue (margin_SNR);
-    m_engine->process ();
+    double sf, tp;
+    m_engine->Lookup (margin_SNR, m_lookupResolution, &sf, &tp);
 
-    if ( Op::isNaN ( sf->getValue () ) == false )
+    if ( Op::isNaN ( sf ) == false )
     {
-      double r = stod ( Op::str (sf->getValue ()) );
+      double r = stod ( Op::str (sf) );
       spreadingFactor = round (r);
     } 
-    if (Op::isNaN ( tp->getValue () ) == false)
+    if (Op::isNaN ( tp ) == false)
     {
-      transmissionPower = stod ( Op::str (tp->getValue ()) );
+      transmissionPower = stod ( Op::str (tp) );
     }
 
     *newDataRate = 12 - spreadingFactor;
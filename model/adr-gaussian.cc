@@ -47,10 +47,10 @@ AdrGaussian::BeforeSendingReply(Ptr<EndDeviceStatus> status, Ptr<NetworkStatus>
     //if (fHdr.GetAdr())
     if (fHdr.GetAdr() && fHdr.GetAdrAckReq())
     {
-        if (int(status->GetReceivedPacketList().size()) < historyRange)
+        if (int(status->GetReceivedPacketHistory().GetSize()) < historyRange)
         {
             NS_LOG_ERROR("Not enough packets received by this device ("
-                         << status->GetReceivedPacketList().size()
+                         << status->GetReceivedPacketHistory().GetSize()
                          << ") for the algorithm to work (need " << historyRange << ")");
         }
         else
@@ -117,20 +117,19 @@ double AdrGaussian::ImplementationCore(Ptr<EndDeviceStatus> status)  {
     double sum = 0;
     int numSNR = 0;
     
-    EndDeviceStatus::ReceivedPacketList packetList = status->GetReceivedPacketList ();
+    const EndDeviceStatus::ReceivedPacketHistory& history = status->GetReceivedPacketHistory ();
     // G-ADR core
-    double avgSNR = GetAverageSNR (packetList, historyRange);
-    double sdSNR  = GetSdSNR (packetList, historyRange);
+    double avgSNR = GetAverageSNR (history, historyRange);
+    double sdSNR  = GetSdSNR (history, historyRange);
     double LPF = avgSNR - sdSNR;
     double HPF = avgSNR + sdSNR;
 
     //std::cout << "Media e SD: " << avgSNR << "," << sdSNR << std::endl;  
   
-    auto it = packetList.rbegin ();
-    for (int i = 0; i < historyRange; i++, it++)
+    for (int i = 0; i < historyRange; i++)
     {
         //std::cout << "i=" << i << std::endl; 
-        cur_SNR = RxPowerToSNR (GetReceivedPower (it->second.gwList));
+        cur_SNR = RxPowerToSNR (GetReceivedPower (history.Get (i)));
         if( cur_SNR >= LPF && cur_SNR <= HPF) {
         sum += cur_SNR;
         numSNR++;
@@ -38,11 +38,10 @@ double AdrKalman::ImplementationCore(Ptr<EndDeviceStatus> status)  {
     std::vector<double> curSNR(historyRange);
     
     //std::cout << "ADR Kalman implementation core activated..." << std::endl;
-    EndDeviceStatus::ReceivedPacketList packetList = status->GetReceivedPacketList ();
-    auto it = packetList.rbegin ();
+    const EndDeviceStatus::ReceivedPacketHistory& history = status->GetReceivedPacketHistory ();
         
-    for (int i = 0; i < historyRange; i++, it++)    
-        curSNR[i] = RxPowerToSNR (GetReceivedPower (it->second.gwList));
+    for (int i = 0; i < historyRange; i++)    
+        curSNR[i] = RxPowerToSNR (GetReceivedPower (history.Get (i)));
     
     m_SNR = GetKmSNR(curSNR);   
 
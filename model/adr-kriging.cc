@@ -1,4 +1,7 @@
 #include "ns3/adr-kriging.h"
+
+#include "ns3/double.h"
+
 #include <vector>
 #include <cmath>
 #include <numeric>
@@ -22,6 +25,17 @@ TypeId AdrKriging::GetTypeId (void)
     .SetGroupName ("lorawan")
     .AddConstructor<AdrKriging> ()
     .SetParent<AdrLorawan> ()    
+    .AddAttribute ("Alpha",
+                   "Range of the Gaussian variogram, in packets",
+                   DoubleValue (1.0),
+                   MakeDoubleAccessor (&AdrKriging::m_alpha),
+                   MakeDoubleChecker<double> (0))
+    .AddAttribute ("MaxConditionNumber",
+                   "Condition number of the kriging system above which the "
+                   "average SNR is used instead",
+                   DoubleValue (1e12),
+                   MakeDoubleAccessor (&AdrKriging::m_maxCondition),
+                   MakeDoubleChecker<double> (1))
   ;
   return tid;
 }
@@ -39,11 +53,10 @@ double AdrKriging::ImplementationCore(Ptr<EndDeviceStatus> status)  {
     std::vector<double> curSNR(historyRange);
     
     //std::cout << "ADR Kalman implementation core activated..." << std::endl;
-    EndDeviceStatus::ReceivedPacketList packetList = status->GetReceivedPacketList ();
-    auto it = packetList.rbegin ();
+    const EndDeviceStatus::ReceivedPacketHistory& history = status->GetReceivedPacketHistory ();
         
-    for (int i = 0; i < historyRange; i++, it++)    {
-      curSNR[i] = RxPowerToSNR (GetReceivedPower (it->second.gwList));
+    for (int i = 0; i < historyRange; i++)    {
+      curSNR[i] = RxPowerToSNR (GetReceivedPower (history.Get (i)));
       //std::cout << "i = " << i << ". SNR = " << curSNR[i] << std::endl;
     }
         
@@ -67,61 +80,154 @@ double AdrKriging::ImplementationCore(Ptr<EndDeviceStatus> status)  {
 
 ////
 
-// Define the variogram function
-std::pair<double, double> AdrKriging::GetKrigingSNR(std::vector<double> SNR) {
-    const int N = 20;
-    double alpha = 1.0;
+double AdrKriging::Variogram(double h, double alpha) {
+    return 1 - std::exp(-(h * h) / (alpha * alpha));
+}
+
+const AdrKriging::KrigingSystem& AdrKriging::GetKrigingSystem(int N, double alpha) {
+    auto key = std::make_pair(N, alpha);
+    auto it = m_systems.find(key);
+    if (it != m_systems.end()) {
+        return it->second;
+    }
 
-    std::vector<std::vector<double>> k(N, std::vector<double>(N));
+    KrigingSystem& system = m_systems[key];
+    int n = N + 1;
+    system.size = n;
 
-    // Construindo a matriz k
+    // Construindo a matriz k: variograma entre as amostras, orlado pela
+    // restrição de soma unitária dos pesos
+    std::vector<double>& k = system.lu;
+    k.assign(n * n, 1.0);
     for (int a = 0; a < N; ++a) {
         for (int b = 0; b < N; ++b) {
-            if (a - b == 0) {
-                k[a][b] = 0;
-            } else {
-                double h = std::abs(a - b);
-                k[a][b] = 1 - std::exp(-(h * h) / (alpha * alpha));
+            k[a * n + b] = Variogram(std::abs(a - b), alpha);
+        }
+    }
+    k[N * n + N] = 0.0;
+
+    // Norma 1 da matriz, antes de ser sobrescrita pelos fatores
+    double normK = 0.0;
+    for (int j = 0; j < n; ++j) {
+        double column = 0.0;
+        for (int i = 0; i < n; ++i) {
+            column += std::abs(k[i * n + j]);
+        }
+        normK = std::max(normK, column);
+    }
+
+    // Fatoração LU com pivotamento parcial, no lugar
+    system.pivots.resize(n);
+    bool singular = false;
+    for (int j = 0; j < n; ++j) {
+        int p = j;
+        for (int i = j + 1; i < n; ++i) {
+            if (std::abs(k[i * n + j]) > std::abs(k[p * n + j])) {
+                p = i;
+            }
+        }
+        system.pivots[j] = p;
+        if (p != j) {
+            std::swap_ranges(k.begin() + j * n, k.begin() + (j + 1) * n, k.begin() + p * n);
+        }
+        if (k[j * n + j] == 0.0) {
+            singular = true;
+            continue;
+        }
+        for (int i = j + 1; i < n; ++i) {
+            double factor = k[i * n + j] /= k[j * n + j];
+            for (int c = j + 1; c < n; ++c) {
+                k[i * n + c] -= factor * k[j * n + c];
             }
         }
     }
 
-    // Criando o vetor one1 e one2
-    std::vector<double> one1(N, 1.0);
-    one1.push_back(0.0);
+    // Número de condição: norma 1 da inversa, coluna por coluna, com a mesma fatoração
+    system.conditionNumber = INFINITY;
+    if (!singular) {
+        double normInverse = 0.0;
+        std::vector<double> column(n);
+        for (int j = 0; j < n; ++j) {
+            std::fill(column.begin(), column.end(), 0.0);
+            column[j] = 1.0;
+            Solve(system, column);
+            double sum = 0.0;
+            for (double value : column) {
+                sum += std::abs(value);
+            }
+            normInverse = std::max(normInverse, sum);
+        }
+        system.conditionNumber = normK * normInverse;
+    }
 
-    // Adicionando one1 a k
+    // Lado direito: variograma entre cada amostra (idade i) e o próximo pacote
+    system.rhs.assign(n, 1.0);
     for (int i = 0; i < N; ++i) {
-        k[i].push_back(1.0);
+        system.rhs[i] = Variogram(i + 1, alpha);
     }
-    // Adicionando one2 a k
-    k.push_back(one1);
 
     // Resolvendo o sistema K * λ0 = M2 (K * lambda0 = M2)
-    std::vector<double> M2(N + 1, 0.0);
-    std::vector<double> lambda0(N + 1, 0.0);
+    system.lambda = system.rhs;
+    if (!singular) {
+        Solve(system, system.lambda);
+    }
 
-    for (int i = 0; i < N + 1; ++i) {
-        double sum = 0.0;
-        for (int j = 0; j < N + 1; ++j) {
-            sum += k[i][j] * M2[j];
+    NS_LOG_DEBUG("Kriging system for N = " << N << ", alpha = " << alpha
+                 << ": condition number " << system.conditionNumber);
+
+    return system;
+}
+
+void AdrKriging::Solve(const KrigingSystem& system, std::vector<double>& x) {
+    int n = system.size;
+    const std::vector<double>& lu = system.lu;
+
+    // Permutação, substituição direta (L) e retroativa (U)
+    for (int j = 0; j < n; ++j) {
+        std::swap(x[j], x[system.pivots[j]]);
+    }
+    for (int i = 0; i < n; ++i) {
+        for (int j = 0; j < i; ++j) {
+            x[i] -= lu[i * n + j] * x[j];
         }
-        lambda0[i] = sum;
     }
-
-    // Calculando SNR_K
-    double SNR_K = 0.0;
-    for (int i = 0; i < N; ++i) {
-        SNR_K += lambda0[i] * SNR[i];
+    for (int i = n - 1; i >= 0; --i) {
+        for (int j = i + 1; j < n; ++j) {
+            x[i] -= lu[i * n + j] * x[j];
+        }
+        x[i] /= lu[i * n + i];
     }
+}
 
-    // Calculando RMSE
-    double RMSE = std::sqrt(std::abs(SNR_K + lambda0[N]));
+std::pair<double, double> AdrKriging::GetKrigingSNR(const std::vector<double>& SNR) {
+    const int N = SNR.size();
+    const KrigingSystem& system = GetKrigingSystem(N, m_alpha);
 
     // Encontrando os valores mínimo e máximo em SNR
     double minSNR = *std::min_element(SNR.begin(), SNR.end());
     double maxSNR = *std::max_element(SNR.begin(), SNR.end());
 
+    // Sistema mal condicionado: usa a média das amostras
+    if (!(system.conditionNumber <= m_maxCondition)) {
+        NS_LOG_WARN("Ill-conditioned kriging system (condition number "
+                    << system.conditionNumber << "), using the average SNR");
+        double SNR_avg = std::accumulate(SNR.begin(), SNR.end(), 0.0) / N;
+        return std::make_pair(SNR_avg, 0.0);
+    }
+
+    // Calculando SNR_K
+    double SNR_K = 0.0;
+    for (int i = 0; i < N; ++i) {
+        SNR_K += system.lambda[i] * SNR[i];
+    }
+
+    // Calculando RMSE a partir da variância de krigagem
+    double variance = 0.0;
+    for (int i = 0; i < N + 1; ++i) {
+        variance += system.lambda[i] * system.rhs[i];
+    }
+    double RMSE = std::sqrt(std::abs(variance));
+
     // Garantindo que SNR_K e RMSE estejam dentro dos limites mínimo e máximo
     SNR_K = std::min(std::max(SNR_K, minSNR), maxSNR);
     RMSE = std::min(std::max(RMSE, minSNR), maxSNR);
@@ -8,6 +8,9 @@
 #include "ns3/network-controller-components.h"
 #include "ns3/adr-lorawan.h"
 
+#include <map>
+#include <utility>
+#include <vector>
 
 namespace ns3 {
 namespace lorawan {
@@ -32,7 +35,27 @@ private:
   //void BeforeSendingReply(Ptr<EndDeviceStatus> status, Ptr<NetworkStatus> networkStatus) override;
   double ImplementationCore(Ptr<EndDeviceStatus> status) override;
 
-  std::pair<double, double> GetKrigingSNR(std::vector<double> SNR);
+  std::pair<double, double> GetKrigingSNR(const std::vector<double>& SNR);
+
+  // Sistema de krigagem ordinária para N amostras espaçadas de uma unidade de
+  // tempo, fatorado uma única vez (LU com pivotamento parcial, em uma matriz
+  // contígua) e reutilizado em todas as decisões com os mesmos N e alpha
+  struct KrigingSystem {
+      int size;                   // N + 1 (amostras + multiplicador de Lagrange)
+      std::vector<double> lu;     // Fatores L e U, linha a linha
+      std::vector<int> pivots;    // Permutação das linhas
+      std::vector<double> rhs;    // Variograma entre as amostras e o ponto estimado
+      std::vector<double> lambda; // Pesos das amostras e multiplicador de Lagrange
+      double conditionNumber;     // Número de condição (norma 1) da matriz
+  };
+
+  const KrigingSystem& GetKrigingSystem(int N, double alpha);
+  static double Variogram(double h, double alpha);
+  static void Solve(const KrigingSystem& system, std::vector<double>& x);
+
+  double m_alpha;            // Alcance do variograma gaussiano
+  double m_maxCondition;     // Número de condição acima do qual a krigagem é descartada
+  std::map<std::pair<int, double>, KrigingSystem> m_systems;
 
   /*
   double GetKringingSNR(std::vector<double> snrVec);
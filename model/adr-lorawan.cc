@@ -64,7 +64,7 @@ AdrLorawan::GetTypeId()
                           "Number of packets to use for averaging",
                           IntegerValue(20),
                           MakeIntegerAccessor(&AdrLorawan::historyRange),
-                          MakeIntegerChecker<int>(0, 100))
+                          MakeIntegerChecker<int>(0, static_cast<int>(EndDeviceStatus::historyCapacity)))
             .AddAttribute("ChangeTransmissionPower",
                           "Whether to toggle the transmission power or not",
                           BooleanValue(true),
@@ -112,10 +112,10 @@ AdrLorawan::BeforeSendingReply(Ptr<EndDeviceStatus> status, Ptr<NetworkStatus> n
     // Execute the Adaptive Data Rate (ADR) algorithm only if the request bit is set
     if (fHdr.GetAdr())
     {
-        if (int(status->GetReceivedPacketList().size()) < historyRange)
+        if (int(status->GetReceivedPacketHistory().GetSize()) < historyRange)
         {
             NS_LOG_ERROR("Not enough packets received by this device ("
-                         << status->GetReceivedPacketList().size()
+                         << status->GetReceivedPacketHistory().GetSize()
                          << ") for the algorithm to work (need " << historyRange << ")");
         }
         else
@@ -261,7 +261,7 @@ AdrLorawan::ImplementationCore(Ptr<EndDeviceStatus> status)  {
     double m_SNR = 0;
     
     //std::cout << "Standard ADR implementation core activated..." << std::endl;
-    m_SNR = GetMaxSNR(status->GetReceivedPacketList(), historyRange);
+    m_SNR = GetMaxSNR(status->GetReceivedPacketHistory(), historyRange);
 
     return m_SNR;
 }
@@ -370,21 +370,36 @@ AdrLorawan::GetReceivedPower(EndDeviceStatus::GatewayList gwList)
     }
 }
 
+double
+AdrLorawan::GetReceivedPower(const EndDeviceStatus::ReceivedPacketSummary& summary) const
+{
+    switch (tpAveraging)
+    {
+    case AdrLorawan::AVERAGE:
+        return summary.averageRxPower;
+    case AdrLorawan::MAXIMUM:
+        return summary.maxRxPower;
+    case AdrLorawan::MINIMUM:
+        return summary.minRxPower;
+    default:
+        return -1;
+    }
+}
+
 // TODO Make this more elegant
 double
-AdrLorawan::GetMinSNR(EndDeviceStatus::ReceivedPacketList packetList, int historyRange)
+AdrLorawan::GetMinSNR(const EndDeviceStatus::ReceivedPacketHistory& history, int historyRange)
 {
     double m_SNR;
 
-    // Take elements from the list starting at the end
-    auto it = packetList.rbegin();
-    double min = RxPowerToSNR(GetReceivedPower(it->second.gwList));
+    // Take elements from the history starting at the last received packet
+    double min = RxPowerToSNR(GetReceivedPower(history.Get(0)));
 
-    for (int i = 0; i < historyRange; i++, it++)
+    for (int i = 0; i < historyRange; i++)
     {
-        m_SNR = RxPowerToSNR(GetReceivedPower(it->second.gwList));
+        m_SNR = RxPowerToSNR(GetReceivedPower(history.Get(i)));
 
-        NS_LOG_DEBUG("Received power: " << GetReceivedPower(it->second.gwList));
+        NS_LOG_DEBUG("Received power: " << GetReceivedPower(history.Get(i)));
         NS_LOG_DEBUG("m_SNR = " << m_SNR);
 
         if (m_SNR < min)
@@ -399,19 +414,18 @@ AdrLorawan::GetMinSNR(EndDeviceStatus::ReceivedPacketList packetList, int histor
 }
 
 double
-AdrLorawan::GetMaxSNR(EndDeviceStatus::ReceivedPacketList packetList, int historyRange)
+AdrLorawan::GetMaxSNR(const EndDeviceStatus::ReceivedPacketHistory& history, int historyRange)
 {
     double m_SNR;
 
-    // Take elements from the list starting at the end
-    auto it = packetList.rbegin();
-    double max = RxPowerToSNR(GetReceivedPower(it->second.gwList));
+    // Take elements from the history starting at the last received packet
+    double max = RxPowerToSNR(GetReceivedPower(history.Get(0)));
 
-    for (int i = 0; i < historyRange; i++, it++)
+    for (int i = 0; i < historyRange; i++)
     {
-        m_SNR = RxPowerToSNR(GetReceivedPower(it->second.gwList));
+        m_SNR = RxPowerToSNR(GetReceivedPower(history.Get(i)));
 
-        NS_LOG_DEBUG("Received power: " << GetReceivedPower(it->second.gwList));
+        NS_LOG_DEBUG("Received power: " << GetReceivedPower(history.Get(i)));
         NS_LOG_DEBUG("m_SNR = " << m_SNR);
 
         if (m_SNR > max)
@@ -426,18 +440,17 @@ AdrLorawan::GetMaxSNR(EndDeviceStatus::ReceivedPacketList packetList, int histor
 }
 
 double
-AdrLorawan::GetAverageSNR(EndDeviceStatus::ReceivedPacketList packetList, int historyRange)
+AdrLorawan::GetAverageSNR(const EndDeviceStatus::ReceivedPacketHistory& history, int historyRange)
 {
     double sum = 0;
     double m_SNR;
 
-    // Take elements from the list starting at the end
-    auto it = packetList.rbegin();
-    for (int i = 0; i < historyRange; i++, it++)
+    // Take elements from the history starting at the last received packet
+    for (int i = 0; i < historyRange; i++)
     {
-        m_SNR = RxPowerToSNR(GetReceivedPower(it->second.gwList));
+        m_SNR = RxPowerToSNR(GetReceivedPower(history.Get(i)));
 
-        NS_LOG_DEBUG("Received power: " << GetReceivedPower(it->second.gwList));
+        NS_LOG_DEBUG("Received power: " << GetReceivedPower(history.Get(i)));
         NS_LOG_DEBUG("m_SNR = " << m_SNR);
 
         sum += m_SNR;
@@ -451,17 +464,16 @@ AdrLorawan::GetAverageSNR(EndDeviceStatus::ReceivedPacketList packetList, int hi
 }
 
 double 
-AdrLorawan::GetSdSNR(EndDeviceStatus::ReceivedPacketList packetList,
+AdrLorawan::GetSdSNR(const EndDeviceStatus::ReceivedPacketHistory& history,
                         int historyRange)
 {
-  double average = GetAverageSNR(packetList, historyRange);
+  double average = GetAverageSNR(history, historyRange);
   double sumOfSquares = 0;
 
   // Calculate the sum of squares of differences from the mean
-  auto it = packetList.rbegin();
-  for (int i = 0; i < historyRange; i++, it++)
+  for (int i = 0; i < historyRange; i++)
   {
-    double m_SNR = RxPowerToSNR(GetReceivedPower(it->second.gwList));
+    double m_SNR = RxPowerToSNR(GetReceivedPower(history.Get(i)));
     double diff = m_SNR - average;
     sumOfSquares += diff * diff;
   }
@@ -1,5 +1,7 @@
 #include "ns3/adr-pf.h"
 
+#include "ns3/uinteger.h"
+
 namespace ns3 {
 namespace lorawan {
 
@@ -13,6 +15,11 @@ TypeId AdrPF::GetTypeId (void)
     .SetGroupName ("lorawan")
     .AddConstructor<AdrPF> ()
     .SetParent<AdrLorawan> ()    
+    .AddAttribute ("NumParticles",
+                   "Number of particles of the SNR filter of each end device",
+                   UintegerValue (20),
+                   MakeUintegerAccessor (&AdrPF::SetNumParticles, &AdrPF::GetNumParticles),
+                   MakeUintegerChecker<uint32_t> (1))
   ;
   return tid;
 }
@@ -25,12 +32,23 @@ AdrPF::~AdrPF ()
 {
 }
 
+void
+AdrPF::SetNumParticles (uint32_t numParticles)
+{
+    m_particles.SetNumParticles (numParticles);
+}
+
+uint32_t
+AdrPF::GetNumParticles () const
+{
+    return m_particles.GetNumParticles ();
+}
+
 void
 AdrPF::AdrImplementation(uint8_t* newDataRate,
                          uint8_t* newTxPower,
                          Ptr<EndDeviceStatus> status)
 {  
-    int numParticles = 20;  // Reduzido de 50 para 20 partículas
     float processNoise = 0.005f;  // Uso de float para reduzir consumo de memória
     float measurementNoise = 0.01f;  // Uso de float para pesos e medições
     std::vector<float> SNRlist(historyRange);  // Uso de float no SNRlist
@@ -40,10 +58,9 @@ AdrPF::AdrImplementation(uint8_t* newDataRate,
     float SNRreq = threshold[SfToDr(SF)];  // Uso de float
     float TP = status->GetMac()->GetTransmissionPower();   // TP atual 
 
-    EndDeviceStatus::ReceivedPacketList packetList = status->GetReceivedPacketList ();    
-    auto it = packetList.rbegin();        
-    for (int i = 0; i < historyRange && it != packetList.rend(); i++, it++) {  
-        SNRlist[i] = (float) RxPowerToSNR(GetReceivedPower(it->second.gwList));
+    const EndDeviceStatus::ReceivedPacketHistory& history = status->GetReceivedPacketHistory ();    
+    for (int i = 0; i < historyRange && i < int(history.GetSize()); i++) {  
+        SNRlist[i] = (float) RxPowerToSNR(GetReceivedPower(history.Get(i)));
     }
 
     float measuredSNR = GetMedian(SNRlist);
@@ -51,8 +68,8 @@ AdrPF::AdrImplementation(uint8_t* newDataRate,
     NodeID nodeId = int(status->GetMac()->GetDevice()->GetNode()->GetId());
 
     // Inicializa as partículas se necessário
-    if (nodeParticles.find(nodeId) == nodeParticles.end()) {
-        initializeParticles(nodeId, numParticles, measuredSNR, 1.0f / numParticles);
+    if (!m_particles.HasNode(nodeId)) {
+        m_particles.InitializeNode(nodeId, measuredSNR);
     }
 
     // Loop de filtro de partículas com controle de convergência
@@ -64,39 +81,10 @@ AdrPF::AdrImplementation(uint8_t* newDataRate,
     float currentWeightThreshold = weightVarianceThreshold;  // Limite dinâmico
 
     while (iter < maxIter) {
-        auto& particles = nodeParticles[nodeId];
-
-        // Predição e atualização de pesos para cada partícula
-        for (auto& particle : particles) {
-            particle.snr = predictSNR(particle.snr, processNoise);
-            particle.weight = updateWeight(particle.snr, measuredSNR, measurementNoise);
-        }
-
-        // Normalização dos pesos
-        float totalWeight = 0.0f;
-        for (const auto& particle : particles) {
-            totalWeight += particle.weight;
-        }
-        for (auto& particle : particles) {
-            particle.weight /= totalWeight;
-        }
-
-        // Reamostragem das partículas
-        resampleParticles(nodeId);
-
-        // Estimação de SNR como média ponderada das partículas
-        estimatedSNR = 0.0f;
-        for (const auto& particle : particles) {
-            estimatedSNR += particle.snr * particle.weight;
-        }
-
-        // Calcular a variância dos pesos das partículas
-        float meanWeight = 1.0f / particles.size();
-        float weightVariance = 0.0f;
-        for (const auto& particle : particles) {
-            weightVariance += (particle.weight - meanWeight) * (particle.weight - meanWeight);
-        }
-        weightVariance /= particles.size();
+        // Predição, atualização e normalização dos pesos, reamostragem e
+        // estimação de SNR como média ponderada das partículas
+        double weightVariance;
+        estimatedSNR = m_particles.Step(nodeId, measuredSNR, processNoise, measurementNoise, &weightVariance);
 
         // Verifica se o critério de convergência foi atingido
         if (weightVariance <= currentWeightThreshold) {
@@ -110,10 +98,9 @@ AdrPF::AdrImplementation(uint8_t* newDataRate,
     }
     //std::cout << "Valor final de iter #" << iter << std::endl;
 
-    // Reduz o número de partículas após a convergência para otimizar o uso de memória
-    auto& particles = nodeParticles[nodeId];
+    // Reduz o número de partículas após a convergência para otimizar o tempo de cada passo
     if (iter < maxIter) {  // Convergência atingida
-        particles.resize(10);  // Reduz o número de partículas para 10
+        m_particles.Shrink(nodeId, 10);  // Reduz o número de partículas para 10
     }
 
     // Ajuste de SF e TP com base no SNR estimado (fora do loop principal)
@@ -142,55 +129,6 @@ AdrPF::AdrImplementation(uint8_t* newDataRate,
 
 
 
-// Função para inicializar partículas para um nó
-void 
-AdrPF::initializeParticles(NodeID nodeId, int numParticles, double initialSNR, double initialWeight) {
-    std::vector<Particle> particles(numParticles, {initialSNR, initialWeight});
-    nodeParticles[nodeId] = particles;
-}
-
-// Função para calcular uma nova previsão de SNR com base no modelo de sistema
-double 
-AdrPF::predictSNR(double currentSNR, double processNoise) {
-    std::default_random_engine generator;
-    std::normal_distribution<double> distribution(currentSNR, processNoise);
-    return distribution(generator);
-}
-
-// Função para atualizar o peso da partícula com base na medição observada
-double 
-AdrPF::updateWeight(double predictedSNR, double measuredSNR, double measurementNoise) {
-    double diff = predictedSNR - measuredSNR;
-    return exp(-diff * diff / (2 * measurementNoise * measurementNoise));
-}
-
-// Função para reamostrar partículas com base em seus pesos
-void 
-AdrPF::resampleParticles(NodeID nodeId) {
-    auto& particles = nodeParticles[nodeId];
-    std::vector<Particle> newParticles;
-    std::vector<double> cumulativeWeights(particles.size());
-    
-    // Calcula pesos cumulativos
-    cumulativeWeights[0] = particles[0].weight;
-    for (size_t i = 1; i < particles.size(); ++i) {
-        cumulativeWeights[i] = cumulativeWeights[i - 1] + particles[i].weight;
-    }
-    
-    std::default_random_engine generator;
-    std::uniform_real_distribution<double> distribution(0.0, cumulativeWeights.back());
-
-    // Reamostragem sistemática
-    for (size_t i = 0; i < particles.size(); ++i) {
-        double randomValue = distribution(generator);
-        auto it = std::lower_bound(cumulativeWeights.begin(), cumulativeWeights.end(), randomValue);
-        newParticles.push_back(particles[it - cumulativeWeights.begin()]);
-    }
-    
-    particles = newParticles;
-}
-
-
 // MB-ADR
 double 
 AdrPF::GetFirstQuartile(std::vector<double> values) {
@@ -1,5 +1,7 @@
 #include "ns3/adr-pfmb.h"
 
+#include "ns3/uinteger.h"
+
 namespace ns3 {
 namespace lorawan {
 
@@ -13,6 +15,11 @@ TypeId AdrPFMB::GetTypeId (void)
     .SetGroupName ("lorawan")
     .AddConstructor<AdrPFMB> ()
     .SetParent<AdrLorawan> ()    
+    .AddAttribute ("NumParticles",
+                   "Number of particles of the SNR filter of each end device",
+                   UintegerValue (50),
+                   MakeUintegerAccessor (&AdrPFMB::SetNumParticles, &AdrPFMB::GetNumParticles),
+                   MakeUintegerChecker<uint32_t> (1))
   ;
   return tid;
 }
@@ -25,6 +32,18 @@ AdrPFMB::~AdrPFMB ()
 {
 }
 
+void
+AdrPFMB::SetNumParticles (uint32_t numParticles)
+{
+    m_particles.SetNumParticles (numParticles);
+}
+
+uint32_t
+AdrPFMB::GetNumParticles () const
+{
+    return m_particles.GetNumParticles ();
+}
+
 void
 AdrPFMB::AdrImplementation(uint8_t* newDataRate,
                                 uint8_t* newTxPower,
@@ -32,7 +51,6 @@ AdrPFMB::AdrImplementation(uint8_t* newDataRate,
 {  
   
   
-  int numParticles = 50;
   double processNoise = 0.005;
   double measurementNoise = 0.01;
   std::vector<double> SNRlist(historyRange);
@@ -43,11 +61,10 @@ AdrPFMB::AdrImplementation(uint8_t* newDataRate,
   double TP = status->GetMac()->GetTransmissionPower();   // TP atual
   
   //std::cout << "ADR Central implementation core activated..." << std::endl;
-    EndDeviceStatus::ReceivedPacketList packetList = status->GetReceivedPacketList ();
-    auto it = packetList.rbegin ();
+    const EndDeviceStatus::ReceivedPacketHistory& history = status->GetReceivedPacketHistory ();
         
-    for (int i = 0; i < historyRange; i++, it++)    
-        SNRlist[i] = RxPowerToSNR (GetReceivedPower (it->second.gwList));
+    for (int i = 0; i < historyRange; i++)    
+        SNRlist[i] = RxPowerToSNR (GetReceivedPower (history.Get (i)));
 
   // Ordena a lista e remove outliers 
   
@@ -64,36 +81,13 @@ AdrPFMB::AdrImplementation(uint8_t* newDataRate,
 
   NodeID nodeId = int(status->GetMac()->GetDevice()->GetNode()->GetId());
   // Inicializa partículas se necessário
-  if (nodeParticles.find(nodeId) == nodeParticles.end()) {
-      initializeParticles(nodeId, numParticles, measuredSNR, 1.0 / numParticles);
+  if (!m_particles.HasNode(nodeId)) {
+      m_particles.InitializeNode(nodeId, measuredSNR);
   }
 
-  // Predição e atualização de pesos para cada partícula
-  auto& particles = nodeParticles[nodeId];
-  for (auto& particle : particles) {
-      // Previsão do próximo estado
-      particle.snr = predictSNR(particle.snr, processNoise);
-      // Atualização do peso da partícula
-      particle.weight = updateWeight(particle.snr, measuredSNR, measurementNoise);
-  }
-
-   // Normaliza os pesos das partículas
-    double totalWeight = 0.0;
-    for (const auto& particle : particles) {
-        totalWeight += particle.weight;
-    }
-    for (auto& particle : particles) {
-        particle.weight /= totalWeight;
-    }
-
-   // Reamostragem de partículas
-    resampleParticles(nodeId);
-
-    // Estimação de SNR como média ponderada das partículas
-    double estimatedSNR = 0.0;
-    for (const auto& particle : particles) {
-        estimatedSNR += particle.snr * particle.weight;
-    }
+  // Predição e atualização de pesos para cada partícula, normalização,
+  // reamostragem e estimação de SNR como média ponderada das partículas
+  double estimatedSNR = m_particles.Step(nodeId, measuredSNR, processNoise, measurementNoise);
 
     // Ajusta SF e TP com base na estimativa de SNR
     //double SNRreq = demodulationFloor(currentDataRate);  // Suponha que demodulationFloor() seja implementado
@@ -122,55 +116,6 @@ AdrPFMB::AdrImplementation(uint8_t* newDataRate,
   
 }
 
-// Função para inicializar partículas para um nó
-void 
-AdrPFMB::initializeParticles(NodeID nodeId, int numParticles, double initialSNR, double initialWeight) {
-    std::vector<Particle> particles(numParticles, {initialSNR, initialWeight});
-    nodeParticles[nodeId] = particles;
-}
-
-// Função para calcular uma nova previsão de SNR com base no modelo de sistema
-double 
-AdrPFMB::predictSNR(double currentSNR, double processNoise) {
-    std::default_random_engine generator;
-    std::normal_distribution<double> distribution(currentSNR, processNoise);
-    return distribution(generator);
-}
-
-// Função para atualizar o peso da partícula com base na medição observada
-double 
-AdrPFMB::updateWeight(double predictedSNR, double measuredSNR, double measurementNoise) {
-    double diff = predictedSNR - measuredSNR;
-    return exp(-diff * diff / (2 * measurementNoise * measurementNoise));
-}
-
-// Função para reamostrar partículas com base em seus pesos
-void 
-AdrPFMB::resampleParticles(NodeID nodeId) {
-    auto& particles = nodeParticles[nodeId];
-    std::vector<Particle> newParticles;
-    std::vector<double> cumulativeWeights(particles.size());
-    
-    // Calcula pesos cumulativos
-    cumulativeWeights[0] = particles[0].weight;
-    for (size_t i = 1; i < particles.size(); ++i) {
-        cumulativeWeights[i] = cumulativeWeights[i - 1] + particles[i].weight;
-    }
-    
-    std::default_random_engine generator;
-    std::uniform_real_distribution<double> distribution(0.0, cumulativeWeights.back());
-
-    // Reamostragem sistemática
-    for (size_t i = 0; i < particles.size(); ++i) {
-        double randomValue = distribution(generator);
-        auto it = std::lower_bound(cumulativeWeights.begin(), cumulativeWeights.end(), randomValue);
-        newParticles.push_back(particles[it - cumulativeWeights.begin()]);
-    }
-    
-    particles = newParticles;
-}
-
-
 // MB-ADR
 double 
 AdrPFMB::GetFirstQuartile(std::vector<double> values) {
@@ -7,11 +7,11 @@
 #include "ns3/network-status.h"
 #include "ns3/network-controller-components.h"
 #include "ns3/adr-lorawan.h"
+#include "ns3/particle-filter-pool.h"
 #include <iostream>
 #include <vector>
-#include <unordered_map>
+#include <algorithm>
 #include <cmath>
-#include <random>
 
 namespace ns3 {
 namespace lorawan {
@@ -37,21 +37,13 @@ private:
   // Definição do tipo NodeID como int
   using NodeID = int;
 
-  // Estrutura de Partícula
-  struct Particle {
-      double snr; // Estimativa do SNR
-      double weight; // Peso da partícula
-  };
-
-  // Mapa que armazena partículas para cada nó
-  std::unordered_map<NodeID, std::vector<Particle>> nodeParticles;
+  // Partículas de todos os nós
+  ParticleFilterPool m_particles;
 
   void AdrImplementation(uint8_t* newDataRate, uint8_t* newTxPower, Ptr<EndDeviceStatus> status) override;
 
-  void initializeParticles(NodeID nodeId, int numParticles, double initialSNR, double initialWeight);
-  double predictSNR(double currentSNR, double processNoise);
-  double updateWeight(double predictedSNR, double measuredSNR, double measurementNoise);
-  void resampleParticles(NodeID nodeId);
+  void SetNumParticles(uint32_t numParticles);
+  uint32_t GetNumParticles() const;
  
   double GetFirstQuartile(std::vector<double> values);
   double GetThirdQuartile(std::vector<double> values);
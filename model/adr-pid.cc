@@ -45,7 +45,7 @@ AdrPID::AdrImplementation(uint8_t* newDataRate,
   double SNRreq = threshold[SfToDr(SF)];
   double TP = status->GetMac()->GetTransmissionPower();   // TP atual
   
-  SNRm = GetAverageSNR(status->GetReceivedPacketList(), historyRange);
+  SNRm = GetAverageSNR(status->GetReceivedPacketHistory(), historyRange);
 
   uint8_t edID = status->GetMac()->GetDevice()->GetNode()->GetId();
   PIDState& state = pid_states[edID];
@@ -38,7 +38,7 @@ AdrPlus::ImplementationCore(Ptr<EndDeviceStatus> status)  {
     //std::cout << "ADR+ implementation core activated. ID: " <<  status->GetMac()->GetDevice()->GetNode()->GetId() << std::endl;    
 
     //std::cout << "ADR+ implementation core activated..." << std::endl;    
-    m_SNR = GetAverageSNR(status->GetReceivedPacketList(), historyRange);
+    m_SNR = GetAverageSNR(status->GetReceivedPacketHistory(), historyRange);
 
     //std::cout << "Tempo atual: " << Simulator::Now().GetSeconds() << std::endl; 
     
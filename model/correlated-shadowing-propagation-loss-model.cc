@@ -20,6 +20,7 @@
 #include "ns3/double.h"
 #include "ns3/log.h"
 
+#include <algorithm>
 #include <cmath>
 
 namespace ns3
@@ -45,12 +46,22 @@ CorrelatedShadowingPropagationLossModel::GetTypeId()
                 "uncorrelated",
                 DoubleValue(110.0),
                 MakeDoubleAccessor(&CorrelatedShadowingPropagationLossModel::m_correlationDistance),
-                MakeDoubleChecker<double>());
+                MakeDoubleChecker<double>())
+            .AddAttribute("Bounds",
+                          "The area the shadowing grid is sized for. Positions outside of it "
+                          "make the grid grow.",
+                          RectangleValue(Rectangle()),
+                          MakeRectangleAccessor(&CorrelatedShadowingPropagationLossModel::m_bounds),
+                          MakeRectangleChecker());
     return tid;
 }
 
 CorrelatedShadowingPropagationLossModel::CorrelatedShadowingPropagationLossModel()
+    : m_extent{0, 0, 0, 0}
 {
+    m_shadowingValue = CreateObject<NormalRandomVariable>();
+    m_shadowingValue->SetAttribute("Mean", DoubleValue(0.0));
+    m_shadowingValue->SetAttribute("Variance", DoubleValue(16.0));
 }
 
 double
@@ -66,53 +77,43 @@ CorrelatedShadowingPropagationLossModel::DoCalcRxPower(double txPowerDbm,
      */
     Vector position = a->GetPosition();
 
-    double x = position.x;
-    double y = position.y;
+    // Compute the coordinates of the grid squares of a and b
+    int xcoord = GetSquare(position.x);
+    int ycoord = GetSquare(position.y);
 
-    // Compute the coordinates of the grid square (i.e., round the raw position)
-    // (x > 0) - (x < 0) is the sign function
-    int xcoord =
-        ((x > 0) - (x < 0)) * ((std::fabs(x) + m_correlationDistance / 2) / m_correlationDistance);
-    int ycoord =
-        ((y > 0) - (y < 0)) * ((std::fabs(y) + m_correlationDistance / 2) / m_correlationDistance);
-
-    // Wrap coordinates up in a pair
-    std::pair<int, int> coordinates(xcoord, ycoord);
-
-    NS_LOG_DEBUG("x " << x << ", y " << y);
+    NS_LOG_DEBUG("x " << position.x << ", y " << position.y);
     NS_LOG_DEBUG("xcoord " << xcoord << ", ycoord " << ycoord);
 
-    // Look for the computed coordinates in the shadowingGrid
-    std::map<std::pair<int, int>, Ptr<ShadowingMap>>::const_iterator it;
+    CorrelatedShadowingPropagationLossModel::Position bPosition(b->GetPosition().x,
+                                                                b->GetPosition().y);
 
-    it = m_shadowingGrid.find(coordinates);
+    // Both squares must be inside the grid
+    Cover(xcoord, ycoord);
+    Cover(GetSquare(bPosition.x), GetSquare(bPosition.y));
 
-    if (it == m_shadowingGrid.end()) // Did not find the coordinates
-    {
-        // If this shadowing grid was not found, create it
-        NS_LOG_DEBUG("Creating a new shadowing map to be used at coordinates "
-                     << coordinates.first << " " << coordinates.second);
+    Ptr<ShadowingMap>& shadowingMap =
+        m_shadowingGrid[std::size_t(ycoord - m_extent.minY) * m_extent.width +
+                        (xcoord - m_extent.minX)];
 
-        Ptr<ShadowingMap> shadowingMap =
-            Create<CorrelatedShadowingPropagationLossModel::ShadowingMap>();
-
-        m_shadowingGrid[coordinates] = shadowingMap;
+    if (!shadowingMap) // Did not find the map
+    {
+        // If this shadowing map was not found, create it
+        NS_LOG_DEBUG("Creating a new shadowing map to be used at coordinates " << xcoord << " "
+                                                                               << ycoord);
+
+        shadowingMap = Create<CorrelatedShadowingPropagationLossModel::ShadowingMap>(
+            m_extent,
+            m_correlationDistance,
+            m_shadowingValue);
     }
     else
     {
         NS_LOG_DEBUG("This square already has its shadowingMap!");
     }
 
-    // Place the iterator on the coordinates
-    it = m_shadowingGrid.find(coordinates);
-
-    // Get b's position in a's ShadowingMap
-    CorrelatedShadowingPropagationLossModel::Position bPosition(b->GetPosition().x,
-                                                                b->GetPosition().y);
-
     // Use the map of the a MobilityModel to determine the value of shadowing
     // that corresponds to the position of the MobilityModel b.
-    double loss = it->second->GetLoss(bPosition);
+    double loss = shadowingMap->GetLoss(bPosition);
 
     NS_LOG_INFO("Shadowing loss: " << loss);
 
@@ -122,12 +123,114 @@ CorrelatedShadowingPropagationLossModel::DoCalcRxPower(double txPowerDbm,
 int64_t
 CorrelatedShadowingPropagationLossModel::DoAssignStreams(int64_t stream)
 {
-    return 0;
+    m_shadowingValue->SetStream(stream);
+    return 1;
+}
+
+int
+CorrelatedShadowingPropagationLossModel::GetSquare(double position) const
+{
+    // (x > 0) - (x < 0) is the sign function
+    return ((position > 0) - (position < 0)) *
+           int((std::fabs(position) + m_correlationDistance / 2) / m_correlationDistance);
 }
 
-/*********************************
- *  ShadowingMap implementation  *
- *********************************/
+void
+CorrelatedShadowingPropagationLossModel::Cover(int x, int y) const
+{
+    if (m_extent.Contains(x, y))
+    {
+        return;
+    }
+
+    GridExtent extent = m_extent;
+    if (m_shadowingGrid.empty())
+    {
+        // First use: size the grid for the bounds
+        int minX = GetSquare(m_bounds.xMin);
+        int minY = GetSquare(m_bounds.yMin);
+        extent = {minX,
+                  minY,
+                  GetSquare(m_bounds.xMax) - minX + 1,
+                  GetSquare(m_bounds.yMax) - minY + 1};
+    }
+    if (!extent.Contains(x, y))
+    {
+        // Grow towards the square, by at least half of the current size to
+        // avoid growing again at every step of a node leaving the grid
+        int marginX = std::max(1, extent.width / 2);
+        int marginY = std::max(1, extent.height / 2);
+        int minX = extent.minX;
+        int minY = extent.minY;
+        int maxX = extent.minX + extent.width - 1;
+        int maxY = extent.minY + extent.height - 1;
+        if (m_shadowingGrid.empty() && extent.width <= 1 && extent.height <= 1)
+        {
+            // No bounds were given: start from the square itself
+            minX = maxX = x;
+            minY = maxY = y;
+        }
+        if (x < minX)
+        {
+            minX = x - marginX;
+        }
+        else if (x > maxX)
+        {
+            maxX = x + marginX;
+        }
+        if (y < minY)
+        {
+            minY = y - marginY;
+        }
+        else if (y > maxY)
+        {
+            maxY = y + marginY;
+        }
+        extent = {minX, minY, maxX - minX + 1, maxY - minY + 1};
+    }
+
+    NS_LOG_INFO("Shadowing grid now covers " << extent.width << "x" << extent.height
+                                             << " squares from (" << extent.minX << ","
+                                             << extent.minY << ")");
+
+    // Move the existing maps to the new grid, growing them as well
+    std::vector<Ptr<ShadowingMap>> grid(std::size_t(extent.width) * extent.height);
+    for (int j = 0; j < m_extent.height; j++)
+    {
+        for (int i = 0; i < m_extent.width; i++)
+        {
+            Ptr<ShadowingMap> shadowingMap = m_shadowingGrid[std::size_t(j) * m_extent.width + i];
+            if (shadowingMap)
+            {
+                shadowingMap->Resize(extent, m_shadowingValue);
+                grid[std::size_t(j + m_extent.minY - extent.minY) * extent.width +
+                     (i + m_extent.minX - extent.minX)] = shadowingMap;
+            }
+        }
+    }
+    m_shadowingGrid.swap(grid);
+    m_extent = extent;
+}
+
+std::size_t
+CorrelatedShadowingPropagationLossModel::GetMemoryUsage() const
+{
+    std::size_t memory = m_shadowingGrid.size() * sizeof(Ptr<ShadowingMap>);
+    for (const auto& shadowingMap : m_shadowingGrid)
+    {
+        if (shadowingMap)
+        {
+            memory += shadowingMap->GetMemoryUsage();
+        }
+    }
+    return memory;
+}
+
+bool
+CorrelatedShadowingPropagationLossModel::GridExtent::Contains(int x, int y) const
+{
+    return x >= minX && x < minX + width && y >= minY && y < minY + height;
+}
 
 // k^{-1} was computed offline
 const double CorrelatedShadowingPropagationLossModel::ShadowingMap::m_kInv[4][4] = {
@@ -136,16 +239,17 @@ const double CorrelatedShadowingPropagationLossModel::ShadowingMap::m_kInv[4][4]
     {-0.0415206295795327, -0.366414485833771, 1.27968707244633, -0.366414485833771},
     {-0.366414485833771, -0.0415206295795327, -0.366414485833771, 1.27968707244633}};
 
-CorrelatedShadowingPropagationLossModel::ShadowingMap::ShadowingMap()
-    : m_correlationDistance(110)
+CorrelatedShadowingPropagationLossModel::ShadowingMap::ShadowingMap(
+    const GridExtent& extent,
+    double correlationDistance,
+    Ptr<NormalRandomVariable> shadowingValue)
+    : m_extent{0, 0, 0, 0},
+      m_correlationDistance(correlationDistance)
 {
     NS_LOG_FUNCTION_NOARGS();
 
-    // The generation of new variables and positions along the grid is handled
-    // by the GetLoss function. Here, we only create the normal random variable.
-    m_shadowingValue = CreateObject<NormalRandomVariable>();
-    m_shadowingValue->SetAttribute("Mean", DoubleValue(0.0));
-    m_shadowingValue->SetAttribute("Variance", DoubleValue(16.0));
+    // All the vertices are generated here, in a single pass
+    Resize(extent, shadowingValue);
 }
 
 CorrelatedShadowingPropagationLossModel::ShadowingMap::~ShadowingMap()
@@ -153,113 +257,104 @@ CorrelatedShadowingPropagationLossModel::ShadowingMap::~ShadowingMap()
     NS_LOG_FUNCTION_NOARGS();
 }
 
-double
-CorrelatedShadowingPropagationLossModel::ShadowingMap::GetLoss(
-    CorrelatedShadowingPropagationLossModel::Position position)
+void
+CorrelatedShadowingPropagationLossModel::ShadowingMap::Resize(
+    const GridExtent& extent,
+    Ptr<NormalRandomVariable> shadowingValue)
 {
-    NS_LOG_FUNCTION(this << position.x << position.y);
+    NS_LOG_FUNCTION(this << extent.width << extent.height);
 
-    // Verify whether this position is already in the shadowingMap. Since the
-    // Position implementation overloads the == operator, this comparison
-    // between doubles is ok and we can use std::map's find function.
-    std::map<CorrelatedShadowingPropagationLossModel::Position, double>::const_iterator it;
-    it = m_shadowingMap.find(position);
-
-    // If it's not found (i.e, if find returns the end of the map), we need to
-    // generate the value at the specified position.
-    if (it == m_shadowingMap.end())
+    // Vertices already in the map keep their value, the others are drawn row
+    // by row
+    std::vector<double> vertices(std::size_t(extent.width + 1) * (extent.height + 1));
+    for (int j = 0; j <= extent.height; j++)
     {
-        // Get the coordinates of the position
-        double x = position.x;
-        double y = position.y;
-        int xcoord = ((x > 0) - (x < 0)) *
-                     ((std::fabs(x) + m_correlationDistance / 2) / m_correlationDistance);
-        int ycoord = ((y > 0) - (y < 0)) *
-                     ((std::fabs(y) + m_correlationDistance / 2) / m_correlationDistance);
-
-        // Verify whether there already are the 4 surrounding positions in the
-        // map
-        double xmin = xcoord * m_correlationDistance - m_correlationDistance / 2;
-        double xmax = xcoord * m_correlationDistance + m_correlationDistance / 2;
-        double ymin = ycoord * m_correlationDistance - m_correlationDistance / 2;
-        double ymax = ycoord * m_correlationDistance + m_correlationDistance / 2;
-
-        CorrelatedShadowingPropagationLossModel::Position lowerLeft(xmin, ymin);
-        CorrelatedShadowingPropagationLossModel::Position upperLeft(xmin, ymax);
-        CorrelatedShadowingPropagationLossModel::Position lowerRight(xmax, ymin);
-        CorrelatedShadowingPropagationLossModel::Position upperRight(xmax, ymax);
-
-        NS_LOG_DEBUG("Generating a new shadowing value in the following quadrant:");
-        NS_LOG_DEBUG("xmin " << xmin << ", xmax " << xmax << ", ymin " << ymin << ", ymax "
-                             << ymax);
-
-        // Use the map's insert method to insert the coordinates of the 4
-        // surrounding positions (if they are already there, they won't be
-        // substituted thanks to the map's implementation).
-        // TODO: Avoid useless generation of ShadowingMap values. This can be
-        // done by performing some checks (and not leveraging the map
-        // implementation)
-        double q11 = m_shadowingValue->GetValue();
-        NS_LOG_DEBUG("Lower left corner: " << q11);
-        m_shadowingMap[lowerLeft] = q11;
-        double q12 = m_shadowingValue->GetValue();
-        NS_LOG_DEBUG("Upper left corner: " << q12);
-        m_shadowingMap[upperLeft] = q12;
-        double q21 = m_shadowingValue->GetValue();
-        NS_LOG_DEBUG("Lower right corner: " << q21);
-        m_shadowingMap[lowerRight] = q21;
-        double q22 = m_shadowingValue->GetValue();
-        NS_LOG_DEBUG("Upper right corner: " << q22);
-        m_shadowingMap[upperRight] = q22;
-
-        NS_LOG_DEBUG(q11 << " " << q12 << " " << q21 << " " << q22 << " ");
-
-        // The c matrix contains the positions of the 4 vertices
-        double c[2][4] = {{xmin, xmax, xmax, xmin}, {ymin, ymin, ymax, ymax}};
-
-        // For the following procedure, reference:
-        // S. Schlegel et al., "On the Interpolation of Data with Normally
-        // Distributed Uncertainty for Visualization", IEEE Transactions on
-        // Visualization and Computer Graphics, vol. 18, no. 12, Dec. 2012.
-
-        // Compute the phi coefficients
-        double phi1 = 0;
-        double phi2 = 0;
-        double phi3 = 0;
-        double phi4 = 0;
-
-        for (int j = 0; j < 4; j++)
+        for (int i = 0; i <= extent.width; i++)
         {
-            double distance = sqrt((c[0][j] - x) * (c[0][j] - x) + (c[1][j] - y) * (c[1][j] - y));
-
-            NS_LOG_DEBUG("Distance: " << distance);
-
-            double k = std::exp(-distance / m_correlationDistance);
-            phi1 = phi1 + m_kInv[0][j] * k;
-            phi2 = phi2 + m_kInv[1][j] * k;
-            phi3 = phi3 + m_kInv[2][j] * k;
-            phi4 = phi4 + m_kInv[3][j] * k;
+            int x = extent.minX + i;
+            int y = extent.minY + j;
+            bool known = !m_vertices.empty() && x >= m_extent.minX &&
+                         x <= m_extent.minX + m_extent.width && y >= m_extent.minY &&
+                         y <= m_extent.minY + m_extent.height;
+            vertices[std::size_t(j) * (extent.width + 1) + i] =
+                known ? GetVertex(x, y) : shadowingValue->GetValue();
         }
+    }
+    m_vertices.swap(vertices);
+    m_extent = extent;
+}
 
-        NS_LOG_DEBUG("Phi: " << phi1 << " " << phi2 << " " << phi3 << " " << phi4 << " ");
+double
+CorrelatedShadowingPropagationLossModel::ShadowingMap::GetVertex(int x, int y) const
+{
+    return m_vertices[std::size_t(y - m_extent.minY) * (m_extent.width + 1) + (x - m_extent.minX)];
+}
 
-        double shadowing = q11 * phi1 + q21 * phi2 + q22 * phi3 + q12 * phi4;
+double
+CorrelatedShadowingPropagationLossModel::ShadowingMap::GetLoss(
+    CorrelatedShadowingPropagationLossModel::Position position) const
+{
+    NS_LOG_FUNCTION(this << position.x << position.y);
 
-        // Add the newly computed shadowing value to the shadowing map
-        m_shadowingMap[position] = shadowing;
-        NS_LOG_DEBUG("Created new shadowing map: " << shadowing);
-    }
-    else
+    // Get the coordinates of the position
+    double x = position.x;
+    double y = position.y;
+    int xcoord = ((x > 0) - (x < 0)) *
+                 int((std::fabs(x) + m_correlationDistance / 2) / m_correlationDistance);
+    int ycoord = ((y > 0) - (y < 0)) *
+                 int((std::fabs(y) + m_correlationDistance / 2) / m_correlationDistance);
+
+    NS_ASSERT_MSG(m_extent.Contains(xcoord, ycoord),
+                  "Position (" << x << "," << y << ") is outside the shadowing map");
+
+    // The 4 vertices surrounding the position
+    double xmin = xcoord * m_correlationDistance - m_correlationDistance / 2;
+    double xmax = xcoord * m_correlationDistance + m_correlationDistance / 2;
+    double ymin = ycoord * m_correlationDistance - m_correlationDistance / 2;
+    double ymax = ycoord * m_correlationDistance + m_correlationDistance / 2;
+
+    double q11 = GetVertex(xcoord, ycoord);         // Lower left corner
+    double q12 = GetVertex(xcoord, ycoord + 1);     // Upper left corner
+    double q21 = GetVertex(xcoord + 1, ycoord);     // Lower right corner
+    double q22 = GetVertex(xcoord + 1, ycoord + 1); // Upper right corner
+
+    NS_LOG_DEBUG(q11 << " " << q12 << " " << q21 << " " << q22 << " ");
+
+    // The c matrix contains the positions of the 4 vertices
+    double c[2][4] = {{xmin, xmax, xmax, xmin}, {ymin, ymin, ymax, ymax}};
+
+    // For the following procedure, reference:
+    // S. Schlegel et al., "On the Interpolation of Data with Normally
+    // Distributed Uncertainty for Visualization", IEEE Transactions on
+    // Visualization and Computer Graphics, vol. 18, no. 12, Dec. 2012.
+
+    // Compute the phi coefficients
+    double phi1 = 0;
+    double phi2 = 0;
+    double phi3 = 0;
+    double phi4 = 0;
+
+    for (int j = 0; j < 4; j++)
     {
-        NS_LOG_DEBUG("Shadowing map for this location already exists");
+        double distance = sqrt((c[0][j] - x) * (c[0][j] - x) + (c[1][j] - y) * (c[1][j] - y));
+
+        double k = std::exp(-distance / m_correlationDistance);
+        phi1 = phi1 + m_kInv[0][j] * k;
+        phi2 = phi2 + m_kInv[1][j] * k;
+        phi3 = phi3 + m_kInv[2][j] * k;
+        phi4 = phi4 + m_kInv[3][j] * k;
     }
 
-    return m_shadowingMap[position];
+    NS_LOG_DEBUG("Phi: " << phi1 << " " << phi2 << " " << phi3 << " " << phi4 << " ");
+
+    return q11 * phi1 + q21 * phi2 + q22 * phi3 + q12 * phi4;
 }
 
-/*****************************
- *  Position Implementation  *
- *****************************/
+std::size_t
+CorrelatedShadowingPropagationLossModel::ShadowingMap::GetMemoryUsage() const
+{
+    return m_vertices.capacity() * sizeof(double);
+}
 
 CorrelatedShadowingPropagationLossModel::Position::Position()
 {
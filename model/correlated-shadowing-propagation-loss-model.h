@@ -21,8 +21,11 @@
 #include "ns3/mobility-model.h"
 #include "ns3/propagation-loss-model.h"
 #include "ns3/random-variable-stream.h"
+#include "ns3/rectangle.h"
 #include "ns3/vector.h"
 
+#include <vector>
+
 namespace ns3
 {
 class MobilityModel;
@@ -74,12 +77,33 @@ class CorrelatedShadowingPropagationLossModel : public PropagationLossModel
         bool operator<(const Position& other) const;
     };
 
+    /**
+     * A rectangle of grid squares, identified by the coordinates of the lower
+     * left one and by the number of squares along each axis.
+     */
+    struct GridExtent
+    {
+        int minX;   //!< The x coordinate of the leftmost squares
+        int minY;   //!< The y coordinate of the lowest squares
+        int width;  //!< The number of squares along the x axis
+        int height; //!< The number of squares along the y axis
+
+        /**
+         * Whether a square belongs to the extent.
+         *
+         * \param x The x coordinate of the square.
+         * \param y The y coordinate of the square.
+         * \return True if the square is inside the extent.
+         */
+        bool Contains(int x, int y) const;
+    };
+
     /**
      * \ingroup lorawan
      *
-     * This initializes the shadowing map with a grid of independent
-     * shadowing values, one m_correlationDistance meters apart from the next
-     * one. The result is something like:
+     * This holds a grid of independent shadowing values, one
+     * m_correlationDistance meters apart from the next one, covering the
+     * whole GridExtent of the model. The result is something like:
      *
      *       o---o---o---o---o
      *       |   |   |   |   |
@@ -91,48 +115,77 @@ class CorrelatedShadowingPropagationLossModel : public PropagationLossModel
      *
      * where at each o we have an independently generated shadowing value.
      * We can then interpolate the 4 values surrounding any point in space
-     * in order to get a correlated shadowing value. After generating this
-     * value, we will add it to the map so that we don't have to compute it
-     * twice. Also, since interpolation is a deterministic operation, we are
-     * guaranteed that, as long as the grid doesn't change, also two values
-     * generated in the same square will be correlated.
+     * in order to get a correlated shadowing value. The values at the
+     * vertices are all generated at once, when the map is created, and kept
+     * in a contiguous array: since interpolation is a deterministic
+     * operation, two values computed in the same square are correlated, and
+     * the same position always gets the same value.
      */
     class ShadowingMap
         : public SimpleRefCount<CorrelatedShadowingPropagationLossModel::ShadowingMap>
     {
       public:
-        ShadowingMap();  //!< Default constructor
+        /**
+         * Generate the vertices of a grid covering an extent.
+         *
+         * \param extent The squares the grid must cover.
+         * \param correlationDistance The side of a square.
+         * \param shadowingValue The random variable the vertices are drawn from.
+         */
+        ShadowingMap(const GridExtent& extent,
+                     double correlationDistance,
+                     Ptr<NormalRandomVariable> shadowingValue);
         ~ShadowingMap(); //!< Destructor
 
         /**
-         * Get the loss for a certain position.
+         * Get the loss for a certain position, by interpolating the values of
+         * the vertices of the square it belongs to.
          *
-         * If the position is not already in the map, add it by computing the
-         * interpolation of neighboring shadowing values belonging to the grid.
-         *
-         * \param position The Position instance.
+         * \param position The Position instance, inside the extent of the map.
          * \return The loss as a double.
          */
-        double GetLoss(CorrelatedShadowingPropagationLossModel::Position position);
+        double GetLoss(CorrelatedShadowingPropagationLossModel::Position position) const;
+
+        /**
+         * Cover a larger extent, keeping the vertices that are already there
+         * and generating the new ones.
+         *
+         * \param extent The new extent, containing the current one.
+         * \param shadowingValue The random variable the new vertices are drawn from.
+         */
+        void Resize(const GridExtent& extent, Ptr<NormalRandomVariable> shadowingValue);
+
+        /**
+         * Get the memory taken by the vertices of the map.
+         *
+         * \return The size in bytes.
+         */
+        std::size_t GetMemoryUsage() const;
 
       private:
         /**
-         * For each Position, this map gives a corresponding loss.
-         * The map contains a basic grid that is initialized at construction
-         * time, and then newly computed values are added as they are created.
+         * Get the value at a vertex of the grid.
+         *
+         * \param x The x index of the vertex.
+         * \param y The y index of the vertex.
+         * \return The shadowing value.
          */
-        std::map<CorrelatedShadowingPropagationLossModel::Position, double> m_shadowingMap;
+        double GetVertex(int x, int y) const;
+
+        GridExtent m_extent; //!< The squares covered by the map
 
         /**
-         * The distance after which two samples are to be considered almost
-         * uncorrelated
+         * The values at the (width + 1) x (height + 1) vertices of the
+         * squares in m_extent, row by row. The vertex with indexes (x, y) is
+         * the lower left corner of square (x, y).
          */
-        double m_correlationDistance;
+        std::vector<double> m_vertices;
 
         /**
-         * The normal random variable that is used to obtain shadowing values.
+         * The distance after which two samples are to be considered almost
+         * uncorrelated
          */
-        Ptr<NormalRandomVariable> m_shadowingValue;
+        double m_correlationDistance;
 
         /**
          * The inverted K matrix.
@@ -150,6 +203,18 @@ class CorrelatedShadowingPropagationLossModel : public PropagationLossModel
 
     CorrelatedShadowingPropagationLossModel(); //!< Default constructor
 
+    /**
+     * Get the memory taken by the shadowing maps created so far.
+     *
+     * Each ShadowingMap takes (width + 1) x (height + 1) values, where width
+     * and height are the number of squares in the Bounds of the model, and
+     * at most one map is created per square. The memory is thus bounded by
+     * the Bounds attribute, unless nodes leave them.
+     *
+     * \return The size in bytes.
+     */
+    std::size_t GetMemoryUsage() const;
+
   private:
     double DoCalcRxPower(double txPowerDbm,
                          Ptr<MobilityModel> a,
@@ -157,13 +222,47 @@ class CorrelatedShadowingPropagationLossModel : public PropagationLossModel
 
     int64_t DoAssignStreams(int64_t stream) override;
 
+    /**
+     * Get the coordinate of the grid square a position belongs to along an
+     * axis (i.e., round the raw position).
+     *
+     * \param position The x or y coordinate of the position.
+     * \return The coordinate of the square.
+     */
+    int GetSquare(double position) const;
+
+    /**
+     * Make the grid cover a square, growing it and all the maps created so
+     * far if needed.
+     *
+     * \param x The x coordinate of the square.
+     * \param y The y coordinate of the square.
+     */
+    void Cover(int x, int y) const;
+
     double m_correlationDistance; //!< The correlation distance for the ShadowingMap
 
     /**
-     * Map linking a square to a ShadowingMap.
-     * Each square of the shadowing grid has a corresponding ShadowingMap, and a
-     * square is identified by a pair of coordinates. Coordinates are computed as
-     * such:
+     * The area the grid is sized for when the model is first used. Positions
+     * outside of it make the grid grow.
+     */
+    Rectangle m_bounds;
+
+    /**
+     * The squares covered by the grid, and by each one of the maps.
+     */
+    mutable GridExtent m_extent;
+
+    /**
+     * The normal random variable that is used to obtain shadowing values.
+     */
+    Ptr<NormalRandomVariable> m_shadowingValue;
+
+    /**
+     * Vector linking a square to a ShadowingMap, row by row over m_extent.
+     * Each square of the shadowing grid has a corresponding ShadowingMap, that
+     * is created the first time a node in the square transmits. A square is
+     * identified by a pair of coordinates. Coordinates are computed as such:
      *
      *        o---------o---------o---------o---------o---------o
      *        |         |         |    '    |         |         |
@@ -187,16 +286,16 @@ class CorrelatedShadowingPropagationLossModel : public PropagationLossModel
      *        |         |         |    '    |         |         |
      *        o---------o---------o---------o---------o---------o
      *
-     *  For each one of these coordinates, a ShadowingMap is computed. That is,
-     *  each one of the points belonging to the same square sees the same
-     *  shadowing for the points around it. This is one level of correlation for
-     *  the shadowing, i.e. close nodes transmitting to the same point will see
-     *  the same shadowing since they are using the same shadowing map.
-     *  Further, the ShadowingMap will be "smooth": when transmitting from point
-     *  a to points b and c, the shadowing experienced by b and c will be similar
-     *  if they are close (ideally, within a correlation distance).
+     *  That is, each one of the points belonging to the same square sees the
+     *  same shadowing for the points around it. This is one level of
+     *  correlation for the shadowing, i.e. close nodes transmitting to the
+     *  same point will see the same shadowing since they are using the same
+     *  shadowing map. Further, the ShadowingMap will be "smooth": when
+     *  transmitting from point a to points b and c, the shadowing experienced
+     *  by b and c will be similar if they are close (ideally, within a
+     *  correlation distance).
      */
-    mutable std::map<std::pair<int, int>, Ptr<ShadowingMap>> m_shadowingGrid;
+    mutable std::vector<Ptr<ShadowingMap>> m_shadowingGrid;
 };
 
 } // namespace lorawan
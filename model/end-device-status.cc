@@ -180,13 +180,20 @@ EndDeviceStatus::GetMac()
     return m_mac;
 }
 
-EndDeviceStatus::ReceivedPacketList
+const EndDeviceStatus::ReceivedPacketList&
 EndDeviceStatus::GetReceivedPacketList() const
 {
     NS_LOG_FUNCTION_NOARGS();
     return m_receivedPacketList;
 }
 
+const EndDeviceStatus::ReceivedPacketHistory&
+EndDeviceStatus::GetReceivedPacketHistory() const
+{
+    NS_LOG_FUNCTION_NOARGS();
+    return m_receivedPacketHistory;
+}
+
 void
 EndDeviceStatus::SetFirstReceiveWindowSpreadingFactor(uint8_t sf)
 {
@@ -275,7 +282,8 @@ EndDeviceStatus::InsertReceivedPacket(Ptr<const Packet> receivedPacket, const Ad
 
     // Start searching from the end
     auto it = m_receivedPacketList.rbegin();
-    for (; it != m_receivedPacketList.rend(); it++)
+    std::size_t age = 0;
+    for (; it != m_receivedPacketList.rend(); it++, age++)
     {
         // Get the frame counter of the current packet to compare it with the
         // newly received one
@@ -304,6 +312,13 @@ EndDeviceStatus::InsertReceivedPacket(Ptr<const Packet> receivedPacket, const Ad
             gwInfo.gwAddress = gwAddress;
             gwList.insert(std::pair<Address, PacketInfoPerGw>(gwAddress, gwInfo));
 
+            // Each packet in the list has a summary with the same age in the
+            // history, unless it is too old to still be in it
+            if (age < m_receivedPacketHistory.GetSize())
+            {
+                UpdateReceptionPower(m_receivedPacketHistory.Get(age), gwList);
+            }
+
             NS_LOG_DEBUG("Size of gateway list: " << gwList.size());
 
             break; // Exit from the cycle
@@ -318,6 +333,18 @@ EndDeviceStatus::InsertReceivedPacket(Ptr<const Packet> receivedPacket, const Ad
         gwInfo.gwAddress = gwAddress;
         info.gwList.insert(std::pair<Address, PacketInfoPerGw>(gwAddress, gwInfo));
         m_receivedPacketList.emplace_back(receivedPacket, info);
+
+        ReceivedPacketSummary summary;
+        summary.receivedTime = gwInfo.receivedTime;
+        summary.sf = info.sf;
+        summary.frequency = info.frequency;
+        if (m_mac)
+        {
+            summary.dataRate = m_mac->GetDataRate();
+            summary.txPower = m_mac->GetTransmissionPower();
+        }
+        UpdateReceptionPower(summary, info.gwList);
+        m_receivedPacketHistory.Push(summary);
     }
     NS_LOG_DEBUG(*this);
 }
@@ -405,6 +432,75 @@ EndDeviceStatus::GetPowerGatewayMap()
     return gatewayPowers;
 }
 
+void
+EndDeviceStatus::UpdateReceptionPower(ReceivedPacketSummary& summary, const GatewayList& gwList)
+{
+    // Gateways are visited in the order of the list, so that the average is
+    // the same as the one computed from the list itself
+    auto it = gwList.begin();
+    double min = it->second.rxPower;
+    double max = it->second.rxPower;
+    double sum = 0;
+    for (; it != gwList.end(); it++)
+    {
+        min = std::min(min, it->second.rxPower);
+        max = std::max(max, it->second.rxPower);
+        sum += it->second.rxPower;
+    }
+
+    summary.gwCount = gwList.size();
+    summary.minRxPower = min;
+    summary.maxRxPower = max;
+    summary.averageRxPower = sum / gwList.size();
+}
+
+/////////////////////////////
+//  ReceivedPacketHistory  //
+/////////////////////////////
+
+EndDeviceStatus::ReceivedPacketHistory::ReceivedPacketHistory(std::size_t capacity)
+    : m_buffer(capacity)
+{
+    NS_ASSERT_MSG(capacity > 0, "The packet history needs a positive capacity");
+}
+
+std::size_t
+EndDeviceStatus::ReceivedPacketHistory::GetSize() const
+{
+    return m_size;
+}
+
+std::size_t
+EndDeviceStatus::ReceivedPacketHistory::GetCapacity() const
+{
+    return m_buffer.size();
+}
+
+const EndDeviceStatus::ReceivedPacketSummary&
+EndDeviceStatus::ReceivedPacketHistory::Get(std::size_t age) const
+{
+    NS_ASSERT_MSG(age < m_size, "Packet " << age << " is not in the history");
+    return m_buffer[(m_next + m_buffer.size() - 1 - age) % m_buffer.size()];
+}
+
+EndDeviceStatus::ReceivedPacketSummary&
+EndDeviceStatus::ReceivedPacketHistory::Get(std::size_t age)
+{
+    NS_ASSERT_MSG(age < m_size, "Packet " << age << " is not in the history");
+    return m_buffer[(m_next + m_buffer.size() - 1 - age) % m_buffer.size()];
+}
+
+void
+EndDeviceStatus::ReceivedPacketHistory::Push(const ReceivedPacketSummary& summary)
+{
+    m_buffer[m_next] = summary;
+    m_next = (m_next + 1) % m_buffer.size();
+    if (m_size < m_buffer.size())
+    {
+        m_size++;
+    }
+}
+
 std::ostream&
 operator<<(std::ostream& os, const EndDeviceStatus& status)
 {
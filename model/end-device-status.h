@@ -31,6 +31,7 @@
 #include "ns3/pointer.h"
 
 #include <iostream>
+#include <vector>
 
 namespace ns3
 {
@@ -67,6 +68,7 @@ namespace lorawan
  *                           - Updated reply
  *                       --- Received Packets
  *                           - Received packets list (see below).
+ *                           - Summaries of the last received packets, for ADR.
  *
  *
  * Private Access:
@@ -173,6 +175,83 @@ class EndDeviceStatus : public Object
      */
     typedef std::list<std::pair<Ptr<const Packet>, ReceivedPacketInfo>> ReceivedPacketList;
 
+    /**
+     * Structure summarizing the reception of a packet at all gateways, as
+     * needed by the Adaptive Data Rate (ADR) components.
+     */
+    struct ReceivedPacketSummary
+    {
+        Time receivedTime;         //!< Time at which the packet was first received
+        uint8_t sf = 0;            //!< Spreading factor used to send this packet
+        uint8_t dataRate = 0;      //!< Data rate of the device when this packet was received
+        uint8_t txPower = 0;       //!< Transmission power [dBm] of the device
+        double frequency = 0;      //!< Carrier frequency [MHz] used to send this packet
+        unsigned gwCount = 0;      //!< Number of gateways that received this packet
+        double minRxPower = 0;     //!< Min reception power [dBm] among the gateways
+        double maxRxPower = 0;     //!< Max reception power [dBm] among the gateways
+        double averageRxPower = 0; //!< Average reception power [dBm] of the gateways
+    };
+
+    /**
+     * Fixed-capacity ring buffer holding the summaries of the last received
+     * packets. Entries are accessed by age: the last received packet has age 0.
+     */
+    class ReceivedPacketHistory
+    {
+      public:
+        /**
+         * Constructor.
+         *
+         * \param capacity The maximum number of summaries to keep.
+         */
+        ReceivedPacketHistory(std::size_t capacity);
+
+        /**
+         * Get the number of summaries currently in the history.
+         *
+         * \return The number of summaries, at most the capacity.
+         */
+        std::size_t GetSize() const;
+
+        /**
+         * Get the maximum number of summaries kept in the history.
+         *
+         * \return The capacity of the history.
+         */
+        std::size_t GetCapacity() const;
+
+        /**
+         * Get the summary of a received packet.
+         *
+         * \param age The number of packets received after the requested one.
+         * \return A reference to the summary.
+         */
+        const ReceivedPacketSummary& Get(std::size_t age) const;
+
+        /**
+         * Get the summary of a received packet for modification.
+         *
+         * \param age The number of packets received after the requested one.
+         * \return A reference to the summary.
+         */
+        ReceivedPacketSummary& Get(std::size_t age);
+
+        /**
+         * Add the summary of a new packet, overwriting the oldest one if the
+         * history is full.
+         *
+         * \param summary The summary of the new packet.
+         */
+        void Push(const ReceivedPacketSummary& summary);
+
+      private:
+        std::vector<ReceivedPacketSummary> m_buffer; //!< Preallocated storage
+        std::size_t m_next = 0;                      //!< Index of the next slot to be written
+        std::size_t m_size = 0;                      //!< Number of valid summaries
+    };
+
+    static constexpr std::size_t historyCapacity = 100; //!< Capacity of the packet history
+
     /*******************************************/
     /* Proper EndDeviceStatus class definition */
     /*******************************************/
@@ -227,9 +306,16 @@ class EndDeviceStatus : public Object
     /**
      * Get the received packet list.
      *
-     * \return The received packet list.
+     * \return A reference to the received packet list.
+     */
+    const ReceivedPacketList& GetReceivedPacketList() const;
+
+    /**
+     * Get the summaries of the last received packets.
+     *
+     * \return A reference to the received packet history.
      */
-    ReceivedPacketList GetReceivedPacketList() const;
+    const ReceivedPacketHistory& GetReceivedPacketHistory() const;
 
     /**
      * Set the spreading factor this device is using in the first receive window.
@@ -366,6 +452,15 @@ class EndDeviceStatus : public Object
     friend std::ostream& operator<<(std::ostream& os, const EndDeviceStatus& status);
 
   private:
+    /**
+     * Update the reception power statistics of a packet summary from the
+     * gateways that received the packet.
+     *
+     * \param summary The summary to update.
+     * \param gwList The gateways that received the packet.
+     */
+    static void UpdateReceptionPower(ReceivedPacketSummary& summary, const GatewayList& gwList);
+
     // Receive window data
     uint8_t m_firstReceiveWindowSpreadingFactor = 0;  //!< Spreading Factor (SF) for RX1 window
     double m_firstReceiveWindowFrequency = 0;         //!< Frequency [MHz] for RX1 window
@@ -374,6 +469,8 @@ class EndDeviceStatus : public Object
     EventId m_receiveWindowEvent; //!< Event storing the next scheduled downlink transmission
 
     ReceivedPacketList m_receivedPacketList; //!< List of received packets
+    ReceivedPacketHistory m_receivedPacketHistory{
+        historyCapacity}; //!< Summaries of the last received packets
 
     /// \note Using this attribute is 'cheating', since we are assuming perfect
     /// synchronization between the info at the device and at the network server
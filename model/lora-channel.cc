@@ -19,11 +19,15 @@
 
 #include "lora-channel.h"
 
+#include "correlated-shadowing-propagation-loss-model.h"
 #include "end-device-lora-phy.h"
 #include "gateway-lora-phy.h"
 
+#include "ns3/boolean.h"
+#include "ns3/double.h"
 #include "ns3/log.h"
 #include "ns3/object-factory.h"
+#include "ns3/okumura-hata-propagation-loss-model.h"
 #include "ns3/packet.h"
 #include "ns3/pointer.h"
 #include "ns3/simulator.h"
@@ -57,6 +61,24 @@ LoraChannel::GetTypeId()
                           PointerValue(),
                           MakePointerAccessor(&LoraChannel::m_delay),
                           MakePointerChecker<PropagationDelayModel>())
+            .AddAttribute("ReceiverCulling",
+                          "Whether to skip the reception events of end device PHYs that get a "
+                          "transmission far below their sensitivity.",
+                          BooleanValue(true),
+                          MakeBooleanAccessor(&LoraChannel::m_cullReceivers),
+                          MakeBooleanChecker())
+            .AddAttribute("ReceiverCullingMargin",
+                          "How far below the lowest end device sensitivity [dB] a transmission "
+                          "must arrive for its reception event to be skipped.",
+                          DoubleValue(30),
+                          MakeDoubleAccessor(&LoraChannel::m_cullingMarginDb),
+                          MakeDoubleChecker<double>(0))
+            .AddAttribute("CacheLinkBudgets",
+                          "Whether to reuse the output of the deterministic loss models between "
+                          "nodes that did not move since the last transmission.",
+                          BooleanValue(true),
+                          MakeBooleanAccessor(&LoraChannel::m_cacheLinkBudgets),
+                          MakeBooleanChecker())
             .AddTraceSource("PacketSent",
                             "Trace source fired whenever a packet goes out on the channel",
                             MakeTraceSourceAccessor(&LoraChannel::m_packetSent),
@@ -65,17 +87,36 @@ LoraChannel::GetTypeId()
 }
 
 LoraChannel::LoraChannel()
+    : m_lossChainInspected(false),
+      m_linkCacheHits(0),
+      m_linkCacheMisses(0)
 {
 }
 
 LoraChannel::~LoraChannel()
 {
     m_phyList.clear();
+    m_isEndDevice.clear();
+
+    // Stop following the mobility models of cached links, with the same
+    // callback that was connected from the const GetRxPower
+    const LoraChannel* channel = this;
+    for (const auto& courseChanges : m_courseChanges)
+    {
+        courseChanges.first->TraceDisconnectWithoutContext(
+            "CourseChange",
+            MakeCallback(&LoraChannel::CourseChanged, channel));
+    }
+    m_courseChanges.clear();
+    m_linkBudgets.clear();
 }
 
 LoraChannel::LoraChannel(Ptr<PropagationLossModel> loss, Ptr<PropagationDelayModel> delay)
     : m_loss(loss),
-      m_delay(delay)
+      m_delay(delay),
+      m_lossChainInspected(false),
+      m_linkCacheHits(0),
+      m_linkCacheMisses(0)
 {
 }
 
@@ -84,8 +125,9 @@ LoraChannel::Add(Ptr<LoraPhy> phy)
 {
     NS_LOG_FUNCTION(this << phy);
 
-    // Add the new phy to the vector
+    // Add the new phy to the vector, remembering its role
     m_phyList.push_back(phy);
+    m_isEndDevice.push_back(bool(DynamicCast<EndDeviceLoraPhy>(phy)));
 }
 
 void
@@ -94,7 +136,9 @@ LoraChannel::Remove(Ptr<LoraPhy> phy)
     NS_LOG_FUNCTION(this << phy);
 
     // Remove the phy from the vector
-    m_phyList.erase(find(m_phyList.begin(), m_phyList.end(), phy));
+    auto it = find(m_phyList.begin(), m_phyList.end(), phy);
+    m_isEndDevice.erase(m_isEndDevice.begin() + (it - m_phyList.begin()));
+    m_phyList.erase(it);
 }
 
 std::size_t
@@ -151,6 +195,15 @@ LoraChannel::Send(Ptr<LoraPhy> sender,
                          << "distance=" << senderMobility->GetDistanceFrom(receiverMobility)
                          << "m, delay=" << delay);
 
+            // The delay and power are computed anyway, so that random models
+            // draw the same values with and without culling
+            if (IsCulled(j, rxPowerDbm))
+            {
+                NS_LOG_INFO("Skipping reception, the power is far below sensitivity");
+                m_packetSent(packet);
+                continue;
+            }
+
             // Get the id of the destination PHY to correctly format the context
             Ptr<NetDevice> dstNetDevice = m_phyList[j]->GetDevice();
             uint32_t dstNode = 0;
@@ -201,12 +254,163 @@ LoraChannel::Receive(uint32_t i, Ptr<Packet> packet, LoraChannelParameters param
                                parameters.frequencyMHz);
 }
 
+bool
+LoraChannel::IsCulled(uint32_t i, double rxPowerDbm) const
+{
+    if (!m_cullReceivers || !m_isEndDevice[i])
+    {
+        return false;
+    }
+
+    static const double minSensitivity =
+        *std::min_element(std::begin(EndDeviceLoraPhy::sensitivity),
+                          std::end(EndDeviceLoraPhy::sensitivity));
+    return rxPowerDbm < minSensitivity - m_cullingMarginDb;
+}
+
 double
 LoraChannel::GetRxPower(double txPowerDbm,
                         Ptr<MobilityModel> senderMobility,
                         Ptr<MobilityModel> receiverMobility) const
 {
-    return m_loss->CalcRxPower(txPowerDbm, senderMobility, receiverMobility);
+    if (!m_cacheLinkBudgets)
+    {
+        return m_loss->CalcRxPower(txPowerDbm, senderMobility, receiverMobility);
+    }
+
+    if (!m_lossChainInspected)
+    {
+        InspectLossChain();
+    }
+
+    // Nothing to cache if the chain starts with a random model
+    if (!m_deterministicTail)
+    {
+        return m_loss->CalcRxPower(txPowerDbm, senderMobility, receiverMobility);
+    }
+
+    // Only links between nodes standing still are cached: a moving node
+    // changes position without notifying a course change
+    double rxPowerDbm;
+    if (senderMobility->GetVelocity().GetLength() == 0 &&
+        receiverMobility->GetVelocity().GetLength() == 0)
+    {
+        uint32_t senderEpoch = GetCourseChanges(senderMobility);
+        uint32_t receiverEpoch = GetCourseChanges(receiverMobility);
+        Link link(PeekPointer(senderMobility), PeekPointer(receiverMobility));
+
+        auto it = m_linkBudgets.find(link);
+        if (it != m_linkBudgets.end() && it->second.txPowerDbm == txPowerDbm &&
+            it->second.senderEpoch == senderEpoch && it->second.receiverEpoch == receiverEpoch)
+        {
+            m_linkCacheHits++;
+            rxPowerDbm = it->second.rxPowerDbm;
+        }
+        else
+        {
+            m_linkCacheMisses++;
+            rxPowerDbm = CalcDeterministicRxPower(txPowerDbm, senderMobility, receiverMobility);
+            m_linkBudgets[link] = {txPowerDbm, rxPowerDbm, senderEpoch, receiverEpoch};
+        }
+    }
+    else
+    {
+        m_linkCacheMisses++;
+        rxPowerDbm = CalcDeterministicRxPower(txPowerDbm, senderMobility, receiverMobility);
+    }
+
+    // The random models are still evaluated for every transmission
+    Ptr<PropagationLossModel> next = m_deterministicTail->GetNext();
+    if (next)
+    {
+        rxPowerDbm = next->CalcRxPower(rxPowerDbm, senderMobility, receiverMobility);
+    }
+
+    return rxPowerDbm;
+}
+
+uint64_t
+LoraChannel::GetLinkCacheHits() const
+{
+    return m_linkCacheHits;
+}
+
+uint64_t
+LoraChannel::GetLinkCacheMisses() const
+{
+    return m_linkCacheMisses;
+}
+
+void
+LoraChannel::InspectLossChain() const
+{
+    NS_LOG_FUNCTION(this);
+
+    // Models whose loss only depends on the positions of the two nodes.
+    // CorrelatedShadowingPropagationLossModel draws the values of a grid
+    // square once, and then keeps them.
+    static const std::vector<TypeId> deterministicModels = {
+        FriisPropagationLossModel::GetTypeId(),
+        TwoRayGroundPropagationLossModel::GetTypeId(),
+        LogDistancePropagationLossModel::GetTypeId(),
+        ThreeLogDistancePropagationLossModel::GetTypeId(),
+        MatrixPropagationLossModel::GetTypeId(),
+        OkumuraHataPropagationLossModel::GetTypeId(),
+        CorrelatedShadowingPropagationLossModel::GetTypeId()};
+
+    m_deterministicTail = nullptr;
+    for (Ptr<PropagationLossModel> model = m_loss; model; model = model->GetNext())
+    {
+        if (std::find(deterministicModels.begin(),
+                      deterministicModels.end(),
+                      model->GetInstanceTypeId()) == deterministicModels.end())
+        {
+            break;
+        }
+        m_deterministicTail = model;
+    }
+    m_lossChainInspected = true;
+
+    NS_LOG_DEBUG("Deterministic part of the loss chain ends at "
+                 << (m_deterministicTail ? m_deterministicTail->GetInstanceTypeId().GetName()
+                                         : "none"));
+}
+
+double
+LoraChannel::CalcDeterministicRxPower(double txPowerDbm,
+                                      Ptr<MobilityModel> senderMobility,
+                                      Ptr<MobilityModel> receiverMobility) const
+{
+    // Detach the random models for the duration of the computation, so that
+    // they do not draw values that would be thrown away
+    Ptr<PropagationLossModel> next = m_deterministicTail->GetNext();
+    m_deterministicTail->SetNext(nullptr);
+    double rxPowerDbm = m_loss->CalcRxPower(txPowerDbm, senderMobility, receiverMobility);
+    m_deterministicTail->SetNext(next);
+
+    return rxPowerDbm;
+}
+
+uint32_t
+LoraChannel::GetCourseChanges(Ptr<MobilityModel> mobility) const
+{
+    auto it = m_courseChanges.find(mobility);
+    if (it == m_courseChanges.end())
+    {
+        mobility->TraceConnectWithoutContext("CourseChange",
+                                             MakeCallback(&LoraChannel::CourseChanged, this));
+        it = m_courseChanges.emplace(mobility, 0).first;
+    }
+    return it->second;
+}
+
+void
+LoraChannel::CourseChanged(Ptr<const MobilityModel> mobility) const
+{
+    NS_LOG_FUNCTION(this << mobility);
+
+    // Links with a stale number of course changes are computed again
+    m_courseChanges[ConstCast<MobilityModel>(mobility)]++;
 }
 
 std::ostream&
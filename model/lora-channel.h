@@ -34,6 +34,9 @@
 #include "ns3/propagation-delay-model.h"
 #include "ns3/propagation-loss-model.h"
 
+#include <map>
+#include <unordered_map>
+#include <utility>
 #include <vector>
 
 namespace ns3
@@ -166,7 +169,92 @@ class LoraChannel : public Channel
                       Ptr<MobilityModel> senderMobility,
                       Ptr<MobilityModel> receiverMobility) const;
 
+    /**
+     * Get the number of GetRxPower calls that reused a cached link budget.
+     *
+     * \return The number of cache hits.
+     */
+    uint64_t GetLinkCacheHits() const;
+
+    /**
+     * Get the number of GetRxPower calls that had to evaluate the whole loss
+     * model chain, either because the link was not cached yet, was no longer
+     * valid or involves a moving node.
+     *
+     * \return The number of cache misses.
+     */
+    uint64_t GetLinkCacheMisses() const;
+
   private:
+    /**
+     * The cached output of the deterministic part of the loss model chain for
+     * a sender and receiver pair.
+     */
+    struct LinkBudget
+    {
+        double txPowerDbm;      //!< The transmission power the budget was computed for
+        double rxPowerDbm;      //!< The power after the deterministic loss models
+        uint32_t senderEpoch;   //!< Course changes of the sender when it was computed
+        uint32_t receiverEpoch; //!< Course changes of the receiver when it was computed
+    };
+
+    /**
+     * A sender and receiver pair of mobility models.
+     */
+    typedef std::pair<const MobilityModel*, const MobilityModel*> Link;
+
+    /**
+     * Hash function for Link keys.
+     */
+    struct LinkHash
+    {
+        /**
+         * \param link The link to hash.
+         * \return The hash value.
+         */
+        std::size_t operator()(const Link& link) const
+        {
+            return std::hash<const void*>()(link.first) * 31 ^
+                   std::hash<const void*>()(link.second);
+        }
+    };
+
+    /**
+     * Find the longest leading part of the loss model chain made only of
+     * models whose output depends on the node positions alone.
+     */
+    void InspectLossChain() const;
+
+    /**
+     * Compute the power at the end of the deterministic part of the loss
+     * model chain.
+     *
+     * \param txPowerDbm The power the transmitter is using, in dBm.
+     * \param senderMobility The mobility model of the sender.
+     * \param receiverMobility The mobility model of the receiver.
+     * \return The power after the deterministic loss models, in dBm.
+     */
+    double CalcDeterministicRxPower(double txPowerDbm,
+                                    Ptr<MobilityModel> senderMobility,
+                                    Ptr<MobilityModel> receiverMobility) const;
+
+    /**
+     * Get how many course changes a mobility model went through, starting to
+     * follow them the first time the model is seen.
+     *
+     * \param mobility The mobility model.
+     * \return The number of course changes since it was first seen.
+     */
+    uint32_t GetCourseChanges(Ptr<MobilityModel> mobility) const;
+
+    /**
+     * Callback for the CourseChange trace of the mobility models of cached
+     * links, invalidating their link budgets.
+     *
+     * \param mobility The mobility model that changed course.
+     */
+    void CourseChanged(Ptr<const MobilityModel> mobility) const;
+
     /**
      * Private method that is scheduled by LoraChannel's Send method to happen
      * after the channel delay, for each of the connected PHY layers.
@@ -180,12 +268,59 @@ class LoraChannel : public Channel
      */
     void Receive(uint32_t i, Ptr<Packet> packet, LoraChannelParameters parameters) const;
 
+    /**
+     * Whether a transmission arriving at the i-th PHY with the given power can
+     * be left out of its reception events.
+     *
+     * Only end device PHYs are culled, and only when the power is lower than
+     * the lowest EndDeviceLoraPhy sensitivity by more than the culling margin.
+     * Such a signal can neither be locked on nor measurably change the
+     * interference at the receiver. Gateways always get every transmission,
+     * since their under sensitivity losses are traced.
+     *
+     * \param i The index of the receiver PHY.
+     * \param rxPowerDbm The power of the transmission at the receiver.
+     * \return True if the reception event can be skipped.
+     */
+    bool IsCulled(uint32_t i, double rxPowerDbm) const;
+
     /**
      * The vector containing the PHYs that are currently connected to the
      * channel.
      */
     std::vector<Ptr<LoraPhy>> m_phyList;
 
+    /**
+     * Whether each PHY in m_phyList is an end device PHY, kept in the same
+     * order.
+     */
+    std::vector<bool> m_isEndDevice;
+
+    bool m_cullReceivers;     //!< Whether reception events are culled
+    double m_cullingMarginDb; //!< Margin below the lowest end device sensitivity [dB]
+
+    bool m_cacheLinkBudgets; //!< Whether link budgets of static nodes are cached
+
+    /**
+     * The link budgets of static sender and receiver pairs.
+     */
+    mutable std::unordered_map<Link, LinkBudget, LinkHash> m_linkBudgets;
+
+    /**
+     * The course changes of every mobility model seen in a cached link.
+     */
+    mutable std::map<Ptr<MobilityModel>, uint32_t> m_courseChanges;
+
+    /**
+     * The last model of the deterministic part of the loss model chain, or 0
+     * if the chain starts with a random model.
+     */
+    mutable Ptr<PropagationLossModel> m_deterministicTail;
+
+    mutable bool m_lossChainInspected;  //!< Whether m_deterministicTail is up to date
+    mutable uint64_t m_linkCacheHits;   //!< Number of link budgets reused
+    mutable uint64_t m_linkCacheMisses; //!< Number of link budgets computed
+
     /**
      * Pointer to the loss model.
      *
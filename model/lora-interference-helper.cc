@@ -22,6 +22,7 @@
 #include "ns3/enum.h"
 #include "ns3/log.h"
 
+#include <algorithm>
 #include <limits>
 
 namespace ns3
@@ -209,11 +210,12 @@ LoraInterferenceHelper::Add(Time duration,
                                               packet,
                                               frequencyMHz);
 
-    // Add the event to the list
-    m_events.push_back(event);
+    // Add the event to the index of its channel
+    m_events[frequencyMHz].emplace(event->GetEndTime(), std::make_pair(m_nextSequence++, event));
+    m_nEvents++;
 
     // Clean the event list
-    if (m_events.size() > 100)
+    if (m_nEvents > 100)
     {
         CleanOldEvents();
     }
@@ -226,16 +228,14 @@ LoraInterferenceHelper::CleanOldEvents()
 {
     NS_LOG_FUNCTION(this);
 
-    // Cycle the events, and clean up if an event is old.
-    for (auto it = m_events.begin(); it != m_events.end();)
+    // Events of each channel are ordered by end time: old ones are at the front
+    for (auto& [frequency, events] : m_events)
     {
-        if ((*it)->GetEndTime() + oldEventThreshold < Simulator::Now())
+        while (!events.empty() &&
+               (*events.begin()).first + oldEventThreshold < Simulator::Now())
         {
-            it = m_events.erase(it);
-        }
-        else
-        {
-            it++;
+            events.erase(events.begin());
+            m_nEvents--;
         }
     }
 }
@@ -243,7 +243,22 @@ LoraInterferenceHelper::CleanOldEvents()
 std::list<Ptr<LoraInterferenceHelper::Event>>
 LoraInterferenceHelper::GetInterferers()
 {
-    return m_events;
+    // Rebuild the list in the order the events were added
+    std::map<uint64_t, Ptr<LoraInterferenceHelper::Event>> sorted;
+    for (const auto& [frequency, events] : m_events)
+    {
+        for (const auto& [endTime, entry] : events)
+        {
+            sorted.insert(entry);
+        }
+    }
+
+    std::list<Ptr<LoraInterferenceHelper::Event>> interferers;
+    for (const auto& [sequence, event] : sorted)
+    {
+        interferers.push_back(event);
+    }
+    return interferers;
 }
 
 void
@@ -253,7 +268,8 @@ LoraInterferenceHelper::PrintEvents(std::ostream& stream)
 
     stream << "Currently registered events:" << std::endl;
 
-    for (auto it = m_events.begin(); it != m_events.end(); it++)
+    std::list<Ptr<LoraInterferenceHelper::Event>> events = GetInterferers();
+    for (auto it = events.begin(); it != events.end(); it++)
     {
         (*it)->Print(stream);
         stream << std::endl;
@@ -265,7 +281,7 @@ LoraInterferenceHelper::IsDestroyedByInterference(Ptr<LoraInterferenceHelper::Ev
 {
     NS_LOG_FUNCTION(this << event);
 
-    NS_LOG_INFO("Current number of events in LoraInterferenceHelper: " << m_events.size());
+    NS_LOG_INFO("Current number of events in LoraInterferenceHelper: " << m_nEvents);
 
     // We want to see the interference affecting this event: cycle through events
     // that overlap with this one and see whether it survives the interference or
@@ -281,24 +297,38 @@ LoraInterferenceHelper::IsDestroyedByInterference(Ptr<LoraInterferenceHelper::Ev
     Time duration = event->GetDuration();
     Time packetStartTime = now - duration;
 
-    // Get the list of interfering events
-    std::list<Ptr<LoraInterferenceHelper::Event>>::iterator it;
+    // Get the list of interfering events: we assume there's no interchannel
+    // interference, so only events on the same channel that end after this
+    // one started can overlap with it. They are visited in the order they
+    // were added, so that the energy sums below do not depend on the index.
+    std::vector<std::pair<uint64_t, Ptr<LoraInterferenceHelper::Event>>> candidates;
+    auto channel = m_events.find(frequency);
+    if (channel != m_events.end())
+    {
+        for (auto it = (*channel).second.upper_bound(packetStartTime);
+             it != (*channel).second.end();
+             ++it)
+        {
+            candidates.push_back((*it).second);
+        }
+    }
+    std::sort(candidates.begin(), candidates.end(), [](const auto& a, const auto& b) {
+        return a.first < b.first;
+    });
 
     // Energy for interferers of various SFs
     std::vector<double> cumulativeInterferenceEnergy(6, 0);
 
     // Cycle over the events
-    for (it = m_events.begin(); it != m_events.end();)
+    for (auto it = candidates.begin(); it != candidates.end();)
     {
         // Pointer to the current interferer
-        Ptr<LoraInterferenceHelper::Event> interferer = *it;
+        Ptr<LoraInterferenceHelper::Event> interferer = (*it).second;
 
-        // Only consider the current event if the channel is the same: we
-        // assume there's no interchannel interference. Also skip the current
-        // event if it's the same that we want to analyze.
-        if (!(interferer->GetFrequency() == frequency) || interferer == event)
+        // Skip the current event if it's the same that we want to analyze.
+        if (interferer == event)
         {
-            NS_LOG_DEBUG("Different channel or same event");
+            NS_LOG_DEBUG("Same event");
             it++;
             continue; // Continues from the first line inside the for cycle
         }
@@ -378,6 +408,7 @@ LoraInterferenceHelper::ClearAllEvents()
     NS_LOG_FUNCTION_NOARGS();
 
     m_events.clear();
+    m_nEvents = 0;
 }
 
 Time
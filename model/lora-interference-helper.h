@@ -30,6 +30,7 @@
 #include "ns3/traced-callback.h"
 
 #include <list>
+#include <map>
 
 namespace ns3
 {
@@ -237,8 +238,17 @@ class LoraInterferenceHelper
 
     std::vector<std::vector<double>> m_collisionSnir; //!< The matrix containing information about
                                                       //!< how packets survive interference
-    std::list<Ptr<LoraInterferenceHelper::Event>>
-        m_events; //!< List of the events this LoraInterferenceHelper is keeping track of
+    /**
+     * The events on a channel, ordered by end time. Each event is stored with its insertion
+     * sequence number, so that interferers can be visited in the order they were added.
+     */
+    typedef std::multimap<Time, std::pair<uint64_t, Ptr<LoraInterferenceHelper::Event>>>
+        ChannelEvents;
+
+    std::map<double, ChannelEvents>
+        m_events; //!< The events this LoraInterferenceHelper is keeping track of, by frequency
+    std::size_t m_nEvents = 0;    //!< Total number of events in m_events
+    uint64_t m_nextSequence = 0;  //!< Sequence number of the next added event
     static Time oldEventThreshold; //!< The threshold after which an event is considered old and
                                    //!< removed from the list
 };
@@ -23,6 +23,7 @@
 #include "ns3/simulator.h"
 
 #include <algorithm>
+#include <map>
 
 namespace ns3
 {
@@ -168,6 +169,51 @@ LoraPhy::GetOnAirTime(Ptr<Packet> packet, LoraTxParameters txParams)
 {
     NS_LOG_FUNCTION(packet << txParams);
 
+    return GetOnAirTime(packet->GetSize(), txParams);
+}
+
+Time
+LoraPhy::GetOnAirTime(uint32_t payloadSize, LoraTxParameters txParams)
+{
+    // Only a handful of combinations are used in a simulation, so that the
+    // table stays small. Durations are kept in seconds, so that they do not
+    // depend on the Time resolution.
+    static std::map<OnAirTimeKey, double> onAirTimes;
+
+    OnAirTimeKey key(payloadSize,
+                     txParams.sf,
+                     txParams.headerDisabled,
+                     txParams.codingRate,
+                     txParams.bandwidthHz,
+                     txParams.nPreamble,
+                     txParams.crcEnabled,
+                     txParams.lowDataRateOptimizationEnabled);
+
+    auto it = onAirTimes.find(key);
+    if (it == onAirTimes.end())
+    {
+        it = onAirTimes.emplace(key, ComputeOnAirTime(payloadSize, txParams)).first;
+    }
+    return Seconds(it->second);
+}
+
+std::vector<Time>
+LoraPhy::GetOnAirTimes(const std::vector<std::pair<uint32_t, LoraTxParameters>>& transmissions)
+{
+    std::vector<Time> durations;
+    durations.reserve(transmissions.size());
+    for (const auto& transmission : transmissions)
+    {
+        durations.push_back(GetOnAirTime(transmission.first, transmission.second));
+    }
+    return durations;
+}
+
+double
+LoraPhy::ComputeOnAirTime(uint32_t payloadSize, LoraTxParameters txParams)
+{
+    NS_LOG_FUNCTION(payloadSize << txParams);
+
     // The contents of this function are based on [1].
     // [1] SX1272 LoRa modem designer's guide.
 
@@ -179,7 +225,7 @@ LoraPhy::GetOnAirTime(Ptr<Packet> packet, LoraTxParameters txParams)
     double tPreamble = (double(txParams.nPreamble) + 4.25) * tSym;
 
     // Payload size
-    uint32_t pl = packet->GetSize(); // Size in bytes
+    uint32_t pl = payloadSize; // Size in bytes
     NS_LOG_DEBUG("Packet of size " << pl << " bytes");
 
     // This step is needed since the formula deals with double values.
@@ -205,7 +251,7 @@ LoraPhy::GetOnAirTime(Ptr<Packet> packet, LoraTxParameters txParams)
     NS_LOG_DEBUG("Total time = " << tPreamble + tPayload);
 
     // Compute and return the total packet on-air time
-    return Seconds(tPreamble + tPayload);
+    return tPreamble + tPayload;
 }
 
 std::ostream&
@@ -31,6 +31,9 @@
 #include "ns3/object.h"
 
 #include <list>
+#include <tuple>
+#include <utility>
+#include <vector>
 
 namespace ns3
 {
@@ -267,7 +270,46 @@ class LoraPhy : public Object
      */
     static Time GetOnAirTime(Ptr<Packet> packet, LoraTxParameters txParams);
 
+    /**
+     * Compute the time that a payload of a certain size will take to be
+     * transmitted.
+     *
+     * Durations are memoized: each combination of payload size and
+     * transmission parameters is only computed the first time it is asked for,
+     * and then read from a table shared by all PHYs.
+     *
+     * \param payloadSize The size of the packet in bytes, headers and trailers included.
+     * \param txParams The set of parameters that will be used for transmission.
+     * \return The time necessary to transmit the packet.
+     */
+    static Time GetOnAirTime(uint32_t payloadSize, LoraTxParameters txParams);
+
+    /**
+     * Compute the time on air of several transmissions at once.
+     *
+     * \param transmissions Pairs of payload size in bytes and transmission parameters.
+     * \return The time necessary to transmit each packet, in the same order.
+     */
+    static std::vector<Time> GetOnAirTimes(
+        const std::vector<std::pair<uint32_t, LoraTxParameters>>& transmissions);
+
   private:
+    /**
+     * Compute the time on air of a payload with the formula of the SX1272 LoRa
+     * modem designer's guide, without looking it up in the table.
+     *
+     * \param payloadSize The size of the packet in bytes.
+     * \param txParams The set of parameters that will be used for transmission.
+     * \return The time necessary to transmit the packet, in seconds.
+     */
+    static double ComputeOnAirTime(uint32_t payloadSize, LoraTxParameters txParams);
+
+    /**
+     * Key of the time on air table: payload size, SF, header disabled, coding
+     * rate, bandwidth, preamble length, CRC and low data rate optimization.
+     */
+    typedef std::tuple<uint32_t, uint8_t, bool, uint8_t, double, uint32_t, bool, bool> OnAirTimeKey;
+
     /**
      * Internal call when transmission of a packet finishes.
      *
@@ -0,0 +1,178 @@
+/*
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License version 2 as
+ * published by the Free Software Foundation;
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program; if not, write to the Free Software
+ * Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+ */
+
+#include "particle-filter-pool.h"
+
+#include "ns3/log.h"
+
+#include <algorithm>
+#include <cmath>
+
+namespace ns3
+{
+namespace lorawan
+{
+
+NS_LOG_COMPONENT_DEFINE("ParticleFilterPool");
+
+ParticleFilterPool::ParticleFilterPool()
+    : m_numParticles(1),
+      m_noise(CreateObject<NormalRandomVariable>()),
+      m_uniform(CreateObject<UniformRandomVariable>())
+{
+}
+
+void
+ParticleFilterPool::SetNumParticles(uint32_t numParticles)
+{
+    NS_LOG_FUNCTION(this << numParticles);
+    NS_ASSERT_MSG(numParticles > 0, "The filter needs at least one particle");
+    NS_ASSERT_MSG(m_slots.empty() || numParticles == m_numParticles,
+                  "The number of particles cannot change once end devices have particles");
+
+    m_numParticles = numParticles;
+}
+
+uint32_t
+ParticleFilterPool::GetNumParticles() const
+{
+    return m_numParticles;
+}
+
+bool
+ParticleFilterPool::HasNode(uint32_t nodeId) const
+{
+    return m_slots.find(nodeId) != m_slots.end();
+}
+
+void
+ParticleFilterPool::InitializeNode(uint32_t nodeId, double initialSnr)
+{
+    NS_LOG_FUNCTION(this << nodeId << initialSnr);
+
+    auto it = m_slots.find(nodeId);
+    if (it == m_slots.end())
+    {
+        it = m_slots.emplace(nodeId, m_active.size()).first;
+        m_active.push_back(0);
+        m_snr.resize(m_snr.size() + m_numParticles);
+        m_weight.resize(m_weight.size() + m_numParticles);
+    }
+
+    std::size_t first = std::size_t(it->second) * m_numParticles;
+    std::fill_n(m_snr.begin() + first, m_numParticles, initialSnr);
+    std::fill_n(m_weight.begin() + first, m_numParticles, 1.0 / m_numParticles);
+    m_active[it->second] = m_numParticles;
+}
+
+double
+ParticleFilterPool::Step(uint32_t nodeId,
+                         double measuredSnr,
+                         double processNoise,
+                         double measurementNoise,
+                         double* weightVariance)
+{
+    NS_LOG_FUNCTION(this << nodeId << measuredSnr);
+
+    auto it = m_slots.find(nodeId);
+    NS_ASSERT_MSG(it != m_slots.end(), "Node " << nodeId << " has no particles");
+
+    uint32_t n = m_active[it->second];
+    double* snr = m_snr.data() + std::size_t(it->second) * m_numParticles;
+    double* weight = m_weight.data() + std::size_t(it->second) * m_numParticles;
+
+    // Prediction and weight update
+    double processVariance = processNoise * processNoise;
+    double totalWeight = 0;
+    for (uint32_t i = 0; i < n; i++)
+    {
+        snr[i] += m_noise->GetValue(0, processVariance);
+        double diff = snr[i] - measuredSnr;
+        weight[i] = std::exp(-diff * diff / (2 * measurementNoise * measurementNoise));
+        totalWeight += weight[i];
+    }
+
+    // Normalization. If the measurement is too far from all the particles for
+    // any weight to be representable, they are all considered equally likely.
+    for (uint32_t i = 0; i < n; i++)
+    {
+        weight[i] = totalWeight > 0 ? weight[i] / totalWeight : 1.0 / n;
+    }
+
+    // Systematic resampling: a single random offset, then n evenly spaced
+    // pointers walk the cumulative weights once
+    m_resampledSnr.resize(m_numParticles);
+    m_resampledWeight.resize(m_numParticles);
+    double step = 1.0 / n;
+    double pointer = m_uniform->GetValue(0, step);
+    double cumulativeWeight = weight[0];
+    uint32_t j = 0;
+    for (uint32_t i = 0; i < n; i++, pointer += step)
+    {
+        while (pointer > cumulativeWeight && j < n - 1)
+        {
+            j++;
+            cumulativeWeight += weight[j];
+        }
+        m_resampledSnr[i] = snr[j];
+        m_resampledWeight[i] = weight[j];
+    }
+    std::copy_n(m_resampledSnr.begin(), n, snr);
+    std::copy_n(m_resampledWeight.begin(), n, weight);
+
+    // Estimate and weight variance
+    double estimate = 0;
+    for (uint32_t i = 0; i < n; i++)
+    {
+        estimate += snr[i] * weight[i];
+    }
+    if (weightVariance)
+    {
+        double meanWeight = 1.0 / n;
+        double variance = 0;
+        for (uint32_t i = 0; i < n; i++)
+        {
+            variance += (weight[i] - meanWeight) * (weight[i] - meanWeight);
+        }
+        *weightVariance = variance / n;
+    }
+
+    return estimate;
+}
+
+void
+ParticleFilterPool::Shrink(uint32_t nodeId, uint32_t numParticles)
+{
+    NS_LOG_FUNCTION(this << nodeId << numParticles);
+
+    auto it = m_slots.find(nodeId);
+    NS_ASSERT_MSG(it != m_slots.end(), "Node " << nodeId << " has no particles");
+
+    if (numParticles > 0 && numParticles < m_active[it->second])
+    {
+        m_active[it->second] = numParticles;
+    }
+}
+
+int64_t
+ParticleFilterPool::AssignStreams(int64_t stream)
+{
+    m_noise->SetStream(stream);
+    m_uniform->SetStream(stream + 1);
+    return 2;
+}
+
+} // namespace lorawan
+} // namespace ns3
@@ -0,0 +1,132 @@
+/*
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License version 2 as
+ * published by the Free Software Foundation;
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program; if not, write to the Free Software
+ * Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+ */
+
+#ifndef PARTICLE_FILTER_POOL_H
+#define PARTICLE_FILTER_POOL_H
+
+#include "ns3/ptr.h"
+#include "ns3/random-variable-stream.h"
+
+#include <unordered_map>
+#include <vector>
+
+namespace ns3
+{
+namespace lorawan
+{
+
+/**
+ * \ingroup lorawan
+ *
+ * Particles of the SNR particle filters used by the AdrPF and AdrPFMB
+ * components, for all the end devices.
+ *
+ * Particles are kept as a structure of arrays: the SNR and weight of all
+ * particles are stored in two contiguous vectors, where each end device owns a
+ * block of a fixed number of particles. An end device may use only the first
+ * part of its block. Noise is drawn from random variable streams that persist
+ * across calls, and resampling is systematic, in linear time, with no memory
+ * allocation after the first step of an end device.
+ */
+class ParticleFilterPool
+{
+  public:
+    ParticleFilterPool(); //!< Default constructor
+
+    /**
+     * Set the number of particles of each end device. It can only be changed
+     * while the pool is empty.
+     *
+     * \param numParticles The number of particles.
+     */
+    void SetNumParticles(uint32_t numParticles);
+
+    /**
+     * Get the number of particles of each end device.
+     *
+     * \return The number of particles.
+     */
+    uint32_t GetNumParticles() const;
+
+    /**
+     * Whether the particles of an end device have been initialized.
+     *
+     * \param nodeId The id of the node of the end device.
+     * \return True if the end device has particles.
+     */
+    bool HasNode(uint32_t nodeId) const;
+
+    /**
+     * Initialize the particles of an end device, with the same SNR and uniform
+     * weights.
+     *
+     * \param nodeId The id of the node of the end device.
+     * \param initialSnr The initial SNR estimate.
+     */
+    void InitializeNode(uint32_t nodeId, double initialSnr);
+
+    /**
+     * Run a step of the filter for an end device: propagate the particles with
+     * Gaussian process noise, weight them according to the measured SNR,
+     * normalize the weights and resample the particles. Resampled particles
+     * keep the weight of the particle they were drawn from.
+     *
+     * \param nodeId The id of the node of the end device.
+     * \param measuredSnr The measured SNR.
+     * \param processNoise The standard deviation of the process noise.
+     * \param measurementNoise The standard deviation of the measurement noise.
+     * \param weightVariance [out] If not null, the variance of the weights of
+     *        the resampled particles.
+     * \return The estimated SNR, the weighted sum of the resampled particles.
+     */
+    double Step(uint32_t nodeId,
+                double measuredSnr,
+                double processNoise,
+                double measurementNoise,
+                double* weightVariance = nullptr);
+
+    /**
+     * Reduce the number of particles used by an end device.
+     *
+     * \param nodeId The id of the node of the end device.
+     * \param numParticles The new number of particles, if lower than the current one.
+     */
+    void Shrink(uint32_t nodeId, uint32_t numParticles);
+
+    /**
+     * Assign a fixed random variable stream number to the random variables
+     * used by this pool.
+     *
+     * \param stream The first stream index to use.
+     * \return The number of stream indices assigned.
+     */
+    int64_t AssignStreams(int64_t stream);
+
+  private:
+    uint32_t m_numParticles;                        //!< Size of the block of each end device
+    std::unordered_map<uint32_t, uint32_t> m_slots; //!< Block index of each node
+    std::vector<uint32_t> m_active;                 //!< Particles in use, per block
+    std::vector<double> m_snr;                      //!< SNR of all particles
+    std::vector<double> m_weight;                   //!< Weight of all particles
+    std::vector<double> m_resampledSnr;             //!< Scratch buffer for resampling
+    std::vector<double> m_resampledWeight;          //!< Scratch buffer for resampling
+    Ptr<NormalRandomVariable> m_noise;              //!< Process noise
+    Ptr<UniformRandomVariable> m_uniform;           //!< Offset of systematic resampling
+};
+
+} // namespace lorawan
+} // namespace ns3
+
+#endif /* PARTICLE_FILTER_POOL_H */
@@ -18,11 +18,19 @@
  */
 
 // Include headers of classes to test
+#include "ns3/boolean.h"
 #include "ns3/constant-position-mobility-model.h"
+#include "ns3/constant-velocity-mobility-model.h"
+#include "ns3/correlated-shadowing-propagation-loss-model.h"
+#include "ns3/double.h"
 #include "ns3/log.h"
 #include "ns3/lora-helper.h"
+#include "ns3/lora-packet-tracker.h"
+#include "ns3/lora-tag.h"
+#include "ns3/lorawan-mac-header.h"
 #include "ns3/mobility-helper.h"
 #include "ns3/one-shot-sender-helper.h"
+#include "ns3/pointer.h"
 #include "ns3/simple-end-device-lora-phy.h"
 #include "ns3/simple-gateway-lora-phy.h"
 
@@ -196,6 +204,23 @@ InterferenceTest::DoRun()
                           0,
                           "Packet did not survive interference as expected");
     interferenceHelper.ClearAllEvents();
+
+    // Events are indexed by channel, but interferers are still listed in the
+    // order they were added
+    event = interferenceHelper.Add(Seconds(2), 14, 7, nullptr, frequency);
+    event1 = interferenceHelper.Add(Seconds(1), 14, 7, nullptr, differentFrequency);
+    Ptr<LoraInterferenceHelper::Event> event2 =
+        interferenceHelper.Add(Seconds(3), 14, 7, nullptr, frequency);
+    std::list<Ptr<LoraInterferenceHelper::Event>> interferers =
+        interferenceHelper.GetInterferers();
+    NS_TEST_EXPECT_MSG_EQ(interferers.size(), 3, "Unexpected number of registered events");
+    retval = interferers.front() == event && *std::next(interferers.begin()) == event1 &&
+             interferers.back() == event2;
+    NS_TEST_EXPECT_MSG_EQ(retval, true, "Interferers are not in insertion order");
+    interferenceHelper.ClearAllEvents();
+    NS_TEST_EXPECT_MSG_EQ(interferenceHelper.GetInterferers().size(),
+                          0,
+                          "Events were not cleared");
 }
 
 /**
@@ -1104,6 +1129,22 @@ TimeOnAirTest::DoRun()
     txParams.codingRate = 1;
     duration = LoraPhy::GetOnAirTime(packet, txParams);
     NS_TEST_EXPECT_MSG_EQ_TOL(duration.GetSeconds(), 2.301952, 0.0001, "Unexpected duration");
+
+    // Durations read from the table are the same as the ones computed above
+    NS_TEST_EXPECT_MSG_EQ(LoraPhy::GetOnAirTime(packet, txParams),
+                          duration,
+                          "Memoized duration differs from the computed one");
+
+    std::vector<std::pair<uint32_t, LoraTxParameters>> transmissions;
+    transmissions.emplace_back(50, txParams);
+    txParams.sf = 7;
+    transmissions.emplace_back(10, txParams);
+    std::vector<Time> durations = LoraPhy::GetOnAirTimes(transmissions);
+    NS_TEST_EXPECT_MSG_EQ(durations.size(), 2, "Wrong number of durations");
+    NS_TEST_EXPECT_MSG_EQ(durations[0], duration, "Unexpected duration in bulk computation");
+    NS_TEST_EXPECT_MSG_EQ(durations[1],
+                          LoraPhy::GetOnAirTime(Create<Packet>(10), txParams),
+                          "Unexpected duration in bulk computation");
 }
 
 /**
@@ -1576,6 +1617,208 @@ PhyConnectivityTest::DoRun()
     NS_TEST_EXPECT_MSG_EQ(edPhy2->GetState(),
                           SimpleEndDeviceLoraPhy::STANDBY,
                           "State didn't switch to STANDBY as expected");
+
+    Reset();
+
+    // Receiver culling
+    ///////////////////
+
+    // An end device far below sensitivity gets no reception event at all
+    txParams.sf = 12;
+    edPhy2->GetMobility()->GetObject<ConstantPositionMobilityModel>()->SetPosition(
+        Vector(1e6, 0, 0));
+
+    Simulator::Schedule(Seconds(2),
+                        &SimpleEndDeviceLoraPhy::Send,
+                        edPhy1,
+                        packet,
+                        txParams,
+                        868.1,
+                        14);
+
+    Simulator::Stop(Hours(2));
+    Simulator::Run();
+    Simulator::Destroy();
+
+    NS_TEST_EXPECT_MSG_EQ(m_receivedPacketCalls, 1, "The nearby PHY didn't receive the packet");
+    NS_TEST_EXPECT_MSG_EQ(m_underSensitivityCalls,
+                          0,
+                          "A PHY far below sensitivity wasn't culled");
+
+    Reset();
+
+    // Without culling, the same PHY is notified and loses the packet
+    channel->SetAttribute("ReceiverCulling", BooleanValue(false));
+    edPhy2->GetMobility()->GetObject<ConstantPositionMobilityModel>()->SetPosition(
+        Vector(1e6, 0, 0));
+
+    Simulator::Schedule(Seconds(2),
+                        &SimpleEndDeviceLoraPhy::Send,
+                        edPhy1,
+                        packet,
+                        txParams,
+                        868.1,
+                        14);
+
+    Simulator::Stop(Hours(2));
+    Simulator::Run();
+    Simulator::Destroy();
+
+    NS_TEST_EXPECT_MSG_EQ(m_receivedPacketCalls, 1, "The nearby PHY didn't receive the packet");
+    NS_TEST_EXPECT_MSG_EQ(m_underSensitivityCalls,
+                          1,
+                          "A PHY wasn't notified with receiver culling disabled");
+}
+
+/**
+ * \ingroup lorawan
+ *
+ * It tests that LoraChannel reuses the deterministic part of the link budget between static nodes,
+ * and computes it again when they move or the transmission power changes
+ */
+class LinkBudgetCacheTest : public TestCase
+{
+  public:
+    LinkBudgetCacheTest();           //!< Default constructor
+    ~LinkBudgetCacheTest() override; //!< Destructor
+
+  private:
+    void DoRun() override;
+};
+
+// Add some help text to this case to describe what it is intended to test
+LinkBudgetCacheTest::LinkBudgetCacheTest()
+    : TestCase("Verify that LoraChannel's link budget cache works as expected")
+{
+}
+
+// Reminder that the test case should clean up after itself
+LinkBudgetCacheTest::~LinkBudgetCacheTest()
+{
+}
+
+// This method is the pure virtual method from class TestCase that every
+// TestCase must implement
+void
+LinkBudgetCacheTest::DoRun()
+{
+    NS_LOG_DEBUG("LinkBudgetCacheTest");
+
+    // Log distance loss, followed by a "random" loss that is always 3 dB
+    Ptr<LogDistancePropagationLossModel> loss = CreateObject<LogDistancePropagationLossModel>();
+    loss->SetPathLossExponent(3.76);
+    loss->SetReference(1, 7.7);
+
+    Ptr<ConstantRandomVariable> constant = CreateObject<ConstantRandomVariable>();
+    constant->SetAttribute("Constant", DoubleValue(3));
+    Ptr<RandomPropagationLossModel> randomLoss = CreateObject<RandomPropagationLossModel>();
+    randomLoss->SetAttribute("Variable", PointerValue(constant));
+    loss->SetNext(randomLoss);
+
+    Ptr<PropagationDelayModel> delay = CreateObject<ConstantSpeedPropagationDelayModel>();
+    Ptr<LoraChannel> channel = CreateObject<LoraChannel>(loss, delay);
+
+    Ptr<ConstantPositionMobilityModel> mob1 = CreateObject<ConstantPositionMobilityModel>();
+    Ptr<ConstantPositionMobilityModel> mob2 = CreateObject<ConstantPositionMobilityModel>();
+    mob1->SetPosition(Vector(0.0, 0.0, 0.0));
+    mob2->SetPosition(Vector(100.0, 0.0, 0.0));
+
+    // The second computation between static nodes is a hit, and gives the same power
+    double rxPower = channel->GetRxPower(14, mob1, mob2);
+    NS_TEST_EXPECT_MSG_EQ_TOL(rxPower, 14 - 82.9 - 3, 0.01, "Wrong received power");
+    NS_TEST_EXPECT_MSG_EQ(channel->GetRxPower(14, mob1, mob2),
+                          rxPower,
+                          "Cached received power differs from the computed one");
+    NS_TEST_EXPECT_MSG_EQ(channel->GetLinkCacheHits(), 1, "Link budget wasn't reused");
+    NS_TEST_EXPECT_MSG_EQ(channel->GetLinkCacheMisses(), 1, "Wrong number of cache misses");
+
+    // A course change invalidates the link
+    mob2->SetPosition(Vector(1000.0, 0.0, 0.0));
+    NS_TEST_EXPECT_MSG_EQ_TOL(channel->GetRxPower(14, mob1, mob2),
+                              14 - 120.5 - 3,
+                              0.01,
+                              "Link budget wasn't invalidated by a course change");
+
+    // So does a different transmission power
+    NS_TEST_EXPECT_MSG_EQ_TOL(channel->GetRxPower(20, mob1, mob2),
+                              20 - 120.5 - 3,
+                              0.01,
+                              "Link budget wasn't computed again for a new transmission power");
+    NS_TEST_EXPECT_MSG_EQ(channel->GetLinkCacheMisses(), 3, "Wrong number of cache misses");
+
+    // Links with a moving node are never cached
+    Ptr<ConstantVelocityMobilityModel> mob3 = CreateObject<ConstantVelocityMobilityModel>();
+    mob3->SetPosition(Vector(100.0, 0.0, 0.0));
+    mob3->SetVelocity(Vector(1.0, 0.0, 0.0));
+    channel->GetRxPower(14, mob1, mob3);
+    channel->GetRxPower(14, mob1, mob3);
+    NS_TEST_EXPECT_MSG_EQ(channel->GetLinkCacheHits(), 1, "A link with a moving node was cached");
+    NS_TEST_EXPECT_MSG_EQ(channel->GetLinkCacheMisses(), 5, "Wrong number of cache misses");
+
+    Simulator::Destroy();
+}
+
+/**
+ * \ingroup lorawan
+ *
+ * It tests that the dense grid of CorrelatedShadowingPropagationLossModel has the expected size,
+ * and keeps its values when it grows
+ */
+class CorrelatedShadowingTest : public TestCase
+{
+  public:
+    CorrelatedShadowingTest();           //!< Default constructor
+    ~CorrelatedShadowingTest() override; //!< Destructor
+
+  private:
+    void DoRun() override;
+};
+
+// Add some help text to this case to describe what it is intended to test
+CorrelatedShadowingTest::CorrelatedShadowingTest()
+    : TestCase("Verify that the correlated shadowing grid works as expected")
+{
+}
+
+// Reminder that the test case should clean up after itself
+CorrelatedShadowingTest::~CorrelatedShadowingTest()
+{
+}
+
+// This method is the pure virtual method from class TestCase that every
+// TestCase must implement
+void
+CorrelatedShadowingTest::DoRun()
+{
+    NS_LOG_DEBUG("CorrelatedShadowingTest");
+
+    // 1000 m wide area: squares -5 to 5 with the default 110 m correlation distance
+    Ptr<CorrelatedShadowingPropagationLossModel> shadowing =
+        CreateObject<CorrelatedShadowingPropagationLossModel>();
+    shadowing->SetAttribute("Bounds", RectangleValue(Rectangle(-500, 500, -500, 500)));
+
+    Ptr<ConstantPositionMobilityModel> mob1 = CreateObject<ConstantPositionMobilityModel>();
+    Ptr<ConstantPositionMobilityModel> mob2 = CreateObject<ConstantPositionMobilityModel>();
+    mob1->SetPosition(Vector(10.0, 20.0, 0.0));
+    mob2->SetPosition(Vector(300.0, -250.0, 0.0));
+
+    double rxPower = shadowing->CalcRxPower(14, mob1, mob2);
+    NS_TEST_EXPECT_MSG_EQ(shadowing->CalcRxPower(14, mob1, mob2),
+                          rxPower,
+                          "The same positions got a different shadowing");
+
+    // One map, with 12 x 12 vertices, and a pointer for each one of the 11 x 11 squares
+    NS_TEST_EXPECT_MSG_EQ(shadowing->GetMemoryUsage(),
+                          12 * 12 * sizeof(double) + 11 * 11 * sizeof(Ptr<Object>),
+                          "Unexpected size of the shadowing grid");
+
+    // A node outside of the bounds makes the grid grow, without changing the other values
+    Ptr<ConstantPositionMobilityModel> mob3 = CreateObject<ConstantPositionMobilityModel>();
+    mob3->SetPosition(Vector(2000.0, 0.0, 0.0));
+    shadowing->CalcRxPower(14, mob1, mob3);
+    NS_TEST_EXPECT_MSG_EQ(shadowing->CalcRxPower(14, mob1, mob2),
+                          rxPower,
+                          "Growing the grid changed the shadowing");
 }
 
 /**
@@ -1614,6 +1857,133 @@ LorawanMacTest::DoRun()
     NS_LOG_DEBUG("LorawanMacTest");
 }
 
+/**
+ * \ingroup lorawan
+ *
+ * It tests that the streaming mode of LoraPacketTracker, which folds finalized packets into
+ * per-interval counters, gives the same counts as the default mode
+ */
+class PacketTrackerTest : public TestCase
+{
+  public:
+    PacketTrackerTest();           //!< Default constructor
+    ~PacketTrackerTest() override; //!< Destructor
+
+  private:
+    void DoRun() override;
+
+    /**
+     * Feed the same uplink packet to both trackers, as if it were sent now.
+     *
+     * \param sf The spreading factor of the packet.
+     * \param received Whether the packet is received by the gateway.
+     */
+    void Send(uint8_t sf, bool received);
+
+    LoraPacketTracker m_default;   //!< Tracker in default mode
+    LoraPacketTracker m_streaming; //!< Tracker in streaming mode
+};
+
+// Add some help text to this case to describe what it is intended to test
+PacketTrackerTest::PacketTrackerTest()
+    : TestCase("Verify that the streaming mode of LoraPacketTracker keeps the packet counts")
+{
+}
+
+// Reminder that the test case should clean up after itself
+PacketTrackerTest::~PacketTrackerTest()
+{
+}
+
+void
+PacketTrackerTest::Send(uint8_t sf, bool received)
+{
+    Ptr<Packet> packet = Create<Packet>(10);
+    LorawanMacHeader macHdr;
+    macHdr.SetMType(LorawanMacHeader::UNCONFIRMED_DATA_UP);
+    packet->AddHeader(macHdr);
+    LoraTag tag;
+    tag.SetSpreadingFactor(sf);
+    tag.SetReceivePower(-100);
+    packet->AddPacketTag(tag);
+
+    for (LoraPacketTracker* tracker : {&m_default, &m_streaming})
+    {
+        tracker->MacTransmissionCallback(packet);
+        tracker->TransmissionCallback(packet, 0);
+        if (received)
+        {
+            Simulator::Schedule(Seconds(1),
+                                &LoraPacketTracker::PacketReceptionCallback,
+                                tracker,
+                                packet,
+                                1);
+            Simulator::Schedule(Seconds(1),
+                                &LoraPacketTracker::MacGwReceptionCallback,
+                                tracker,
+                                packet);
+        }
+        else
+        {
+            Simulator::Schedule(Seconds(1),
+                                &LoraPacketTracker::InterferenceCallback,
+                                tracker,
+                                packet,
+                                1);
+        }
+    }
+}
+
+// This method is the pure virtual method from class TestCase that every
+// TestCase must implement
+void
+PacketTrackerTest::DoRun()
+{
+    NS_LOG_DEBUG("PacketTrackerTest");
+
+    // Packets every 2.5 s, some exactly at the boundaries of the 10 s intervals, and a horizon
+    // short enough to fold most of them before the end of the simulation
+    m_streaming.EnableStreaming(Seconds(10), Seconds(5));
+    for (int i = 0; i < 40; i++)
+    {
+        Simulator::Schedule(MilliSeconds(2500 * i),
+                            &PacketTrackerTest::Send,
+                            this,
+                            7 + i % 6,
+                            i % 3 != 0);
+    }
+    Simulator::Stop(Seconds(120));
+    Simulator::Run();
+
+    std::vector<std::pair<Time, Time>> windows = {{Seconds(0), Seconds(100)},
+                                                  {Seconds(10), Seconds(20)},
+                                                  {Seconds(20), Seconds(20)},
+                                                  {Seconds(90), Seconds(120)}};
+    for (const auto& [start, stop] : windows)
+    {
+        std::vector<int> expected = m_default.CountPhyPacketsPerGw(start, stop, 1);
+        std::vector<int> counts = m_streaming.CountPhyPacketsPerGw(start, stop, 1);
+        for (std::size_t i = 0; i < expected.size(); i++)
+        {
+            NS_TEST_EXPECT_MSG_EQ(counts.at(i), expected.at(i), "PHY count " << i << " differs");
+        }
+
+        std::vector<double> expectedMac = m_default.ComputeMacPacketsGlobally(start, stop);
+        std::vector<double> mac = m_streaming.ComputeMacPacketsGlobally(start, stop);
+        NS_TEST_EXPECT_MSG_EQ(mac.at(0), expectedMac.at(0), "Sent MAC packets differ");
+        NS_TEST_EXPECT_MSG_EQ(mac.at(1), expectedMac.at(1), "Received MAC packets differ");
+        for (std::size_t i = 2; i < expectedMac.size(); i++)
+        {
+            NS_TEST_EXPECT_MSG_EQ_TOL(mac.at(i), expectedMac.at(i), 1e-9, "MAC metric differs");
+        }
+    }
+    NS_TEST_EXPECT_MSG_EQ(m_default.CountPhyPacketsPerGw(Seconds(0), Seconds(100), 1).at(0),
+                          40,
+                          "Wrong number of sent packets");
+
+    Simulator::Destroy();
+}
+
 /**
  * \ingroup lorawan
  *
@@ -1638,6 +2008,9 @@ LorawanTestSuite::LorawanTestSuite()
     AddTestCase(new LogicalLoraChannelTest, Duration::QUICK);
     AddTestCase(new TimeOnAirTest, Duration::QUICK);
     AddTestCase(new PhyConnectivityTest, Duration::QUICK);
+    AddTestCase(new LinkBudgetCacheTest, Duration::QUICK);
+    AddTestCase(new CorrelatedShadowingTest, Duration::QUICK);
+    AddTestCase(new PacketTrackerTest, Duration::QUICK);
 }
 
 // Do not forget to allocate an instance of this TestSuite
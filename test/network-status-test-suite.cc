@@ -29,6 +29,8 @@
 
 #include "ns3/end-device-status.h"
 #include "ns3/log.h"
+#include "ns3/lora-tag.h"
+#include "ns3/mac48-address.h"
 #include "ns3/network-status.h"
 
 // An essential include is test.h
@@ -74,6 +76,53 @@ EndDeviceStatusTest::DoRun()
 
     // Create an EndDeviceStatus object
     EndDeviceStatus eds = EndDeviceStatus();
+
+    // Create an uplink packet as it is received by a gateway
+    auto createPacket = [](uint16_t fCnt, double rxPower) {
+        Ptr<Packet> packet = Create<Packet>(10);
+        LoraFrameHeader frameHdr;
+        frameHdr.SetAsUplink();
+        frameHdr.SetFCnt(fCnt);
+        packet->AddHeader(frameHdr);
+        LorawanMacHeader macHdr;
+        macHdr.SetMType(LorawanMacHeader::UNCONFIRMED_DATA_UP);
+        packet->AddHeader(macHdr);
+        LoraTag tag(9);
+        tag.SetFrequency(868.1);
+        tag.SetReceivePower(rxPower);
+        packet->AddPacketTag(tag);
+        return packet;
+    };
+
+    Address gw1 = Mac48Address::Allocate();
+    Address gw2 = Mac48Address::Allocate();
+
+    eds.InsertReceivedPacket(createPacket(0, -100), gw1);
+    eds.InsertReceivedPacket(createPacket(1, -110), gw1);
+    eds.InsertReceivedPacket(createPacket(1, -90), gw2);
+
+    const EndDeviceStatus::ReceivedPacketHistory& history = eds.GetReceivedPacketHistory();
+    NS_TEST_EXPECT_MSG_EQ(history.GetSize(),
+                          eds.GetReceivedPacketList().size(),
+                          "The history does not have one summary per received packet");
+    NS_TEST_EXPECT_MSG_EQ(history.Get(0).gwCount, 2, "Second reception was not summarized");
+    NS_TEST_EXPECT_MSG_EQ(history.Get(0).minRxPower, -110, "Unexpected min reception power");
+    NS_TEST_EXPECT_MSG_EQ(history.Get(0).maxRxPower, -90, "Unexpected max reception power");
+    NS_TEST_EXPECT_MSG_EQ(history.Get(0).averageRxPower,
+                          -100,
+                          "Unexpected average reception power");
+    NS_TEST_EXPECT_MSG_EQ(history.Get(1).gwCount, 1, "Unexpected number of gateways");
+    NS_TEST_EXPECT_MSG_EQ(unsigned(history.Get(1).sf), 9, "Unexpected spreading factor");
+
+    // Only the last packets are kept once the history is full
+    for (std::size_t fCnt = 2; fCnt < history.GetCapacity() + 5; fCnt++)
+    {
+        eds.InsertReceivedPacket(createPacket(fCnt, -double(fCnt)), gw1);
+    }
+    NS_TEST_EXPECT_MSG_EQ(history.GetSize(), history.GetCapacity(), "History is not full");
+    NS_TEST_EXPECT_MSG_EQ(history.Get(0).maxRxPower,
+                          -double(history.GetCapacity() + 4),
+                          "Last packet is not the most recent in the history");
 }
 
 /**